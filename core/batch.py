@@ -0,0 +1,215 @@
+"""
+Headless batch processing.
+
+Streams utterances (one per line) through ExecutionManager with bounded concurrency,
+writes one JSON result per line and reports throughput, latency percentiles and
+intent cache hit rate.
+
+Confirmation policies (nothing is ever executed without one of them allowing it):
+    skip      Resolve and assess only. Nothing is executed.
+    auto-low  Execute LOW risk commands. Everything else is skipped.
+    queue     Execute LOW risk commands. Everything else is written to the queue file
+              for a human to confirm later.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from .schemas import RiskLevel
+
+CONFIRM_POLICIES = ("skip", "auto-low", "queue")
+DEFAULT_QUEUE_FILE = "cache/batch_queue.jsonl"
+UNRESOLVED_INTENTS = ("unknown", "error", "kernel_error")
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100). Returns 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(-(-p * len(ordered) // 100))))
+    return ordered[rank - 1]
+
+
+def read_utterances(source: str) -> Iterator[str]:
+    """Yields utterances lazily from a file ('-' for stdin). Blank lines and '#' comments are skipped."""
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            text = line.strip()
+            if text and not text.startswith("#"):
+                yield text
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class BatchRunner:
+    """
+    Runs utterances through per-worker ExecutionManagers.
+    Each worker thread owns its own PowerShellSession; all workers share one intent cache dict.
+    """
+    def __init__(self, concurrency: int = 4, confirm_policy: str = "skip",
+                 manager_factory: Optional[Callable[[dict], object]] = None,
+                 queue_file: str = DEFAULT_QUEUE_FILE):
+        if confirm_policy not in CONFIRM_POLICIES:
+            raise ValueError(f"Unknown confirm policy '{confirm_policy}' (expected one of: {', '.join(CONFIRM_POLICIES)})")
+        self.concurrency = max(1, concurrency)
+        self.confirm_policy = confirm_policy
+        self.manager_factory = manager_factory or self._default_manager
+        self.queue_file = queue_file
+
+        from .bridge_nlu import NLUBridge
+        self.shared_cache = NLUBridge(session=None).cache
+        self._local = threading.local()
+        self._managers = []
+        self._managers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def _default_manager(shared_cache: dict):
+        from .execution import ExecutionManager
+        return ExecutionManager.create_worker(shared_cache)
+
+    def _worker_manager(self):
+        manager = getattr(self._local, "manager", None)
+        if manager is None:
+            manager = self.manager_factory(self.shared_cache)
+            with self._managers_lock:
+                self._managers.append(manager)
+            self._local.manager = manager
+        return manager
+
+    def process_one(self, index: int, text: str) -> dict:
+        manager = self._worker_manager()
+        nlu = manager.nlu
+        hits_before = getattr(nlu, "cache_hits", 0)
+        start = time.perf_counter()
+        record = {"index": index, "input": text}
+        try:
+            intent, command, risk, timings = manager.process_input(text, with_timings=True)
+            record.update({
+                "intent": intent.intent_type,
+                "command": command,
+                "risk": risk.level.value,
+                "risk_score": risk.score,
+                "reasons": risk.reasons,
+                "cache_hit": getattr(nlu, "cache_hits", 0) > hits_before,
+                "timings_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+            })
+
+            if intent.intent_type in UNRESOLVED_INTENTS:
+                record["status"] = "unresolved"
+            elif self.confirm_policy == "skip":
+                record["status"] = "planned"
+            elif risk.level == RiskLevel.LOW:
+                record.update(self._execute(manager, command, intent))
+            elif self.confirm_policy == "queue":
+                self._enqueue(record)
+                record["status"] = "queued"
+            else:
+                record["status"] = "skipped"
+        except Exception as e:
+            record.update({"status": "error", "error": str(e)})
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return record
+
+    def _execute(self, manager, command: str, intent) -> dict:
+        from .bridge_runner import RunnerBridge
+        logs = []
+        runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=manager.session)
+        success = runner.execute(command, intent)
+        return {"status": "executed" if success else "failed", "output": "\n".join(logs)}
+
+    def _enqueue(self, record: dict):
+        entry = {k: record[k] for k in ("input", "intent", "command", "risk", "reasons")}
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.queue_file) or ".", exist_ok=True)
+            with open(self.queue_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def run(self, utterances: Iterable[str], output: TextIO) -> dict:
+        """
+        Processes all utterances and writes one JSON line per result (in completion order).
+        At most 2x concurrency utterances are in flight, so input is streamed, not preloaded.
+        Returns the summary.
+        """
+        latencies = []
+        statuses = {}
+        cache_hits = 0
+        count = 0
+        start = time.perf_counter()
+
+        def collect(future):
+            nonlocal cache_hits, count
+            record = future.result()
+            count += 1
+            latencies.append(record["latency_ms"])
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+            cache_hits += 1 if record.get("cache_hit") else 0
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="intentshell-batch") as pool:
+            in_flight = set()
+            for index, text in enumerate(utterances):
+                if len(in_flight) >= self.concurrency * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                in_flight.add(pool.submit(self.process_one, index, text))
+            for future in in_flight:
+                collect(future)
+
+        elapsed = time.perf_counter() - start
+        return {
+            "count": count,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies) if latencies else 0.0,
+            },
+            "cache_hit_rate": round(cache_hits / count, 3) if count else 0.0,
+            "statuses": statuses,
+            "concurrency": self.concurrency,
+            "confirm_policy": self.confirm_policy,
+        }
+
+    def close(self):
+        for manager in self._managers:
+            try:
+                manager.close()
+            except Exception:
+                pass
+        self._managers = []
+
+
+def format_summary(summary: dict) -> str:
+    latency = summary["latency_ms"]
+    statuses = ", ".join(f"{name}: {n}" for name, n in sorted(summary["statuses"].items())) or "none"
+    return "\n".join([
+        f"Processed {summary['count']} utterances in {summary['elapsed_s']:.2f}s "
+        f"({summary['throughput_per_s']:.2f}/s, concurrency {summary['concurrency']}, policy {summary['confirm_policy']})",
+        f"Latency ms  p50 {latency['p50']:.1f} | p90 {latency['p90']:.1f} | p99 {latency['p99']:.1f} | max {latency['max']:.1f}",
+        f"Intent cache hit rate: {summary['cache_hit_rate'] * 100:.1f}%",
+        f"Status: {statuses}",
+    ])
+
+
+def run_batch(source: str, output_path: str, concurrency: int = 4, confirm_policy: str = "skip",
+              queue_file: str = DEFAULT_QUEUE_FILE) -> dict:
+    runner = BatchRunner(concurrency=concurrency, confirm_policy=confirm_policy, queue_file=queue_file)
+    output = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        return runner.run(read_utterances(source), output)
+    finally:
+        runner.close()
+        if output is not sys.stdout:
+            output.close()
@@ -6,6 +6,7 @@ import base64
 from typing import Optional
 from .schemas import Intent
 from .powershell_session import PowerShellSession
+from .tracing import traced
 
 class DispatchBridge:
     """
@@ -14,6 +15,7 @@ class DispatchBridge:
     def __init__(self, session: Optional[PowerShellSession] = None):
         self.session = session
 
+    @traced("dispatch.get_safe_command")
     def get_safe_command(self, intent: Intent) -> str:
         """
         Invokes the PowerShell Kernel (CommandGenerator.psm1) to convert the Intent into a Safe Command.
@@ -3,15 +3,59 @@ import json
 import subprocess
 import sys
 import hashlib
+import hmac
+import threading
+import datetime
 from typing import Optional
 from .schemas import Intent, RiskLevel
 from .powershell_session import PowerShellSession
+from .tracing import traced
+from .metrics import counter
+from .security.scanner import SCHEMA_RULES
+
+INTENT_CACHE = counter("intentshell_intent_cache_lookups_total", "Intent cache lookups by result (hit/miss)")
+LLM_FALLBACKS = counter("intentshell_llm_fallbacks_total", "Intents the Kernel resolved through the LLM instead of the registry")
+KERNEL_ERRORS = counter("intentshell_intent_resolution_errors_total", "Resolve-Intent calls that failed or returned a Kernel error")
+
+CACHE_ARTIFACT_FORMAT = "intentshell-intent-cache"
+CACHE_ARTIFACT_VERSION = 1
+# Kernel intent JSON key -> Intent field, for the fields a cache entry carries
+ENTRY_FIELDS = {
+    "intent": "intent_type", "target": "target", "action": "action", "filters": "filters",
+    "recursive": "recursive", "risk": "risk", "description": "description",
+    "generated_command": "generated_command", "requires_elevation": "requires_elevation",
+    "potential_slow": "potential_slow", "confirm_level": "confirm_level", "protocol_version": "protocol_version",
+}
+SIGNATURE_FIELD = "_sig"
+# Text the entry was cached for (the cache is keyed by its hash); signed, read by core.completion
+UTTERANCE_FIELD = "utterance"
+# Signatures also cover the schema validator's rules, so changing a rule re-validates every entry
+VALIDATOR_FINGERPRINT = hashlib.sha256("\n".join(r.pattern for r in SCHEMA_RULES).encode()).hexdigest()[:16]
 
 class NLUBridge:
+    # Shared by every bridge in the process (cache warmer workers, batch pools)
+    _cache_lock = threading.Lock()
+    # key file -> HMAC key; (key file, signature) -> (entry, Intent fields) already verified in this process
+    _signing_keys = {}
+    _verified_entries = {}
+
     def __init__(self, session: Optional[PowerShellSession] = None):
         self.session = session
         self.cache_file = "cache/intent_cache.json"
+        self.key_file = "cache/intent_cache.key"
         self.cache = self._load_cache()
+        # Lookup statistics (bypassed and dynamic queries count as neither)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def cache_key(user_input: str) -> str:
+        return hashlib.md5(user_input.strip().lower().encode()).hexdigest()
+
+    @staticmethod
+    def is_dynamic_query(user_input: str) -> bool:
+        # Dynamic queries (like 'close tab') must always be re-resolved
+        return "close" in user_input.lower() and "tab" in user_input.lower()
 
     def _load_cache(self) -> dict:
         if not os.path.exists("cache"):
@@ -26,11 +70,158 @@ class NLUBridge:
 
     def _save_cache(self):
         try:
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, indent=2)
+            with self._cache_lock:
+                # Write to a temp file first so a crash never leaves a half-written cache
+                tmp_file = f"{self.cache_file}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(self.cache, f, indent=2)
+                os.replace(tmp_file, self.cache_file)
         except Exception as e:
             print(f"Cache Save Error: {e}")
 
+    def _signing_key(self) -> bytes:
+        key = self._signing_keys.get(self.key_file)
+        if key is None:
+            with self._cache_lock:
+                try:
+                    with open(self.key_file, "r", encoding="utf-8") as f:
+                        key = bytes.fromhex(f.read().strip())
+                except (OSError, ValueError):
+                    key = os.urandom(32)
+                    directory = os.path.dirname(self.key_file)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        f.write(key.hex())
+                self._signing_keys[self.key_file] = key
+        return key
+
+    def _signature(self, entry: dict) -> str:
+        payload = json.dumps({k: v for k, v in entry.items() if k != SIGNATURE_FIELD},
+                             sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hmac.new(self._signing_key(), f"{VALIDATOR_FINGERPRINT}:{payload}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def prepare_entry(self, intent_data: dict, utterance: Optional[str] = None) -> dict:
+        """
+        Validate-once-at-write: normalises intent data (Kernel JSON, Intent.__dict__ or a
+        model_dump) to a Kernel-format entry, runs the full Intent validation and signs it.
+        Raises ValueError if validation fails. Signed entries skip validation on cache hits.
+        :param utterance: Input the entry is cached for (defaults to the one intent_data carries).
+        """
+        if "intent" not in intent_data and "intent_type" in intent_data:
+            intent_data = dict(intent_data, intent=intent_data["intent_type"])
+        intent = self._dict_to_intent(intent_data)
+        entry = {key: getattr(intent, field) for key, field in ENTRY_FIELDS.items()}
+        entry["risk"] = intent.risk.value
+        entry["filters"] = list(intent.filters)
+        utterance = utterance or intent_data.get(UTTERANCE_FIELD)
+        if isinstance(utterance, str) and utterance.strip():
+            entry[UTTERANCE_FIELD] = utterance.strip()
+        signature = self._signature(entry)
+        entry[SIGNATURE_FIELD] = signature
+        self._remember_verified(entry)
+        return entry
+
+    def _remember_verified(self, entry: dict) -> dict:
+        fields = {field: entry[key] for key, field in ENTRY_FIELDS.items() if key in entry}
+        fields["risk"] = RiskLevel(entry["risk"])
+        self._verified_entries[(self.key_file, entry[SIGNATURE_FIELD])] = (dict(entry), fields)
+        return fields
+
+    def trusted_fields(self, entry: dict) -> Optional[dict]:
+        """
+        Intent fields for an entry signed by this installation, or None if it is unsigned
+        or does not match its signature. Each signature is HMAC-checked once per process.
+        """
+        signature = entry.get(SIGNATURE_FIELD)
+        if not signature:
+            return None
+        verified = self._verified_entries.get((self.key_file, signature))
+        # Dict equality is much cheaper than the HMAC and still catches edits under an old signature
+        if verified is not None and verified[0] == entry:
+            return verified[1]
+        try:
+            if hmac.compare_digest(signature, self._signature(entry)):
+                return self._remember_verified(entry)
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def is_cacheable(self, user_input: str, intent_data: dict) -> bool:
+        if not user_input or not intent_data:
+            return False
+        # Don't cache errors
+        if intent_data.get("intent") in ["error", "unknown", "kernel_error"]:
+            return False
+        if self.is_dynamic_query(user_input):
+            return False
+        return True
+
+    def add_cache_entries(self, entries: dict, overwrite: bool = False, include_risky: bool = True) -> int:
+        """
+        Merges pre-resolved entries (input hash -> intent data) into the cache.
+        Returns the number of entries added.
+        :param include_risky: False keeps only low risk entries (see import_cache).
+        """
+        added = 0
+        prepared = {}
+        for key, data in entries.items():
+            if not overwrite and key in self.cache:
+                continue
+            try:
+                # Imported artifacts are signed with another key: validate and re-sign
+                entry = self.prepare_entry(data)
+            except ValueError as e:
+                print(f"Skipping invalid cache entry {key}: {e}")
+                continue
+            if not include_risky and entry["risk"] != RiskLevel.LOW.value:
+                print(f"Skipping {entry['risk']} risk cache entry {key}")
+                continue
+            prepared[key] = entry
+        with self._cache_lock:
+            for key, entry in prepared.items():
+                if not overwrite and key in self.cache:
+                    continue
+                self.cache[key] = entry
+                added += 1
+        if added:
+            self._save_cache()
+        return added
+
+    def export_cache(self, path: str, entries: Optional[dict] = None) -> int:
+        """
+        Writes a shareable cache artifact (defaults to the whole local cache).
+        """
+        with self._cache_lock:
+            payload_entries = dict(self.cache if entries is None else entries)
+        payload = {
+            "format": CACHE_ARTIFACT_FORMAT,
+            "version": CACHE_ARTIFACT_VERSION,
+            "created": datetime.datetime.now().isoformat(),
+            "entries": payload_entries
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        return len(payload_entries)
+
+    def import_cache(self, path: str, overwrite: bool = False, include_risky: bool = False) -> int:
+        """
+        Installs a pre-built cache artifact (or a plain cache file) into the local cache.
+        Artifacts are built without a human in the loop, so only low risk entries are
+        installed unless include_risky is set (same rule as CacheWarmer).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") == CACHE_ARTIFACT_FORMAT:
+            if data.get("version", 0) > CACHE_ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported cache artifact version: {data.get('version')}")
+            data = data.get("entries", {})
+        return self.add_cache_entries(data, overwrite=overwrite, include_risky=include_risky)
+
     def cache_successful_execution(self, user_input: str, intent_data: dict):
         """
         Explicitly caches the intent ONLY after successful execution confirmation.
@@ -44,17 +235,16 @@ class NLUBridge:
             print("❄️ Learning Freeze Mode Active: Skipping cache update.")
             return
 
-        input_hash = hashlib.md5(user_input.strip().lower().encode()).hexdigest()
-        
-        # Don't cache errors
-        if intent_data.get("intent") in ["error", "unknown", "kernel_error"]:
+        try:
+            entry = self.prepare_entry(intent_data, utterance=user_input)
+        except ValueError as e:
+            print(f"Not caching invalid intent: {e}")
             return
-
-        # Don't cache dynamic queries (like 'close tab')
-        if "close" in user_input.lower() and "tab" in user_input.lower():
+        if not self.is_cacheable(user_input, entry):
             return
 
-        self.cache[input_hash] = intent_data
+        with self._cache_lock:
+            self.cache[self.cache_key(user_input)] = entry
         self._save_cache()
         print(f"✅ Intent cached for: '{user_input}'")
 
@@ -71,32 +261,80 @@ class NLUBridge:
         except:
             return False
 
-    def resolve_intent(self, user_input: str, bypass_cache: bool = False) -> Intent:
+    @traced("nlu.cache_lookup")
+    def lookup_cache(self, user_input: str, bypass_cache: bool = False) -> Optional[Intent]:
+        """
+        Returns the cached Intent for this input, or None on a miss.
+        """
+        # Force refresh for 'close chrome tab' related queries to fix stuck cache issue
+        if bypass_cache or self.is_dynamic_query(user_input):
+            return None
+        data = self.cache.get(self.cache_key(user_input))
+        if data is None:
+            self.cache_misses += 1
+            INTENT_CACHE.inc(result="miss")
+            return None
+        self.cache_hits += 1
+        INTENT_CACHE.inc(result="hit")
+        print("⚡ Cache Hit! Returning cached intent.")
+        fields = self.trusted_fields(data)
+        if fields is not None:
+            return Intent.from_trusted(fields)
+        # Unsigned (older cache files) or tampered entries get the full validation
+        return self._dict_to_intent(data)
+
+    @traced("nlu.resolve_intent")
+    def resolve_intent(self, user_input: str, bypass_cache: bool = False, cancel_token=None,
+                       allow_llm: bool = True) -> Intent:
         """
         Bridges the user input to the PowerShell Kernel for intent resolution.
+        :param cancel_token: core.cancellation.CancellationToken that stops a slow (LLM) resolution.
+        :param allow_llm: False resolves through the registry and patterns only; a miss comes back
+                          as an "unknown" intent instead of an LLM call (speculative prefetch).
         """
-        safe_input = user_input.replace("'", "''")
-        
         # 1. Check Cache
-        # Force refresh for 'close chrome tab' related queries to fix stuck cache issue
-        is_chrome_tab_query = "close" in user_input.lower() and "tab" in user_input.lower()
-        input_hash = hashlib.md5(user_input.strip().lower().encode()).hexdigest()
-        
-        if not bypass_cache and not is_chrome_tab_query and input_hash in self.cache:
-            print("⚡ Cache Hit! Returning cached intent.")
-            return self._dict_to_intent(self.cache[input_hash])
+        cached = self.lookup_cache(user_input, bypass_cache=bypass_cache)
+        if cached is not None:
+            return cached
+
+        data = self.query_kernel(user_input, cancel_token=cancel_token, allow_llm=allow_llm)
+        if data is None:
+            KERNEL_ERRORS.inc()
+            return self._error_intent("Failed to resolve intent via PowerShell Kernel.")
+        if "kernel_error" in data:
+            KERNEL_ERRORS.inc()
+            return self._error_intent(data["kernel_error"])
+        if data.get("source") == "llm":
+            LLM_FALLBACKS.inc()
+
+        # DO NOT CACHE HERE ANYMORE
+        # We only return the object. Caching is now handled by the UI layer after execution.
+        return self._dict_to_intent(data)
+
+    @traced("nlu.query_kernel")
+    def query_kernel(self, user_input: str, cancel_token=None, allow_llm: bool = True) -> Optional[dict]:
+        """
+        Runs Resolve-Intent in the Kernel and returns the raw intent JSON as a dict.
+        Returns {"kernel_error": msg} if the Kernel reported an error, None on failure.
+        :param allow_llm: False passes -NoLLM (registry and patterns only).
+        """
+        safe_input = user_input.replace("'", "''")
+        no_llm = "" if allow_llm else " -NoLLM"
 
         # Script block for Persistent Session
         # Modules are already loaded in session init
         ps_script = f"""
-        $json = Resolve-Intent -UserInput '{safe_input}'
+        $json = Resolve-Intent -UserInput '{safe_input}'{no_llm}
         Write-Output $json
         """
         
         try:
             if self.session:
                 # Fast Path: Persistent Session
-                json_str = self.session.run_command(ps_script)
+                if cancel_token is not None:
+                    json_str = self.session.run_command(ps_script, cancel_token=cancel_token)
+                else:
+                    json_str = self.session.run_command(ps_script)
                 if not json_str.strip():
                      # Fallback or error handling
                      pass
@@ -122,15 +360,13 @@ class NLUBridge:
                 # Remove potential ERROR prefix if caught in session wrapper
                 if json_str.startswith("ERROR:"):
                      print(f"Kernel Error: {json_str}")
-                     return self._error_intent(json_str)
+                     return {"kernel_error": json_str}
 
                 try:
                     data = json.loads(json_str)
-                    
-                    # DO NOT CACHE HERE ANYMORE
-                    # We only return the object. Caching is now handled by the UI layer after execution.
-                    
-                    return self._dict_to_intent(data)
+                    if isinstance(data, dict):
+                        return data
+                    print(f"Unexpected Kernel Response: {json_str}")
 
                 except json.JSONDecodeError:
                     print(f"JSON Parse Error from Kernel: {json_str}")
@@ -140,7 +376,7 @@ class NLUBridge:
         except Exception as e:
             print(f"Bridge Call Error: {e}")
             
-        return self._error_intent("Failed to resolve intent via PowerShell Kernel.")
+        return None
 
     def _dict_to_intent(self, data: dict) -> Intent:
         # Risk mapping
@@ -160,6 +396,7 @@ class NLUBridge:
             description=data.get("description", "PowerShell Engine Action"),
             generated_command=data.get("generated_command", None),
             requires_elevation=data.get("requires_elevation", False),
+            potential_slow=data.get("potential_slow", False),
             confirm_level=data.get("confirm_level", "none"),
             protocol_version=data.get("protocol_version", "intent-v1")
         )
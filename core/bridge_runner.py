@@ -5,6 +5,43 @@ import base64
 from typing import Callable, Optional
 from core.schemas import Intent
 from core.powershell_session import PowerShellSession
+from core.result_cache import ResultCache, get_result_cache, is_read_only_command
+from core.tracing import traced
+from core.structured_output import StructuredResult, load_output_settings, parse_output, strip_formatting
+
+def build_kernel_script(command: str, intent: Optional[Intent] = None, output_format: str = "text") -> str:
+    """
+    Kernel call that runs an already confirmed command through Invoke-SafePowerShell.
+    Shared by RunnerBridge and the background JobManager.
+    :param output_format: text, json or csv (see core.structured_output).
+    """
+    # Prepare params
+    risk = "low"
+    desc = "Unknown"
+    if intent:
+        risk = intent.risk.value if hasattr(intent.risk, 'value') else str(intent.risk)
+        desc = intent.description
+        
+    # Construct Kernel Call
+    # We pass -Confirmed because this is only called after UI confirmation
+    
+    # Base64 encode command to avoid escaping issues
+    b64_cmd = base64.b64encode(command.encode('utf-16le')).decode('utf-8')
+    
+    return f"""
+    [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+    Import-Module "{os.getcwd()}\\engine\\kernel\\ExecutionEngine.psm1" -Force
+    Import-Module "{os.getcwd()}\\engine\\kernel\\Sentinel.psm1" -Force
+    
+    $cmdBytes = [System.Convert]::FromBase64String('{b64_cmd}')
+    $cmd = [System.Text.Encoding]::Unicode.GetString($cmdBytes)
+    
+    Invoke-SafePowerShell -Command $cmd -Description '{desc.replace("'", "''")}' -Risk '{risk}' -Confirmed -ProtocolVersion 'intent-v1' -OutputFormat '{output_format.capitalize()}'
+    """
+
+def is_failure_output(output: str) -> bool:
+    # Simple heuristic for now: check if it looks like an error
+    return "SECURITY BLOCK" in output or "Execution Failed" in output or "Error:" in output
 
 class RunnerBridge:
     """
@@ -13,14 +50,22 @@ class RunnerBridge:
     Delegates execution to Invoke-SafePowerShell in the Kernel.
     """
     
-    def __init__(self, output_callback: Optional[Callable[[str, str], None]] = None, session: Optional[PowerShellSession] = None):
+    def __init__(self, output_callback: Optional[Callable[[str, str], None]] = None, session: Optional[PowerShellSession] = None,
+                 result_cache: Optional[ResultCache] = None, output_format: Optional[str] = None):
         """
         :param output_callback: Function to handle output (text, style/type). 
                                 style can be 'info', 'error', 'success', 'warning'.
         :param session: Persistent PowerShellSession instance.
+        :param result_cache: TTL cache for read-only query output (defaults to the process-wide cache).
+        :param output_format: text, json or csv for read-only queries (defaults to [Output] in config/main.ini).
         """
         self.output_callback = output_callback
         self.session = session
+        self.result_cache = result_cache if result_cache is not None else get_result_cache()
+        config_format, self.max_rows = load_output_settings()
+        self.output_format = output_format or config_format
+        # Objects from the last structured query, for client-side sort/filter ('view' command)
+        self.last_result: Optional[StructuredResult] = None
 
     def _log(self, text: str, style: str = "info"):
         if self.output_callback:
@@ -38,55 +83,73 @@ class RunnerBridge:
         self._log(f"Description: {description}", "info")
         self._log("(No changes were made to the system)\n", "dim")
 
-    def execute(self, command: str, intent: Optional[Intent] = None, timeout: int = 60) -> bool:
+    @traced("runner.execute")
+    def execute(self, command: str, intent: Optional[Intent] = None, timeout: int = 60, use_cache: bool = True,
+                cancel_token=None) -> bool:
         """
         Delegates execution to the Kernel via Invoke-SafePowerShell.
+        Output of read-only query intents is served from the result cache while fresh.
+        :param cancel_token: core.cancellation.CancellationToken that stops the running command.
         """
+        if cancel_token is not None and cancel_token.cancelled:
+            self._log("CANCELLED", "warning")
+            return False
         self._log(f"EXECUTING (Kernel): {command}", "info")
+
+        self.last_result = None
+        if use_cache and self.session:
+            cached = self.result_cache.get(command, intent)
+            if cached:
+                output, age = cached
+                self._present(output)
+                self._log(f"(cached {int(age)} s ago)", "dim")
+                self._log("SUCCESS", "success")
+                return True
+        mutates = not is_read_only_command(command)
+        if mutates:
+            # Anything that isn't a read-only query may change what the cached queries would return.
+            # Read-only queries that just aren't cached (TTL 0, e.g. live usage) leave the cache alone.
+            self.result_cache.invalidate()
         
-        # Prepare params
-        risk = "low"
-        desc = "Unknown"
-        if intent:
-            risk = intent.risk.value if hasattr(intent.risk, 'value') else str(intent.risk)
-            desc = intent.description
-            
-        # Construct Kernel Call
-        # We pass -Confirmed because this method is only called after UI confirmation
-        
-        # Base64 encode command to avoid escaping issues
-        b64_cmd = base64.b64encode(command.encode('utf-16le')).decode('utf-8')
-        
-        ps_script = f"""
-        [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
-        Import-Module "{os.getcwd()}\\engine\\kernel\\ExecutionEngine.psm1" -Force
-        Import-Module "{os.getcwd()}\\engine\\kernel\\Sentinel.psm1" -Force
-        
-        $cmdBytes = [System.Convert]::FromBase64String('{b64_cmd}')
-        $cmd = [System.Text.Encoding]::Unicode.GetString($cmdBytes)
-        
-        Invoke-SafePowerShell -Command $cmd -Description '{desc.replace("'", "''")}' -Risk '{risk}' -Confirmed -ProtocolVersion 'intent-v1'
-        """
+        # Read-only queries come back as objects; the client renders (and can re-sort) the table
+        output_format = "text"
+        kernel_command = command
+        if self.session and self.output_format != "text" and not mutates:
+            structured_command = strip_formatting(command)
+            if structured_command is not None: # Else a Format-* layout we can't reproduce (-GroupBy)
+                output_format = self.output_format
+                kernel_command = structured_command
+        ps_script = build_kernel_script(kernel_command, intent, output_format)
         
         try:
             if self.session:
                 # Use persistent session
-                output = self.session.run_command(ps_script)
+                if cancel_token is not None:
+                    output = self.session.run_command(ps_script, cancel_token=cancel_token)
+                    if cancel_token.cancelled:
+                        # Whatever ran before the stop may have changed the system
+                        if mutates:
+                            self.result_cache.invalidate()
+                        self._log("CANCELLED", "warning")
+                        return False
+                else:
+                    output = self.session.run_command(ps_script)
                 # Check output for errors or success
                 # The Kernel Invoke-SafePowerShell should write output to stdout
                 
                 if output:
-                    # Simple heuristic for now: check if it looks like an error
-                    if "SECURITY BLOCK" in output or "Execution Failed" in output or "Error:" in output:
+                    if is_failure_output(output):
                         self._log(output.strip(), "error")
                         return False
                     else:
-                        self._log(output.strip(), "info")
+                        self._present(output.strip())
                         self._log("SUCCESS", "success")
+                        self._remember(command, intent, output.strip())
                         return True
                 else:
                     # Empty output usually means success for void commands, or silence
                     self._log("SUCCESS (No Output)", "success")
+                    self._remember(command, intent, "")
                     return True
 
             else:
@@ -120,3 +183,16 @@ class RunnerBridge:
         except Exception as e:
             self._log(f"EXCEPTION: {e}", "error")
             return False
+
+    def _present(self, output: str):
+        """Logs Kernel output, rendering a structured result as a table."""
+        text, result = parse_output(output)
+        if text and text.strip():
+            self._log(text.strip(), "info")
+        if result is not None:
+            self.last_result = result
+            self._log(result.render(self.max_rows), "info")
+
+    def _remember(self, command: str, intent: Optional[Intent], output: str):
+        # No-op unless the command is a read-only query
+        self.result_cache.put(command, intent, output)
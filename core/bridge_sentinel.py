@@ -3,14 +3,26 @@ import json
 import os
 import sys
 import base64
-from typing import Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Union
 from core.schemas import Intent, RiskAssessment, RiskLevel
 from .powershell_session import PowerShellSession
 from .security.anti_pattern import AntiPatternDetector
+from .security.command_parser import ParsedCommand, is_absolute_path, parse_command
 from .security.risk_classifier import RiskClassifier
+from .security.sentinel_rules import SentinelRuleEngine, RULES_FILE
+from .tracing import traced
+from .metrics import counter
 
 import time
 
+ASSESSMENTS = counter("intentshell_risk_assessments_total", "Sentinel assessments by final risk level")
+SUSPENSIONS = counter("intentshell_suspensions_total", "Times cumulative risk suspended the session")
+SUSPENDED_BLOCKS = counter("intentshell_suspended_requests_total", "Requests refused while the session was suspended")
+KERNEL_CHECKS = counter("intentshell_sentinel_kernel_checks_total", "Kernel Measure-Risk double-checks by source (cache/kernel)")
+
 class SuspensionSystem:
     def __init__(self, threshold: float = 5.0):
         self.threshold = threshold
@@ -20,18 +32,24 @@ class SuspensionSystem:
         self.suspension_reasons = []
         self.suspension_start_time = 0
         self.SUSPENSION_DURATION = 600 # 10 minutes
+        # Shared across request threads (API server workers)
+        self._lock = threading.RLock()
 
-    def _is_safe_context(self, command: str) -> bool:
+    def _is_safe_context(self, command: Union[str, ParsedCommand]) -> bool:
         """
         Checks if the command is operating within the current working directory (CWD)
         and NOT touching sensitive system paths.
         """
         try:
             cwd = os.getcwd().lower()
-            cmd_lower = command.lower()
+            parsed = parse_command(command)
             
-            # Simple heuristic: command uses relative paths or explicitly references CWD
-            is_local = "./" in cmd_lower or ".\\" in cmd_lower or cwd in cmd_lower or not (":" in cmd_lower or "\\" in cmd_lower)
+            # Every path the command references must be relative or inside the CWD.
+            # Paths come from the lexer, so a ':' or '\\' inside a message string doesn't count.
+            is_local = all(
+                not is_absolute_path(path) or path.lower().startswith(cwd)
+                for path in parsed.paths
+            )
             
             # Blacklist check (Safety net)
             # Even if local, we don't want to mess with Windows folder if somehow CWD is C:\Windows
@@ -41,12 +59,13 @@ class SuspensionSystem:
         except:
             return False
 
-    def record_risk(self, risk_level: RiskLevel, command: str, intent_type: str, anti_patterns: list):
+    def record_risk(self, risk_level: RiskLevel, command: Union[str, ParsedCommand], intent_type: str, anti_patterns: list):
         # 1. Action-based Decay (Risk Eraser)
         if risk_level not in [RiskLevel.HIGH, RiskLevel.VERY_HIGH]:
             # Decay risk on safe commands
             # If user does something safe, we forgive 15% of the accumulated risk + flat 0.5
-            self.cumulative_risk_score = max(0, (self.cumulative_risk_score * 0.85) - 0.5)
+            with self._lock:
+                self.cumulative_risk_score = max(0, (self.cumulative_risk_score * 0.85) - 0.5)
             return
 
         # Calculate Weight
@@ -65,67 +84,205 @@ class SuspensionSystem:
             if any("Chaining" in p for p in anti_patterns):
                 weight += 1.0
 
-        # Intent Inertia & Smart Merge
-        # If same intent type AND same risk weight (likely same scope)
-        if self.last_intent_type == intent_type and weight < 2.0:
-             # Repeating the same routine destructive action
-             # We treat this as a "single event" effectively by severely damping subsequent calls
-             weight *= 0.2 # Drastic reduction for routine repetition
-        
-        self.cumulative_risk_score += weight
-        self.last_intent_type = intent_type
-        
-        # Log reason for potential suspension
-        self.suspension_reasons.append(f"{classification} (Weight: {weight:.2f})")
+        with self._lock:
+            # Intent Inertia & Smart Merge
+            # If same intent type AND same risk weight (likely same scope)
+            if self.last_intent_type == intent_type and weight < 2.0:
+                 # Repeating the same routine destructive action
+                 # We treat this as a "single event" effectively by severely damping subsequent calls
+                 weight *= 0.2 # Drastic reduction for routine repetition
+
+            self.cumulative_risk_score += weight
+            self.last_intent_type = intent_type
+
+            # Log reason for potential suspension
+            self.suspension_reasons.append(f"{classification} (Weight: {weight:.2f})")
 
-        if self.cumulative_risk_score >= self.threshold:
-            self.suspended = True
-            self.suspension_start_time = time.time()
+            if self.cumulative_risk_score >= self.threshold:
+                if not self.suspended:
+                    SUSPENSIONS.inc()
+                self.suspended = True
+                self.suspension_start_time = time.time()
 
     def is_suspended(self) -> bool:
-        if self.suspended:
-            # Check Temporary Suspension Expiry
-            elapsed = time.time() - self.suspension_start_time
-            if elapsed > self.SUSPENSION_DURATION:
-                self.reset() # Auto-forgive after duration
-                return False
-        return self.suspended
+        with self._lock:
+            if self.suspended:
+                # Check Temporary Suspension Expiry
+                elapsed = time.time() - self.suspension_start_time
+                if elapsed > self.SUSPENSION_DURATION:
+                    self.reset() # Auto-forgive after duration
+                    return False
+            return self.suspended
         
     def get_warning(self) -> Optional[str]:
         # Forgiveness Window Warning
-        if not self.suspended and self.cumulative_risk_score >= (self.threshold - 2.0) and self.cumulative_risk_score > 0:
-            return f"⚠️ Forgiveness Window Active: High Risk (Score: {self.cumulative_risk_score:.1f}/{self.threshold}). Run safe commands to lower risk."
+        with self._lock:
+            if not self.suspended and self.cumulative_risk_score >= (self.threshold - 2.0) and self.cumulative_risk_score > 0:
+                return f"⚠️ Forgiveness Window Active: High Risk (Score: {self.cumulative_risk_score:.1f}/{self.threshold}). Run safe commands to lower risk."
         return None
 
     def get_suspension_details(self) -> list:
-        remaining = int(self.SUSPENSION_DURATION - (time.time() - self.suspension_start_time))
+        with self._lock:
+            remaining = int(self.SUSPENSION_DURATION - (time.time() - self.suspension_start_time))
+            details = list(self.suspension_reasons)
         if remaining < 0: remaining = 0
         mins, secs = divmod(remaining, 60)
         
-        details = list(self.suspension_reasons)
         details.append(f"Suspension lifts in: {mins}m {secs}s")
         details.append("Alternatively: Restart IntentShell to reset immediately.")
         return details
 
     def reset(self):
-        self.cumulative_risk_score = 0.0
-        self.suspended = False
-        self.last_intent_type = None
-        self.suspension_reasons = []
-        self.suspension_start_time = 0
+        with self._lock:
+            self.cumulative_risk_score = 0.0
+            self.suspended = False
+            self.last_intent_type = None
+            self.suspension_reasons = []
+            self.suspension_start_time = 0
+
+SENTINEL_MODULE = os.path.join("engine", "kernel", "Sentinel.psm1")
+INVALID_JSON_REASON = "Invalid JSON from Sentinel"
+
+# Which Python fast-path results still get a Kernel Measure-Risk double-check
+KERNEL_CHECK_LEVELS = {
+    "always": {RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.VERY_HIGH},
+    "medium": {RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.VERY_HIGH},
+    "high": {RiskLevel.HIGH, RiskLevel.VERY_HIGH},
+    "never": set()
+}
+
+class AssessmentCache:
+    """
+    Bounded LRU memo for Kernel Measure-Risk results with a short TTL.
+    Entries are copied in and out so callers can freely mutate what they get back.
+    """
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> (stored_at, RiskAssessment)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[RiskAssessment]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, assessment = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return assessment.model_copy(deep=True)
+
+    def put(self, key: str, assessment: RiskAssessment):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), assessment.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
 
 class SentinelBridge:
     """
-    Bridge to the PowerShell Sentinel (Security Engine).
-    Delegates all risk assessment to the Kernel.
+    Bridge to the Sentinel (Security Engine).
+    Scores commands in Python with SentinelRuleEngine, which reads the same
+    engine/kernel/sentinel_rules.json as the Kernel's Get-RiskScore. The Kernel's
+    Measure-Risk only runs as a double-check for the levels in [Sentinel] kernel_double_check
+    (or when the rule file failed to load), and its answers are memoised in the AssessmentCache.
+    Suspension accounting stays in Python for every assessment.
     """
-    def __init__(self, session: Optional[PowerShellSession] = None):
+    def __init__(self, session: Optional[PowerShellSession] = None, assessment_cache: Optional[AssessmentCache] = None):
         self.session = session
         self.suspension_system = SuspensionSystem()
+        if assessment_cache is None:
+            assessment_cache = AssessmentCache(
+                max_entries=int(os.getenv("INTENTSHELL_SENTINEL_CACHE_SIZE", "256")),
+                ttl_seconds=float(os.getenv("INTENTSHELL_SENTINEL_CACHE_TTL", "30"))
+            )
+        self.assessment_cache = assessment_cache
+        self.engine_version = self._engine_version()
+        self.kernel_check = self._load_kernel_check()
+        try:
+            self.rules = SentinelRuleEngine.load()
+        except Exception as e:
+            print(f"Sentinel Rules Error: {e} (falling back to Kernel-only assessment)")
+            self.rules = None
+
+    @staticmethod
+    def _engine_version() -> str:
+        """
+        Fingerprint of the Sentinel module and its rule file, so memoised results never outlive a policy change.
+        """
+        digest = hashlib.sha256()
+        try:
+            for path in [SENTINEL_MODULE, RULES_FILE]:
+                with open(os.path.join(os.getcwd(), path), "rb") as f:
+                    digest.update(f.read())
+            return digest.hexdigest()[:16]
+        except OSError:
+            return "unknown"
+
+    @staticmethod
+    def _load_kernel_check() -> str:
+        """
+        Reads [Sentinel] kernel_double_check from config/main.ini (env INTENTSHELL_SENTINEL_KERNEL_CHECK wins).
+        """
+        mode = os.getenv("INTENTSHELL_SENTINEL_KERNEL_CHECK")
+        if not mode:
+            try:
+                import configparser
+                config = configparser.ConfigParser()
+                config_path = os.path.join("config", "main.ini")
+                if os.path.exists(config_path):
+                    config.read(config_path, encoding='utf-8')
+                mode = config.get("Sentinel", "kernel_double_check", fallback="medium")
+            except Exception:
+                mode = "medium"
+        mode = mode.strip().lower()
+        return mode if mode in KERNEL_CHECK_LEVELS else "medium"
+
+    def _assessment_key(self, intent: Intent, command: str) -> str:
+        """
+        Canonical command text plus only the Intent fields Measure-Risk reads.
+        """
+        risk = intent.risk.value if hasattr(intent.risk, 'value') else str(intent.risk)
+        key_data = [
+            self.engine_version,
+            " ".join(command.split()),
+            intent.intent_type,
+            intent.target,
+            intent.recursive,
+            list(intent.filters),
+            risk
+        ]
+        return hashlib.sha256(json.dumps(key_data, ensure_ascii=False).encode("utf-8")).hexdigest()
 
-    def assess(self, intent: Intent, command: str) -> RiskAssessment:
+    @traced("sentinel.assess")
+    def assess(self, intent: Intent, command: str, local_only: bool = False,
+               suspicious_patterns: Optional[List[str]] = None, record: bool = True) -> Optional[RiskAssessment]:
         """
-        Calls the Kernel's Measure-Risk function.
+        Scores the command with the Python port of the Sentinel rules and only calls the
+        Kernel's Measure-Risk as a double-check for the configured levels.
+        :param local_only: Returns None (and records nothing) instead of consulting the Kernel,
+                           e.g. while the overlay's Kernel is still starting.
+        :param suspicious_patterns: AntiPatternDetector.scan() findings for the command, if the
+                                    caller already has them (ExecutionManager's prescan stage).
+        :param record: False scores the command without charging the suspension budget
+                       (hypothetical assessments, e.g. the API's /assess).
         """
         # 1. Check Suspension
         if self.suspension_system.is_suspended():
@@ -134,6 +291,7 @@ class SentinelBridge:
              for r in self.suspension_system.get_suspension_details():
                  reasons.append(f" - {r}")
              reasons.append("Combined risk exceeded safety threshold.")
+             SUSPENDED_BLOCKS.inc()
              
              return RiskAssessment(
                 level=RiskLevel.VERY_HIGH,
@@ -143,14 +301,79 @@ class SentinelBridge:
 
         # If no command generated yet, assessment is partial but we still check Intent target
         cmd_arg = command if command else ""
+        # Lexed once; the anti-pattern scan and suspension accounting share it
+        parsed = parse_command(cmd_arg)
         
         # 2. Check Anti-Patterns (Pre-Kernel Check)
-        suspicious_patterns = AntiPatternDetector.scan(cmd_arg)
+        if suspicious_patterns is None:
+            suspicious_patterns = AntiPatternDetector.scan(parsed)
+        else:
+            suspicious_patterns = list(suspicious_patterns)
         if suspicious_patterns:
             # If patterns found, we escalate risk IMMEDIATELY
             # We still let the Kernel run for full analysis, but we force HIGH risk
             pass # We will merge this into the assessment later
-        
+
+        try:
+            # 3. Python fast path (same rule file as the Kernel's Get-RiskScore)
+            assessment = self.rules.measure(intent, cmd_arg) if self.rules else None
+
+            # 4. Kernel Measure-Risk double-check (memoised; identical commands skip the round trip)
+            if assessment is None or assessment.level in KERNEL_CHECK_LEVELS[self.kernel_check]:
+                if local_only:
+                    return None
+                kernel_assessment = self._kernel_assessment(intent, cmd_arg)
+                if kernel_assessment:
+                    if assessment and kernel_assessment.level != assessment.level:
+                        print(f"Sentinel Parity Warning: Python={assessment.level.value} Kernel={kernel_assessment.level.value}")
+                    # The Kernel stays authoritative whenever it is consulted
+                    assessment = kernel_assessment
+            
+            if assessment:
+                # Merge Anti-Pattern Detections
+                if suspicious_patterns:
+                    assessment.level = RiskLevel.HIGH # Force upgrade
+                    assessment.reasons.extend(suspicious_patterns)
+                    assessment.score += 50 # Penalty
+
+                # Record risk for suspension logic (runs on every call, cached or not)
+                if record:
+                    self.suspension_system.record_risk(assessment.level, parsed, intent.intent_type, suspicious_patterns)
+                
+                # Append Warning if exists
+                warning = self.suspension_system.get_warning()
+                if warning:
+                    assessment.reasons.append(warning)
+                    
+                ASSESSMENTS.inc(level=assessment.level.value)
+                return assessment
+                
+        except Exception as e:
+            print(f"Sentinel Bridge Error: {e}")
+            
+        # Fallback (Safe Mode)
+        return RiskAssessment(
+            level=RiskLevel.HIGH,
+            reasons=["Sentinel Bridge Failed - Failing Open to High Risk"],
+            score=100
+        )
+
+    def _kernel_assessment(self, intent: Intent, cmd_arg: str) -> Optional[RiskAssessment]:
+        cache_key = self._assessment_key(intent, cmd_arg)
+        assessment = self.assessment_cache.get(cache_key)
+        KERNEL_CHECKS.inc(source="cache" if assessment is not None else "kernel")
+        if assessment is None:
+            assessment = self._measure_risk(intent, cmd_arg)
+            # Never memoise a garbled Kernel answer
+            if assessment and INVALID_JSON_REASON not in assessment.reasons:
+                self.assessment_cache.put(cache_key, assessment)
+        return assessment
+
+    @traced("sentinel.measure_risk")
+    def _measure_risk(self, intent: Intent, cmd_arg: str) -> Optional[RiskAssessment]:
+        """
+        Runs Measure-Risk in the Kernel. Returns None if the Kernel gave no usable answer.
+        """
         # Base64 encode intent JSON to avoid string escaping issues in PowerShell
         json_str = intent.model_dump_json()
         b64_json = base64.b64encode(json_str.encode('utf-8')).decode('utf-8')
@@ -166,8 +389,8 @@ class SentinelBridge:
         $result | ConvertTo-Json -Depth 5 -Compress
         """
         
+        assessment = None
         try:
-            assessment = None
             if self.session:
                 output = self.session.run_command(ps_script)
                 if output and not output.startswith("ERROR:"):
@@ -187,33 +410,9 @@ class SentinelBridge:
                      assessment = self._parse_output(result.stdout.strip())
                 else:
                     print(f"Sentinel Kernel Error: {result.stderr}")
-            
-            if assessment:
-                # Merge Anti-Pattern Detections
-                if suspicious_patterns:
-                    assessment.level = RiskLevel.HIGH # Force upgrade
-                    assessment.reasons.extend(suspicious_patterns)
-                    assessment.score += 50 # Penalty
-
-                # Record risk for suspension logic
-                self.suspension_system.record_risk(assessment.level, cmd_arg, intent.intent_type, suspicious_patterns)
-                
-                # Append Warning if exists
-                warning = self.suspension_system.get_warning()
-                if warning:
-                    assessment.reasons.append(warning)
-                    
-                return assessment
-                
         except Exception as e:
-            print(f"Sentinel Bridge Error: {e}")
-            
-        # Fallback (Safe Mode)
-        return RiskAssessment(
-            level=RiskLevel.HIGH,
-            reasons=["Sentinel Bridge Failed - Failing Open to High Risk"],
-            score=100
-        )
+            print(f"Sentinel Kernel Error: {e}")
+        return assessment
 
     def _parse_output(self, output: str) -> RiskAssessment:
         if output:
@@ -226,4 +425,4 @@ class SentinelBridge:
                 )
             except json.JSONDecodeError:
                 pass
-        return RiskAssessment(level=RiskLevel.HIGH, reasons=["Invalid JSON from Sentinel"], score=100)
+        return RiskAssessment(level=RiskLevel.HIGH, reasons=[INVALID_JSON_REASON], score=100)
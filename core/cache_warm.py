@@ -0,0 +1,271 @@
+"""
+Offline Intent Cache Warmer.
+
+Resolves a corpus of utterances ahead of time (with bounded concurrency) and fills
+the intent cache, so a fresh install doesn't pay Kernel/LLM latency for common intents.
+
+Usage:
+    python -m core.cache_warm corpus.txt
+    python -m core.cache_warm --from-registry --from-tests --from-history --output cache/prebuilt_cache.json
+    python -m core.cache_warm --install cache/prebuilt_cache.json
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Optional
+
+from .bridge_nlu import NLUBridge, UTTERANCE_FIELD
+from .schemas import RiskLevel
+from .user_profile import journal_path
+
+REGISTRY_FILE = os.path.join("engine", "kernel", "Registry.psm1")
+PROFILE_FILE = os.path.join("config", "user_profile.json")
+TESTS_DIR = "tests"
+
+# Registry keywords are regexes. Only simple ones ("ip.*göster") can be turned into utterances.
+_KEYWORD_GAP = re.compile(r"\.\*|\.\+|\\s\+|\\s\*")
+_REGEX_META = re.compile(r"[\\^$|?*+()\[\]{}]")
+
+
+def load_corpus_file(path: str) -> List[str]:
+    """Reads one utterance per line ('-' for stdin). Blank lines and '#' comments are skipped."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def collect_registry_phrases(registry_file: str = REGISTRY_FILE) -> List[str]:
+    """Turns simple Registry.psm1 keyword regexes into plain utterances."""
+    if not os.path.exists(registry_file):
+        return []
+    with open(registry_file, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    phrases = []
+    for block in re.findall(r"keywords\s*=\s*@\(([^)]*)\)", content, re.IGNORECASE):
+        for keyword in re.findall(r'"([^"]+)"', block):
+            phrase = _KEYWORD_GAP.sub(" ", keyword).strip()
+            if phrase and not _REGEX_META.search(phrase):
+                phrases.append(" ".join(phrase.split()))
+    return phrases
+
+
+def collect_test_phrases(tests_dir: str = TESTS_DIR) -> List[str]:
+    """Extracts the `test_cases` phrase lists from tests/phase_*.py."""
+    phrases = []
+    for path in sorted(glob.glob(os.path.join(tests_dir, "phase_*.py"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.List):
+                continue
+            if not any(isinstance(t, ast.Name) and t.id == "test_cases" for t in node.targets):
+                continue
+            for element in node.value.elts:
+                # Either "utterance" or ("utterance", "expected_intent")
+                if isinstance(element, ast.Tuple) and element.elts:
+                    element = element.elts[0]
+                if isinstance(element, ast.Constant) and isinstance(element.value, str):
+                    phrases.append(element.value)
+    return phrases
+
+
+def collect_history_phrases(paths: Iterable[str]) -> List[str]:
+    """
+    Reads utterances from history exports: the UserProfile JSON, a JSON list of
+    history entries, or JSONL with one entry per line.
+    """
+    phrases = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        try:
+            data = json.loads(content)
+            entries = data.get("command_history", []) if isinstance(data, dict) else data
+        except json.JSONDecodeError:
+            entries = []
+            for line in content.splitlines():
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+        for entry in entries:
+            if isinstance(entry, dict):
+                text = entry.get("user_input") or entry.get("input")
+            else:
+                text = entry
+            if isinstance(text, str) and text.strip():
+                phrases.append(text.strip())
+    return phrases
+
+
+class CacheWarmer:
+    """
+    Resolves utterances through the Kernel in parallel.
+    Each worker thread owns its own PowerShellSession, so concurrency is bounded by `workers`.
+    """
+    def __init__(self, workers: int = 4, include_risky: bool = False, session_factory=None):
+        self.workers = max(1, workers)
+        self.include_risky = include_risky
+        self.session_factory = session_factory
+        self.cache_bridge = NLUBridge(session=None)  # Local cache access only
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _worker_bridge(self) -> NLUBridge:
+        bridge = getattr(self._local, "bridge", None)
+        if bridge is None:
+            if self.session_factory:
+                session = self.session_factory()
+            else:
+                from .replay import open_session
+                session = open_session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+            bridge = NLUBridge(session)
+            self._local.bridge = bridge
+        return bridge
+
+    def _resolve_one(self, text: str):
+        bridge = self._worker_bridge()
+        data = bridge.query_kernel(text)
+        if data is None or "kernel_error" in data:
+            return text, None, "kernel error"
+
+        if not bridge.is_cacheable(text, data):
+            return text, None, f"not cacheable ({data.get('intent', 'unknown')})"
+
+        # Run the same validation a cache hit would (e.g. blocked command patterns)
+        try:
+            intent = bridge._dict_to_intent(data)
+        except ValueError as e:
+            return text, None, f"rejected: {e}"
+
+        # Pre-resolution happens without a human in the loop, so only low risk by default.
+        # Sentinel still assesses every cache hit at runtime.
+        if intent.risk != RiskLevel.LOW and not self.include_risky:
+            return text, None, f"skipped ({intent.risk.value} risk)"
+
+        return text, data, None
+
+    def warm(self, utterances: List[str], refresh: bool = False) -> dict:
+        """
+        Resolves all utterances and returns the new cache entries (input hash -> intent data).
+        """
+        pending = {}
+        for text in utterances:
+            key = NLUBridge.cache_key(text)
+            if key in pending:
+                continue
+            if not refresh and key in self.cache_bridge.cache:
+                continue
+            pending[key] = text
+
+        print(f"Warming {len(pending)} utterances ({len(utterances) - len(pending)} duplicate or already cached) with {self.workers} workers")
+
+        entries = {}
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._resolve_one, text) for text in pending.values()]
+            for i, future in enumerate(as_completed(futures), 1):
+                try:
+                    text, data, problem = future.result()
+                except Exception as e:
+                    print(f"[{i}/{len(futures)}] ERROR: {e}")
+                    continue
+                if data is None:
+                    print(f"[{i}/{len(futures)}] '{text}' -> {problem}")
+                    continue
+                entries[NLUBridge.cache_key(text)] = dict(data, **{UTTERANCE_FIELD: text})
+                print(f"[{i}/{len(futures)}] '{text}' -> {data.get('intent')}")
+
+        print(f"Resolved {len(entries)}/{len(pending)} in {time.time() - start_time:.1f}s")
+        return entries
+
+    def close(self):
+        for session in self._sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self._sessions = []
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.cache_warm", description="Pre-resolve utterances into the intent cache.")
+    parser.add_argument("corpus", nargs="*", help="Corpus files (one utterance per line, '-' for stdin)")
+    parser.add_argument("--from-registry", action="store_true", help="Add simple keywords from Registry.psm1")
+    parser.add_argument("--from-tests", action="store_true", help="Add phrase lists from tests/phase_*.py")
+    parser.add_argument("--from-history", action="store_true", help="Add the local UserProfile command history")
+    parser.add_argument("--history", action="append", default=[], help="Exported team history (JSON or JSONL)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel Kernel sessions (default: 4)")
+    parser.add_argument("--refresh", action="store_true", help="Re-resolve utterances that are already cached")
+    parser.add_argument("--include-risky", action="store_true", help="Also cache (or --install) medium/high risk intents")
+    parser.add_argument("--output", help="Write the resolved entries as a shareable cache artifact")
+    parser.add_argument("--no-install", action="store_true", help="Don't merge results into the local cache")
+    parser.add_argument("--install", metavar="ARTIFACT", help="Install a pre-built cache artifact and exit")
+    args = parser.parse_args(argv)
+
+    if args.install:
+        added = NLUBridge(session=None).import_cache(args.install, include_risky=args.include_risky)
+        print(f"✅ Installed {added} cache entries from {args.install}")
+        return 0
+
+    utterances = []
+    for path in args.corpus:
+        utterances.extend(load_corpus_file(path))
+    if args.from_registry:
+        utterances.extend(collect_registry_phrases())
+    if args.from_tests:
+        utterances.extend(collect_test_phrases())
+    history_files = list(args.history)
+    if args.from_history:
+        # Snapshot plus the events journaled since its last compaction
+        history_files.extend([PROFILE_FILE, journal_path(PROFILE_FILE)])
+    utterances.extend(collect_history_phrases(history_files))
+
+    if not utterances:
+        parser.error("Empty corpus. Pass corpus files or --from-registry/--from-tests/--from-history.")
+
+    warmer = CacheWarmer(workers=args.workers, include_risky=args.include_risky)
+    if not args.no_install and warmer.cache_bridge._is_learning_freeze_enabled():
+        print("❄️ Learning Freeze Mode Active: Results will not be installed into the local cache.")
+        args.no_install = True
+
+    try:
+        entries = warmer.warm(utterances, refresh=args.refresh)
+    finally:
+        warmer.close()
+
+    if args.output:
+        count = warmer.cache_bridge.export_cache(args.output, entries)
+        print(f"📦 Wrote cache artifact with {count} entries: {args.output}")
+
+    if not args.no_install:
+        added = warmer.cache_bridge.add_cache_entries(entries, overwrite=args.refresh)
+        print(f"✅ Added {added} entries to {warmer.cache_bridge.cache_file}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
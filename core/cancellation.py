@@ -0,0 +1,62 @@
+"""
+Cooperative cancellation for in-flight intents.
+
+The UI creates a CancellationToken per request and passes it down through
+ExecutionManager, RunnerBridge and PowerShellSession. cancel() (Escape in the
+overlay, Ctrl+C in the CLI) wakes the session's read loop, which interrupts the
+Kernel pipeline and resynchronises the session instead of waiting for the timeout.
+"""
+import threading
+from typing import Callable, List
+
+
+class OperationCancelled(Exception):
+    """Raised by pipeline steps that notice their token was cancelled."""
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancels once; registered callbacks run on the calling thread."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancellation callback error: {e}")
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Runs callback on cancel (immediately if already cancelled).
+        Returns a function that unregisters it.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+        callback()
+        return lambda: None
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps up to timeout seconds; True if cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled("Cancelled by user")
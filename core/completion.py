@@ -0,0 +1,243 @@
+"""
+Autocomplete for the overlay's entry field.
+
+Completions come from three sources: the inputs of successful commands (UserProfile history),
+the utterances stored in the intent cache and the macro names in config/user_macros.ini
+(offered when the word being typed starts with '#').
+
+Each source feeds a CompletionIndex: a prefix trie whose nodes keep their own top-K entries, so
+a keystroke costs one dict lookup per typed character and never walks the subtree. Entries are
+ranked by frecency: every use adds 2^((t - EPOCH) / half_life) to the entry's score, which is
+kept as a log2 so it never overflows. Scores only grow, so an update only has to re-offer the
+entry to the nodes on its own path.
+"""
+import configparser
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+MACROS_PATH = os.path.join("config", "user_macros.ini")
+INTENT_CACHE_PATH = os.path.join("cache", "intent_cache.json")
+EPOCH = 1_700_000_000  # Scores are relative to this time, so they stay small
+MACRO_NAME = re.compile(r"^[A-Za-z0-9_\-]+$")
+# Utterances resolved ahead of time were never typed by this user: they rank below real history
+CACHE_WEIGHT = 0.25
+
+
+def load_completion_settings(path: str = CONFIG_PATH) -> Tuple[bool, int, float]:
+    """Returns (enabled, max_suggestions, half_life_days) from the [Completion] section of config/main.ini."""
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path, encoding="utf-8")
+    return (config.getboolean("Completion", "enabled", fallback=True),
+            config.getint("Completion", "max_suggestions", fallback=5),
+            config.getfloat("Completion", "half_life_days", fallback=14.0))
+
+
+def normalize(text: str) -> str:
+    """Index key: case-folded, whitespace collapsed."""
+    return " ".join(text.split()).casefold()
+
+
+def _log2_add(a: float, b: float) -> float:
+    """log2(2^a + 2^b) without leaving log space."""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log2(1.0 + 2.0 ** (low - high))
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.top: List[str] = []  # Keys of the best entries below this node, best first
+
+
+class CompletionIndex:
+    """
+    Prefix trie with a precomputed top-K per node.
+    :param top_k: Entries kept per node, i.e. the most suggestions complete() can return.
+    :param half_life_days: Age at which a use counts half as much as one made now.
+    """
+    def __init__(self, top_k: int = 8, half_life_days: float = 14.0):
+        self.top_k = max(1, top_k)
+        self.half_life = max(half_life_days, 1e-6) * 86400.0
+        self._root = _Node()
+        self._entries: Dict[str, Tuple[float, str]] = {}  # key -> (log2 score, display text)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize(text) in self._entries
+
+    def score(self, text: str) -> Optional[float]:
+        """log2 frecency of text, or None if it was never added."""
+        entry = self._entries.get(normalize(text))
+        return entry[0] if entry else None
+
+    def add(self, text: str, weight: float = 1.0, when: Optional[float] = None):
+        """Records one use of text (weight times a use at `when`, a Unix time defaulting to now)."""
+        key = normalize(text)
+        if not key or weight <= 0:
+            return
+        gain = math.log2(weight) + ((time.time() if when is None else when) - EPOCH) / self.half_life
+        previous = self._entries.get(key)
+        # The latest spelling is the one shown
+        self.insert(text, gain if previous is None else _log2_add(previous[0], gain))
+
+    def insert(self, text: str, score: float):
+        """Sets text's log2 score directly; it must not be lower than a score it already has."""
+        key = normalize(text)
+        self._entries[key] = (score, " ".join(text.split()))
+        node = self._root
+        self._offer(node, key, score)
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            self._offer(node, key, score)
+
+    def _offer(self, node: _Node, key: str, score: float):
+        top = node.top
+        if key in top:
+            top.remove(key)
+        elif len(top) >= self.top_k and self._entries[top[-1]][0] >= score:
+            return
+        index = 0
+        while index < len(top) and self._entries[top[index]][0] >= score:
+            index += 1
+        top.insert(index, key)
+        del top[self.top_k:]
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Best entries starting with prefix (case-insensitive), excluding prefix itself."""
+        key = normalize(prefix)
+        if prefix[-1:].isspace() and key:
+            key += " " # "clean " must not match "cleanup"
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        entries = self._entries
+        found = [entries[k][1] for k in node.top if k != key]
+        return found[:limit] if limit is not None else found
+
+
+class Autocomplete:
+    """
+    History, intent-cache and macro completions behind the overlay's entry field.
+    build() loads the sources (call it off the UI thread), record() adds a successful input,
+    suggest() is the per-keystroke lookup.
+    """
+    def __init__(self, profile=None, cache_file: str = INTENT_CACHE_PATH, macros_file: str = MACROS_PATH,
+                 max_suggestions: int = 5, half_life_days: float = 14.0):
+        self.profile = profile
+        self.cache_file = cache_file
+        self.macros_file = macros_file
+        self.max_suggestions = max_suggestions
+        self.half_life_days = half_life_days
+        self.inputs = CompletionIndex(max_suggestions, half_life_days)
+        self.macros = CompletionIndex(max_suggestions, half_life_days)
+        self._macros_mtime = None
+        self._lock = threading.Lock()
+
+    def build(self) -> "Autocomplete":
+        inputs = CompletionIndex(self.max_suggestions, self.half_life_days)
+        for text, when in self._cached_utterances():
+            inputs.add(text, CACHE_WEIGHT, when)
+        if self.profile is not None:
+            from core.user_profile import HISTORY_LIMIT
+            for event in self.profile.get_recent_history(HISTORY_LIMIT):
+                text = event.get("user_input")
+                if text:
+                    inputs.add(text, when=self._timestamp(event.get("timestamp")))
+        with self._lock:
+            self.inputs = inputs
+        self._reload_macros()
+        return self
+
+    def _cached_utterances(self) -> List[Tuple[str, float]]:
+        from core.bridge_nlu import UTTERANCE_FIELD
+        try:
+            when = os.path.getmtime(self.cache_file)
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(cache, dict):
+            return []
+        return [(entry[UTTERANCE_FIELD], when) for entry in cache.values()
+                if isinstance(entry, dict) and isinstance(entry.get(UTTERANCE_FIELD), str)]
+
+    @staticmethod
+    def _timestamp(value) -> Optional[float]:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _reload_macros(self):
+        """Re-reads user_macros.ini if it changed (macros are created through the Kernel)."""
+        try:
+            mtime = os.path.getmtime(self.macros_file)
+        except OSError:
+            mtime = None
+        if mtime == self._macros_mtime:
+            return
+        macros = CompletionIndex(self.max_suggestions, self.half_life_days)
+        previous = self.macros
+        if mtime is not None:
+            try:
+                with open(self.macros_file, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                lines = []
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith(("#", ";")) or "=" not in line:
+                    continue
+                name = line.split("=", 1)[0].strip()
+                if not MACRO_NAME.match(name):
+                    continue
+                # Usage recorded before the reload keeps its rank
+                used = previous.score(f"#{name}")
+                if used is None:
+                    macros.add(f"#{name}", when=mtime)
+                else:
+                    macros.insert(f"#{name}", used)
+        with self._lock:
+            self.macros = macros
+            self._macros_mtime = mtime
+
+    def record(self, user_input: str):
+        """A command succeeded: rank its input (and the macros it used) higher."""
+        self._reload_macros()
+        with self._lock:
+            self.inputs.add(user_input)
+            for word in user_input.split():
+                if word.startswith("#") and word in self.macros:
+                    self.macros.add(word)
+
+    def suggest(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Full-line completions for text: macro names while the last word starts with '#',
+        otherwise earlier inputs starting with text.
+        """
+        limit = self.max_suggestions if limit is None else limit
+        if not text.strip() or limit <= 0:
+            return []
+        with self._lock:
+            head, _, word = text.rpartition(" ")
+            if word.startswith("#"):
+                head = f"{head} " if head else ""
+                return [head + name for name in self.macros.complete(word, limit)]
+            return self.inputs.complete(text, limit)
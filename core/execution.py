@@ -1,11 +1,18 @@
+import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Any, List
 from .powershell_session import PowerShellSession
+from .replay import open_session
 from .bridge_nlu import NLUBridge
 from .bridge_dispatch import DispatchBridge
 from .bridge_runner import RunnerBridge
 from .bridge_sentinel import SentinelBridge
+from .pipeline import StagedPipeline
 from .schemas import Intent, RiskLevel
+from .security.anti_pattern import AntiPatternDetector
+from .tracing import span
+from .cancellation import OperationCancelled
 
 class ExecutionResult:
     def __init__(self, success: bool, output: str, intent: Optional[Intent] = None, risk_assessment: Any = None):
@@ -19,13 +26,35 @@ class ExecutionManager:
     Unified Entry Point for IntentShell Execution.
     Ensures consistency between UI and Tests.
     """
-    def __init__(self, session: Optional[PowerShellSession] = None, nlu_bridge: Any = None):
-        self.session = session or PowerShellSession()
+    def __init__(self, session: Optional[PowerShellSession] = None, nlu_bridge: Any = None, profile: Any = None,
+                 sentinel: Optional[SentinelBridge] = None):
+        self.session = session or open_session()
         self.nlu = nlu_bridge or NLUBridge(self.session)
         self.dispatcher = DispatchBridge(self.session)
-        self.sentinel = SentinelBridge(self.session)
+        self.sentinel = sentinel or SentinelBridge(self.session)
+        self.profile = profile
+        self.last_trace_id = None
+        # Shared by the stage graphs of every request (stages are short; the Kernel itself is serialised by the session lock)
+        self.stage_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="intentshell-stage")
         
-    def normalize(self, text: str) -> str:
+    @classmethod
+    def create_worker(cls, shared_cache: Optional[dict] = None) -> "ExecutionManager":
+        """
+        Builds a manager with its own warm Kernel session for worker pools (batch, API server).
+        Workers that get the same shared_cache dict see each other's intent cache entries.
+        """
+        session = open_session()
+        nlu = NLUBridge(session)
+        if shared_cache is not None:
+            nlu.cache = shared_cache
+        return cls(session, nlu_bridge=nlu)
+
+    def close(self):
+        self.stage_executor.shutdown(wait=False)
+        self.session.close()
+
+    @staticmethod
+    def normalize(text: str) -> str:
         """
         Standard input normalization.
         Applies Trim, Unicode Normalization (NFC), and removes invisible characters.
@@ -39,31 +68,110 @@ class ExecutionManager:
         text = text.replace('\u200b', '')
         return text
 
-    def process_input(self, raw_input: str, bypass_cache: bool = False) -> Tuple[Intent, str, Any]:
+    def process_input(self, raw_input: str, bypass_cache: bool = False, with_timings: bool = False,
+                      cancel_token=None, resolved: Optional[Intent] = None, with_trust: bool = False):
         """
         Standardized Pipeline: Normalize -> Parse -> Dispatch -> Assess
-        Returns: (Intent, Command, RiskAssessment)
+        Returns: (Intent, Command, RiskAssessment), then the profile's trust modifier for the intent
+        if with_trust, then per-stage timings (seconds) if with_timings.
+        resolved: Intent already resolved for this input (speculative prefetch); skips cache lookup and resolve.
+
+        Stages run as a per-request dependency graph, so work that doesn't depend on the
+        Kernel (anti-pattern pre-scan, trust lookup) overlaps with dispatch; assessment reuses
+        the pre-scan findings.
+        Raises core.cancellation.OperationCancelled if cancel_token is cancelled meanwhile.
         """
-        # 1. Normalize
-        normalized = self.normalize(raw_input)
-        
-        # 2. Parse (Resolve Intent)
-        intent = self.nlu.resolve_intent(normalized, bypass_cache=bypass_cache)
-        
-        # 3. Generate Command
-        command = self.dispatcher.get_safe_command(intent)
-        
-        # 4. Assess Risk
-        risk = self.sentinel.assess(intent, command)
+        start = time.perf_counter()
+        with span("intent", input=raw_input) as root:
+            # 1. Normalize -> Cache Lookup -> Resolve Intent
+            front = StagedPipeline(self.stage_executor)
+            front.add("normalize", lambda r: self.normalize(raw_input))
+            if resolved is not None:
+                front.add("resolve", lambda r: resolved, after=["normalize"])
+            else:
+                front.add("cache_lookup", lambda r: self._lookup_cache(r["normalize"], bypass_cache), after=["normalize"])
+                front.add("resolve", lambda r: self._resolve(r["normalize"], r["cache_lookup"], bypass_cache, cancel_token),
+                          after=["cache_lookup"])
+            results, timings = front.run()
+            intent = results["resolve"]
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            # 2. Dispatch / Pre-scan / Trust / Assess
+            # If the intent already carries its command, assessment doesn't have to wait for dispatch.
+            back = StagedPipeline(self.stage_executor)
+            back.add("dispatch", lambda r: self.dispatcher.get_safe_command(intent))
+            back.add("trust", lambda r: self.profile.get_trust_modifier(intent.intent_type) if self.profile else 0.0)
+            if intent.generated_command:
+                command = intent.generated_command
+                back.add("prescan", lambda r: AntiPatternDetector.scan(command))
+                back.add("assess", lambda r: self.sentinel.assess(intent, command, suspicious_patterns=r["prescan"]),
+                         after=["prescan"])
+            else:
+                back.add("prescan", lambda r: AntiPatternDetector.scan(r["dispatch"]), after=["dispatch"])
+                back.add("assess", lambda r: self.sentinel.assess(intent, r["dispatch"], suspicious_patterns=r["prescan"]),
+                         after=["dispatch", "prescan"])
+            back_results, back_timings = back.run()
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            timings.update(back_timings)
+            timings["total"] = time.perf_counter() - start
+
+            command = back_results["dispatch"]
+            risk = back_results["assess"]
+            root.set("intent_type", intent.intent_type)
+            root.set("risk", risk.level)
+        # Lets the caller attach execution (after the confirmation prompt) to the same trace
+        self.last_trace_id = root.trace_id
         
-        return intent, command, risk
+        result = (intent, command, risk)
+        if with_trust:
+            result += (back_results["trust"],)
+        if with_timings:
+            result += (timings,)
+        return result
+
+    def _lookup_cache(self, normalized: str, bypass_cache: bool) -> Optional[Intent]:
+        # Test doubles (MockNLUBridge) only implement resolve_intent
+        lookup = getattr(self.nlu, "lookup_cache", None)
+        if lookup is None:
+            return None
+        return lookup(normalized, bypass_cache=bypass_cache)
+
+    def _resolve(self, normalized: str, cached: Optional[Intent], bypass_cache: bool, cancel_token=None) -> Intent:
+        if cached is not None:
+            return cached
+        # The cache was already consulted (unless the bridge has no lookup of its own)
+        if hasattr(self.nlu, "lookup_cache"):
+            bypass_cache = True
+        if cancel_token is not None:
+            return self.nlu.resolve_intent(normalized, bypass_cache=bypass_cache, cancel_token=cancel_token)
+        return self.nlu.resolve_intent(normalized, bypass_cache=bypass_cache)
 
-    def execute_directly(self, raw_input: str, bypass_cache: bool = False) -> ExecutionResult:
+    def resolve_speculatively(self, raw_input: str, cancel_token=None) -> Optional[Intent]:
+        """
+        The resolve stage alone, for core.prefetch while the user is still typing: no LLM fallback,
+        no dispatch or assessment. None when there is nothing worth handing to process_input.
+        """
+        normalized = self.normalize(raw_input)
+        intent = self._lookup_cache(normalized, False)
+        if intent is None:
+            intent = self.nlu.resolve_intent(normalized, bypass_cache=True, cancel_token=cancel_token, allow_llm=False)
+        if cancel_token is not None and cancel_token.cancelled:
+            return None
+        if intent.intent_type in ["unknown", "error", "kernel_error"]:
+            return None
+        return intent
+
+    def execute_directly(self, raw_input: str, bypass_cache: bool = False, cancel_token=None) -> ExecutionResult:
         """
         Executes the input directly (Golden Path for Tests).
         Skips confirmation! Use only for tests or trusted inputs.
         """
-        intent, command, risk = self.process_input(raw_input, bypass_cache)
+        try:
+            intent, command, risk = self.process_input(raw_input, bypass_cache=bypass_cache, cancel_token=cancel_token)
+        except OperationCancelled as e:
+            return ExecutionResult(False, str(e))
         
         if intent.intent_type in ["unknown", "error", "kernel_error"]:
              return ExecutionResult(False, f"Intent Resolution Failed: {intent.description}", intent, risk)
@@ -76,7 +184,7 @@ class ExecutionManager:
         runner = RunnerBridge(log_func, session=self.session)
         
         try:
-            success = runner.execute(command, intent)
+            success = runner.execute(command, intent, cancel_token=cancel_token)
             return ExecutionResult(success, "\n".join(logs), intent, risk)
         except Exception as e:
             return ExecutionResult(False, str(e), intent, risk)
@@ -0,0 +1,265 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .schemas import Intent
+from .security.command_parser import parse_command
+from .bridge_runner import build_kernel_script, is_failure_output
+from .result_cache import get_result_cache, is_read_only_command
+from .metrics import counter, gauge
+
+DEFAULT_JOBS_DIR = os.path.join("cache", "jobs")
+DEFAULT_JOB_TIMEOUT = int(os.getenv("INTENTSHELL_JOB_TIMEOUT", "3600"))
+
+# Kernel functions that walk whole folder trees
+SLOW_COMMANDS = {"measure-foldersize", "find-duplicatefiles"}
+FINISHED = {"done", "failed", "cancelled", "interrupted"}
+# How often progress is flushed to meta.json while a job is streaming output
+_PROGRESS_INTERVAL = 1.0
+
+JOBS_FINISHED = counter("intentshell_jobs_finished_total", "Background jobs by final status")
+JOBS_RUNNING = gauge("intentshell_jobs_running", "Background jobs currently on the worker Kernel")
+
+
+def is_potentially_slow(intent: Optional[Intent], command: Optional[str]) -> bool:
+    """True if the intent is flagged potential_slow or the command walks a folder tree."""
+    if intent is not None and intent.potential_slow:
+        return True
+    if not command:
+        return False
+    parsed = parse_command(command)
+    if parsed.has_command(*SLOW_COMMANDS):
+        return True
+    # Recursive listings/searches (Get-ChildItem -Recurse, gci -r ...)
+    recursive = any(t.kind == "word" and t.value.lower() in ("-recurse", "-r") for t in parsed.tokens)
+    return recursive and parsed.has_command("get-childitem", "gci", "dir", "ls")
+
+
+class JobManager:
+    """
+    Runs slow intents on a separate worker Kernel so the interactive session stays free.
+    Each job lives in cache/jobs/<id>/ as meta.json (status and progress) and output.log.
+    Jobs run one at a time in submission order; the worker session is started on first use.
+    """
+    def __init__(self, session_factory: Optional[Callable[[], object]] = None, jobs_dir: str = DEFAULT_JOBS_DIR,
+                 timeout: float = DEFAULT_JOB_TIMEOUT, on_finish: Optional[Callable[[dict], None]] = None):
+        """
+        :param session_factory: Builds the worker session (defaults to a new PowerShellSession).
+        :param timeout: Seconds a job may run before the Kernel call times out.
+        :param on_finish: Called with the job's meta dict when it finishes (from the worker thread).
+        """
+        self.session_factory = session_factory
+        self.jobs_dir = jobs_dir
+        self.timeout = timeout
+        self.on_finish = on_finish
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._session = None
+        self._running_id = None
+        self._worker = None
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Loads earlier jobs; anything that was still queued or running belonged to a dead process."""
+        for job_id in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, job_id, "meta.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if meta.get("status") not in FINISHED:
+                meta["status"] = "interrupted"
+                meta["finished_at"] = meta.get("finished_at") or time.time()
+                self._write_meta(meta)
+            self._jobs[meta["id"]] = meta
+
+    def _job_path(self, job_id: str, name: str) -> str:
+        return os.path.join(self.jobs_dir, job_id, name)
+
+    def _write_meta(self, meta: dict):
+        path = self._job_path(meta["id"], "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def submit(self, command: str, intent: Optional[Intent] = None, user_input: str = "") -> str:
+        """Queues an already confirmed command and returns its job ID at once."""
+        job_id = uuid.uuid4().hex[:8]
+        os.makedirs(os.path.join(self.jobs_dir, job_id), exist_ok=True)
+        meta = {
+            "id": job_id,
+            "status": "queued",
+            "input": user_input,
+            "command": command,
+            "intent": intent.model_dump(mode="json") if intent else None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "lines": 0,
+            "last_line": "",
+            "collected": False,
+        }
+        with self._lock:
+            self._jobs[job_id] = meta
+            self._write_meta(meta)
+        self._queue.put((job_id, intent))
+        self._ensure_worker()
+        return job_id
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._worker_loop, name="intentshell-jobs", daemon=True)
+                self._worker.start()
+
+    def _get_session(self):
+        if self._session is None:
+            if self.session_factory is not None:
+                self._session = self.session_factory()
+            else:
+                from .replay import open_session
+                self._session = open_session()
+        return self._session
+
+    def _worker_loop(self):
+        while True:
+            job_id, intent = self._queue.get()
+            with self._lock:
+                meta = self._jobs[job_id]
+                if meta["status"] != "queued":
+                    continue # Cancelled while waiting
+                meta["status"] = "running"
+                meta["started_at"] = time.time()
+                self._running_id = job_id
+                self._write_meta(meta)
+            JOBS_RUNNING.inc()
+            try:
+                self._run(meta, intent)
+            finally:
+                JOBS_RUNNING.dec()
+                with self._lock:
+                    self._running_id = None
+            JOBS_FINISHED.inc(status=meta["status"])
+            if self.on_finish:
+                try:
+                    self.on_finish(dict(meta))
+                except Exception as e:
+                    print(f"Job callback error: {e}")
+
+    def _run(self, meta: dict, intent: Optional[Intent]):
+        last_flush = [0.0]
+        with open(self._job_path(meta["id"], "output.log"), "a", encoding="utf-8") as log:
+            def on_line(line: str):
+                log.write(line + "\n")
+                log.flush()
+                with self._lock:
+                    meta["lines"] += 1
+                    meta["last_line"] = line[:200]
+                    if time.time() - last_flush[0] >= _PROGRESS_INTERVAL:
+                        last_flush[0] = time.time()
+                        self._write_meta(meta)
+
+            try:
+                session = self._get_session()
+                if meta["status"] == "cancelled":
+                    return # Cancelled while the worker Kernel was starting
+                output = session.run_command(build_kernel_script(meta["command"], intent),
+                                             timeout=self.timeout, on_line=on_line)
+                error = None
+            except Exception as e:
+                output, error = "", f"EXCEPTION: {e}"
+                log.write(error + "\n")
+
+        if not is_read_only_command(meta["command"]):
+            # Same rule as RunnerBridge: a job that may have changed the system drops cached query output
+            get_result_cache().invalidate()
+
+        with self._lock:
+            if meta["status"] == "cancelled":
+                pass
+            elif error or "ERROR: " in output or is_failure_output(output):
+                meta["status"] = "failed"
+                meta["error"] = error or output.strip().splitlines()[-1][:200]
+            else:
+                meta["status"] = "done"
+            meta["finished_at"] = time.time()
+            self._write_meta(meta)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a queued or running job. A running job's worker Kernel is killed;
+        the next job starts a fresh one.
+        """
+        with self._lock:
+            meta = self._jobs.get(job_id)
+            if meta is None or meta["status"] in FINISHED:
+                return False
+            was_running = job_id == self._running_id
+            meta["status"] = "cancelled"
+            meta["finished_at"] = time.time()
+            self._write_meta(meta)
+            session = None
+            if was_running:
+                session, self._session = self._session, None
+        if session is not None:
+            session.close()
+        return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            meta = self._jobs.get(job_id)
+            return dict(meta) if meta else None
+
+    def list_jobs(self) -> List[dict]:
+        with self._lock:
+            return sorted((dict(m) for m in self._jobs.values()), key=lambda m: m["created_at"])
+
+    def tail(self, job_id: str, lines: int = 20) -> List[str]:
+        path = self._job_path(job_id, "output.log")
+        if job_id not in self._jobs or not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return [line.rstrip("\n") for line in deque(f, maxlen=lines)]
+
+    def collect(self, job_id: str) -> Optional[Tuple[dict, str]]:
+        """Returns (meta, full output) of a finished job and marks it collected. None if unknown or still running."""
+        with self._lock:
+            meta = self._jobs.get(job_id)
+            if meta is None or meta["status"] not in FINISHED:
+                return None
+            meta["collected"] = True
+            self._write_meta(meta)
+            meta = dict(meta)
+        path = self._job_path(job_id, "output.log")
+        output = ""
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                output = f.read()
+        return meta, output
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+def format_job(meta: dict) -> str:
+    """One-line summary used by the CLI and overlay job listings."""
+    started = meta.get("started_at") or meta["created_at"]
+    end = meta.get("finished_at") or time.time()
+    elapsed = int(end - started) if meta.get("started_at") else 0
+    intent = (meta.get("intent") or {}).get("intent_type", "-")
+    line = f"{meta['id']}  {meta['status']:<11} {elapsed:>5}s  {meta['lines']:>6} lines  {intent}"
+    if meta["status"] == "running" and meta.get("last_line"):
+        line += f"  | {meta['last_line'][:60]}"
+    return line
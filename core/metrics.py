@@ -0,0 +1,299 @@
+"""
+In-process metrics: counters, gauges and fixed-bucket histograms.
+
+Recording is a dict lookup plus a locked add, cheap enough to stay on everywhere.
+The registry can be rendered as Prometheus text, as a JSON snapshot, or written to
+both periodically (see MetricsExporter and the [Metrics] section of config/main.ini).
+"""
+import bisect
+import configparser
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+# Seconds; covers a cached lookup (sub-ms) up to an LLM round trip or a slow Kernel call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return {_format_labels(key) or "": value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            return entry[2] if entry else 0
+
+    def quantile(self, q: float, **labels) -> float:
+        """Upper bound of the bucket holding quantile q (what a dashboard would estimate)."""
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            if not entry or not entry[2]:
+                return 0.0
+            rank = q * entry[2]
+            seen = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry[0]):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return float("inf")
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                out.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), cumulative))
+            out.append((f"{self.name}_sum", key, total))
+            out.append((f"{self.name}_count", key, count))
+        return out
+
+    def snapshot(self):
+        with self._lock:
+            keys = sorted(self._values)
+            counts = {key: (self._values[key][1], self._values[key][2]) for key in keys}
+        return {
+            _format_labels(key) or "": {
+                "count": count,
+                "sum": round(total, 6),
+                "p50": self.quantile(0.5, **dict(key)),
+                "p99": self.quantile(0.99, **dict(key)),
+            }
+            for key, (total, count) in counts.items()
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {
+            "timestamp": round(time.time(), 3),
+            "uptime_s": round(time.time() - self.started, 1),
+            "metrics": {m.name: {"type": m.type_name, "values": m.snapshot()} for m in metrics},
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help_text: str = "") -> Counter:
+    return REGISTRY.counter(name, help_text)
+
+
+def gauge(name: str, help_text: str = "") -> Gauge:
+    return REGISTRY.gauge(name, help_text)
+
+
+def histogram(name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help_text, buckets)
+
+
+def _write_atomic(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class MetricsExporter:
+    """
+    Writes the registry every interval seconds to a Prometheus text file (for node_exporter's
+    textfile collector) and/or a JSON snapshot.
+    """
+    def __init__(self, registry: MetricsRegistry = REGISTRY, prometheus_file: Optional[str] = None,
+                 json_file: Optional[str] = None, interval: float = 15.0):
+        self.registry = registry
+        self.prometheus_file = prometheus_file
+        self.json_file = json_file
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, path: str = CONFIG_PATH, registry: MetricsRegistry = REGISTRY) -> Optional["MetricsExporter"]:
+        config = configparser.ConfigParser()
+        if os.path.exists(path):
+            config.read(path, encoding="utf-8")
+        if not config.getboolean("Metrics", "enabled", fallback=False):
+            return None
+        return cls(
+            registry,
+            prometheus_file=config.get("Metrics", "prometheus_file", fallback="") or None,
+            json_file=config.get("Metrics", "json_file", fallback="") or None,
+            interval=config.getfloat("Metrics", "interval", fallback=15.0),
+        )
+
+    def write(self):
+        try:
+            if self.prometheus_file:
+                _write_atomic(self.prometheus_file, self.registry.render_prometheus())
+            if self.json_file:
+                _write_atomic(self.json_file, json.dumps(self.registry.snapshot(), ensure_ascii=False, indent=2))
+        except OSError as e:
+            print(f"Metrics export failed: {e}")
+
+    def start(self) -> "MetricsExporter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="intentshell-metrics", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        self._stop.set()
+        self.write() # Final snapshot on exit
+
+
+def start_exporter_from_config() -> Optional[MetricsExporter]:
+    exporter = MetricsExporter.from_config()
+    return exporter.start() if exporter else None
+
+
+def format_metrics(registry: MetricsRegistry = REGISTRY) -> str:
+    """Compact human-readable listing for the REPL 'metrics' command."""
+    lines = []
+    for name, data in registry.snapshot()["metrics"].items():
+        for labels, value in data["values"].items():
+            if data["type"] == "histogram":
+                text = f"count={value['count']} p50<={_format_value(value['p50'])}s p99<={_format_value(value['p99'])}s"
+            else:
+                text = _format_value(value)
+            lines.append(f"{name}{labels} {text}")
+    return "\n".join(lines) if lines else "No metrics recorded yet."
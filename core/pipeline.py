@@ -0,0 +1,88 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .tracing import span
+from .metrics import histogram
+
+STAGE_LATENCY = histogram("intentshell_stage_seconds", "Time spent in each process_input stage")
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], after: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+
+class StagedPipeline:
+    """
+    Runs a small per-request dependency graph of stages.
+    Every stage whose dependencies are done starts immediately, so independent stages
+    overlap on the shared executor. A stage receives the results of all finished stages.
+    """
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], after: Iterable[str] = ()) -> "StagedPipeline":
+        self.stages[name] = Stage(name, func, after)
+        return self
+
+    def run(self, results: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Executes all stages. Returns (results by stage name, seconds spent per stage).
+        The first stage error is re-raised once running stages have finished.
+        """
+        results = dict(results or {})
+        timings: Dict[str, float] = {}
+        pending = {name: stage for name, stage in self.stages.items() if name not in results}
+        for stage in pending.values():
+            missing = [dep for dep in stage.after if dep not in self.stages and dep not in results]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+
+        running = {}
+        error = None
+        while pending or running:
+            ready = [s for s in pending.values() if all(dep in results for dep in s.after)] if error is None else []
+            for stage in ready:
+                del pending[stage.name]
+
+            # A lone ready stage with nothing in flight runs inline (no thread hop)
+            if (len(ready) == 1 and not running) or (ready and self.executor is None):
+                for stage in ready:
+                    try:
+                        results[stage.name], timings[stage.name] = self._timed(stage, results)
+                    except Exception as e:
+                        error = error or e
+                continue
+
+            for stage in ready:
+                # Copy the context so stage spans nest under the caller's span on worker threads
+                running[self.executor.submit(contextvars.copy_context().run, self._timed, stage, dict(results))] = stage
+
+            if not running:
+                if pending and error is None:
+                    raise ValueError(f"Dependency cycle between stages: {', '.join(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name], timings[stage.name] = future.result()
+                except Exception as e:
+                    error = error or e
+
+        if error is not None:
+            raise error
+        return results, timings
+
+    @staticmethod
+    def _timed(stage: Stage, results: Dict[str, Any]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        with span(f"stage.{stage.name}"):
+            value = stage.func(results)
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage.name)
+        return value, elapsed
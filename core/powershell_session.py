@@ -7,18 +7,43 @@ import time
 import base64
 import threading
 import queue
+import shlex
 import shutil
-from typing import Optional
+import signal
+from typing import Callable, List, Optional, Sequence
 
 import datetime
-from ui.security_dialogs import show_ghost_mode_warning
+from core.tracing import span, tracer
+from core.metrics import counter, histogram
+
+# Kernel functions add "<stage>_ms": [start offset ms, duration ms] entries to $Global:IntentShellTimings
+# while tracing is on (offsets from $Global:IntentShellClock, started by the wrapper); the session
+# wrapper reports them on one line that never reaches the bridges
+KERNEL_TIMINGS_PREFIX = "KERNEL_TIMINGS:"
+# Command line of an alternative Kernel process (e.g. tests/fake_kernel.py) speaking the same protocol
+KERNEL_ENV = "INTENTSHELL_KERNEL"
+CANCELLED_RESPONSE = "ERROR: CANCELLED by user"
+# Seconds a cancelled pipeline gets to stop and answer the resync marker before the process is recycled
+RESYNC_TIMEOUT = float(os.getenv("INTENTSHELL_RESYNC_TIMEOUT", "2"))
+# Queued by a cancelled token so the read loop wakes up at once
+_WAKE = object()
+
+KERNEL_REQUESTS = counter("intentshell_kernel_requests_total", "Kernel round trips (run_command calls)")
+KERNEL_LATENCY = histogram("intentshell_kernel_request_seconds", "Kernel round trip time including lock wait")
+KERNEL_RESTARTS = counter("intentshell_kernel_restarts_total", "Kernel sessions restarted after the process died")
+KERNEL_TIMEOUTS = counter("intentshell_kernel_timeouts_total", "Kernel calls that hit the read timeout")
+KERNEL_CANCELS = counter("intentshell_kernel_cancellations_total", "Cancelled Kernel calls by recovery (resync: warm session kept, recycle: process killed)")
 
 class PowerShellSession:
     """
     Manages a persistent PowerShell process for low-latency command execution.
+    :param kernel_command: Runs this command line instead of pwsh (defaults to $INTENTSHELL_KERNEL).
+    :param recorder: core.replay.SessionRecorder logging every exchange (defaults to $INTENTSHELL_RECORD).
     """
-    def __init__(self):
+    def __init__(self, kernel_command: Optional[Sequence[str]] = None, recorder=None):
         self.process = None
+        self.kernel_command = list(kernel_command) if kernel_command else self._kernel_command_from_env()
+        self.recorder = recorder or self._recorder_from_env()
         self.delimiter = f"END_OF_RESPONSE_{uuid.uuid4().hex}"
         # Runtime state only. Not persisted to disk. Resets on session restart.
         self.ghost_mode_active = False 
@@ -29,6 +54,8 @@ class PowerShellSession:
         self.output_queue = queue.Queue()
         self.reader_thread = None
         self.stop_reader = False
+        # One request/response exchange at a time: pipeline stages and worker threads share the session
+        self._lock = threading.RLock()
         
         self._start_session()
 
@@ -46,6 +73,22 @@ class PowerShellSession:
         from core.security.kernel_guard import assert_kernel_disabled
         assert_kernel_disabled()
 
+    @staticmethod
+    def _kernel_command_from_env() -> Optional[List[str]]:
+        value = os.getenv(KERNEL_ENV, "").strip()
+        if not value:
+            return None
+        return shlex.split(value, posix=sys.platform != "win32")
+
+    @staticmethod
+    def _recorder_from_env():
+        from core.replay import RECORD_ENV, SessionRecorder
+        path = os.getenv(RECORD_ENV, "").strip()
+        if not path:
+            return None
+        from config.settings import settings
+        return SessionRecorder.for_path(path, secrets=[settings.GROQ_API_KEY])
+
     def _reader_loop(self):
         """Reads stdout in a separate thread and puts lines into a queue."""
         while not self.stop_reader and self.process:
@@ -60,17 +103,20 @@ class PowerShellSession:
     def _start_session(self):
         """Starts the persistent PowerShell process."""
         try:
-            # Use PowerShell Core (pwsh) 7+
-            pwsh_path = shutil.which("pwsh")
-            if not pwsh_path:
-                 # Fallback for standard installation
-                 pwsh_path = r"C:\Program Files\PowerShell\7\pwsh.exe"
-                 if not os.path.exists(pwsh_path):
-                     print("Error: PowerShell 7 (pwsh) not found.")
-                     self.process = None
-                     return
-
-            cmd = [pwsh_path, "-NoProfile", "-NoLogo", "-ExecutionPolicy", "Bypass", "-Command", "-"]
+            if self.kernel_command:
+                cmd = self.kernel_command
+            else:
+                # Use PowerShell Core (pwsh) 7+
+                pwsh_path = shutil.which("pwsh")
+                if not pwsh_path:
+                     # Fallback for standard installation
+                     pwsh_path = r"C:\Program Files\PowerShell\7\pwsh.exe"
+                     if not os.path.exists(pwsh_path):
+                         print("Error: PowerShell 7 (pwsh) not found.")
+                         self.process = None
+                         return
+
+                cmd = [pwsh_path, "-NoProfile", "-NoLogo", "-ExecutionPolicy", "Bypass", "-Command", "-"]
             
             # Windows specific flag to hide window
             creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
@@ -183,12 +229,61 @@ class PowerShellSession:
             print(f"Failed to start persistent PowerShell session: {e}")
             self.process = None
 
-    def run_command(self, script_block: str, is_init: bool = False) -> str:
+    def run_command(self, script_block: str, is_init: bool = False, timeout: Optional[float] = None,
+                    on_line: Optional[Callable[[str], None]] = None, cancel_token=None) -> str:
         """
         Runs a script block in the persistent session and returns stdout.
+        Thread-safe: concurrent callers are serialised.
+        :param timeout: Overrides read_timeout_seconds for this call (background jobs).
+        :param on_line: Called with each output line as it arrives.
+        :param cancel_token: core.cancellation.CancellationToken; once cancelled the Kernel pipeline is
+                             interrupted and CANCELLED_RESPONSE returned (see _recover_after_cancel).
         """
+        start = time.perf_counter()
+        with span("kernel.run_command", init=is_init):
+            with span("kernel.lock_wait"):
+                self._lock.acquire()
+            try:
+                return self._run_command(script_block, is_init, timeout, on_line, cancel_token)
+            finally:
+                self._lock.release()
+                KERNEL_REQUESTS.inc()
+                KERNEL_LATENCY.observe(time.perf_counter() - start)
+
+    def encode_command(self, script_block: str, delimiter: Optional[str] = None) -> str:
+        """Wraps a script block with the error trap and delimiter and encodes it as one stdin line."""
+        # Wrap command to ensure we get a delimiter
+        # We use base64 for complex objects usually, but here we expect text output
+        # We add a trap for errors to print them to stdout so we can capture them
+        timings_start, timings_end = "", ""
+        if tracer.enabled:
+            timings_start = "$Global:IntentShellTimings = [ordered]@{}; $Global:IntentShellClock = [System.Diagnostics.Stopwatch]::StartNew()"
+            timings_end = f"""
+            if ($Global:IntentShellTimings.Count -gt 0) {{
+                Write-Output ("{KERNEL_TIMINGS_PREFIX}" + ($Global:IntentShellTimings | ConvertTo-Json -Compress))
+            }}
+            $Global:IntentShellTimings = $null; $Global:IntentShellClock = $null"""
+        wrapped_command = f"""
+        {timings_start}
+        try {{
+            {script_block}
+        }} catch {{
+            Write-Output "ERROR: $_"
+        }}{timings_end}
+        Write-Output "{delimiter or self.delimiter}"
+        """
+
+        # Encode command to Base64 to avoid newline/comment issues
+        encoded = base64.b64encode(wrapped_command.encode('utf-16le')).decode('utf-8')
+        return f"$c = [System.Text.Encoding]::Unicode.GetString([System.Convert]::FromBase64String('{encoded}')); Invoke-Expression $c"
+
+    def _run_command(self, script_block: str, is_init: bool = False, timeout: Optional[float] = None,
+                     on_line: Optional[Callable[[str], None]] = None, cancel_token=None) -> str:
+        if cancel_token is not None and cancel_token.cancelled:
+            return CANCELLED_RESPONSE
         if not self.process or self.process.poll() is not None:
             print("Session dead, restarting...")
+            KERNEL_RESTARTS.inc()
             self._start_session()
             if not is_init:
                 # Re-run init if we just restarted and this wasn't the init call
@@ -197,75 +292,193 @@ class PowerShellSession:
         if not self.process:
             return ""
 
+        started = time.perf_counter()
         try:
-            # Wrap command to ensure we get a delimiter
-            # We use base64 for complex objects usually, but here we expect text output
-            # We add a trap for errors to print them to stdout so we can capture them
-            wrapped_command = f"""
-            try {{
-                {script_block}
-            }} catch {{
-                Write-Output "ERROR: $_"
-            }}
-            Write-Output "{self.delimiter}"
-            """
-            
-            # Encode command to Base64 to avoid newline/comment issues
-            encoded = base64.b64encode(wrapped_command.encode('utf-16le')).decode('utf-8')
-            command_to_send = f"$c = [System.Text.Encoding]::Unicode.GetString([System.Convert]::FromBase64String('{encoded}')); Invoke-Expression $c"
+            with span("kernel.encode"):
+                command_to_send = self.encode_command(script_block)
 
             # Write to stdin
             try:
-                self.process.stdin.write(command_to_send + "\n")
-                self.process.stdin.flush()
+                with span("kernel.write", bytes=len(command_to_send)):
+                    self.process.stdin.write(command_to_send + "\n")
+                    self.process.stdin.flush()
             except Exception:
                  # If write fails, session might be dead
                  return "ERROR: Write failed"
             
             # Read from stdout until delimiter (using queue for timeout support)
             output = []
+            kernel_timings = None
+            cancelled = False
+            unregister = cancel_token.register(lambda: self.output_queue.put(_WAKE)) if cancel_token is not None else None
             start_time = time.time()
+            read_timeout = timeout if timeout is not None else self.read_timeout_seconds
             
-            while True:
-                try:
-                    # Calculate remaining time
-                    elapsed = time.time() - start_time
-                    remaining = self.read_timeout_seconds - elapsed
+            with span("kernel.wait") as wait_span:
+                while True:
+                    try:
+                        # Calculate remaining time
+                        elapsed = time.time() - start_time
+                        remaining = read_timeout - elapsed
                     
-                    if not is_init and remaining <= 0:
-                        output.append("ERROR: TIMEOUT waiting for response")
-                        # We might want to kill the process here since it's stuck?
-                        # For now just return error
-                        break
-
-                    # Wait for line from queue
-                    # If is_init is True, we can wait longer or forever? 
-                    # Let's use a longer timeout for init or just large number
-                    timeout_val = remaining if not is_init else 60.0 
+                        if not is_init and remaining <= 0:
+                            output.append("ERROR: TIMEOUT waiting for response")
+                            # We might want to kill the process here since it's stuck?
+                            # For now just return error
+                            break
+
+                        # Wait for line from queue
+                        # If is_init is True, we can wait longer or forever? 
+                        # Let's use a longer timeout for init or just large number
+                        timeout_val = remaining if not is_init else 60.0 
                     
-                    line = self.output_queue.get(timeout=timeout_val)
+                        # Wake up at least once a second to notice a process killed by close()
+                        line = self.output_queue.get(timeout=min(timeout_val, 1.0))
+                        if line is _WAKE:
+                            if cancel_token is not None and cancel_token.cancelled:
+                                cancelled = True
+                                break
+                            continue # Left over from an earlier cancelled call
                     
-                    # Check raw line first before stripping
-                    clean_line = line.strip()
-                    if clean_line == self.delimiter:
-                        break
+                        # Check raw line first before stripping
+                        clean_line = line.strip()
+                        if clean_line == self.delimiter:
+                            break
+                        if clean_line.startswith(KERNEL_TIMINGS_PREFIX):
+                            kernel_timings = clean_line[len(KERNEL_TIMINGS_PREFIX):]
+                            continue
                     
-                    # Filter out empty lines if they are just noise? No, preserve intent.
-                    output.append(clean_line)
+                        # Filter out empty lines if they are just noise? No, preserve intent.
+                        output.append(clean_line)
+                        if on_line:
+                            on_line(clean_line)
                     
-                except queue.Empty:
-                    if not is_init:
-                        output.append("ERROR: TIMEOUT waiting for response")
-                        break
-                    # If init, keep waiting? Or fail?
-                    # Init usually takes time.
-                
-            return "\n".join(output)
+                    except queue.Empty:
+                        if self.process.poll() is not None:
+                            output.append("ERROR: Session terminated")
+                            break
+                        if not is_init and time.time() - start_time >= read_timeout:
+                            output.append("ERROR: TIMEOUT waiting for response")
+                            break
+                        # If init, keep waiting? Or fail?
+                        # Init usually takes time.
+                wait_span.set("lines", len(output))
+            if unregister is not None:
+                unregister()
+            if cancelled:
+                with span("kernel.cancel"):
+                    self._recover_after_cancel()
+                return CANCELLED_RESPONSE
+            if output and output[-1] == "ERROR: TIMEOUT waiting for response":
+                KERNEL_TIMEOUTS.inc()
+
+            with span("kernel.decode"):
+                result = "\n".join(output)
+            if kernel_timings:
+                self._record_kernel_timings(kernel_timings, start_time)
+            if self.recorder is not None and not is_init:
+                # Never the init script: it carries the API key
+                self.recorder.record(script_block, result, time.perf_counter() - started)
+
+            return result
             
         except Exception as e:
             print(f"Session Communication Error: {e}")
             return ""
 
+    def _interrupt(self) -> bool:
+        """
+        Asks the Kernel to stop its running pipeline (SIGINT, handled by pwsh like Ctrl+C).
+        False if no signal could be sent.
+        Windows has no equivalent for a pwsh started with CREATE_NO_WINDOW: nothing is sent, so a
+        cancelled command that doesn't finish within RESYNC_TIMEOUT costs the warm Kernel (recycle).
+        """
+        if sys.platform == "win32":
+            return False
+        try:
+            self.process.send_signal(signal.SIGINT)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _recover_after_cancel(self):
+        """
+        Interrupts the cancelled pipeline, then sends a no-op with a fresh delimiter and discards
+        everything up to it, so the cancelled call's late output never reaches the next request.
+        If the Kernel doesn't answer within RESYNC_TIMEOUT, the process is recycled instead.
+        """
+        self._interrupt()
+        marker = f"RESYNC_{uuid.uuid4().hex}"
+        try:
+            self.process.stdin.write(self.encode_command("$null", delimiter=marker) + "\n")
+            self.process.stdin.flush()
+        except Exception:
+            self._recycle()
+            return
+        deadline = time.time() + RESYNC_TIMEOUT
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                line = self.output_queue.get(timeout=min(remaining, 0.25))
+            except queue.Empty:
+                if self.process.poll() is not None:
+                    break
+                continue
+            if line is not _WAKE and line.strip() == marker:
+                KERNEL_CANCELS.inc(recovery="resync")
+                return
+        self._recycle()
+
+    def _recycle(self):
+        """Kills a Kernel that could not be resynchronised; the next call starts a fresh one."""
+        KERNEL_CANCELS.inc(recovery="recycle")
+        print("Kernel did not stop after cancel, recycling the session...")
+        self.stop_reader = True
+        if self.process:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+        self.process = None
+
+    @staticmethod
+    def _record_kernel_timings(payload: str, wait_start: float):
+        """
+        Adds the Kernel's own stage timings as child spans. Stages report their start offset, so a
+        stage that ran inside another (llm_http inside llm_generation) becomes its child span.
+        Bare durations (older Kernels) are laid out back to back from wait_start.
+        """
+        try:
+            timings = json.loads(payload)
+        except json.JSONDecodeError:
+            return
+        stages = []
+        offset = 0.0
+        for name, value in timings.items():
+            name = f"kernel.{name[:-3] if name.endswith('_ms') else name}"
+            try:
+                if isinstance(value, list) and len(value) == 2:
+                    stages.append((max(float(value[0]), 0.0) / 1000.0, float(value[1]) / 1000.0, name))
+                    continue
+                seconds = float(value) / 1000.0
+            except (TypeError, ValueError):
+                continue
+            tracer.record(name, wait_start + offset, seconds, reported_by="kernel")
+            offset += seconds
+
+        # Outer stages first; a stage is nested in the innermost open stage that contains it
+        open_stages = []
+        for start, seconds, name in sorted(stages, key=lambda s: (s[0], -s[1])):
+            while open_stages and start >= open_stages[-1][0] - 1e-6:
+                open_stages.pop()
+            parent = open_stages[-1][1] if open_stages else None
+            recorded = tracer.record(name, wait_start + start, seconds, parent=parent, reported_by="kernel")
+            if recorded is not None:
+                open_stages.append((start + seconds, recorded))
+
     def close(self):
         self.stop_reader = True
         if self.process:
@@ -0,0 +1,180 @@
+"""
+Speculative intent resolution while the user is typing.
+
+The overlay feeds every keystroke to SpeculativePrefetcher.update(). Once the text has been
+stable for debounce_ms, it resolves that text in the background (the resolve stage only, with
+the Kernel's LLM fallback switched off). When Enter is pressed, take() hands back the
+finished or in-flight result if the text matches, so the pipeline skips resolution.
+
+Speculation must never get in the way of real requests:
+- At most one speculation runs at a time, and a newer text cancels the older one.
+- Nothing starts while is_idle() says a real request is running.
+- take() cancels any speculation that doesn't match, so the Kernel is free for the real request.
+- A token bucket caps speculative Kernel calls (max_per_minute, burst).
+"""
+import configparser
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from core.cancellation import CancellationToken
+from core.metrics import counter
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+
+PREFETCHES = counter("intentshell_prefetch_total", "Speculative resolutions by outcome (started, hit, miss, throttled, cancelled)")
+
+
+def load_prefetch_settings(path: str = CONFIG_PATH) -> Tuple[bool, int, int, int, int]:
+    """Returns (enabled, debounce_ms, min_chars, max_per_minute, burst) from [Prefetch] in config/main.ini."""
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path, encoding="utf-8")
+    return (config.getboolean("Prefetch", "enabled", fallback=True),
+            config.getint("Prefetch", "debounce_ms", fallback=300),
+            config.getint("Prefetch", "min_chars", fallback=4),
+            config.getint("Prefetch", "max_per_minute", fallback=20),
+            config.getint("Prefetch", "burst", fallback=3))
+
+
+def prefetch_key(text: str) -> str:
+    """Texts that resolve the same: the normalisation of NLUBridge.cache_key (inner whitespace can be quoted)."""
+    return text.strip().lower()
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = max(per_minute, 0.0) / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class _Speculation:
+    def __init__(self, key: str, text: str):
+        self.key = key
+        self.text = text
+        self.token = CancellationToken()
+        self.done = threading.Event()
+        self.result = None
+        self.finished_at = None
+
+
+class SpeculativePrefetcher:
+    """
+    :param resolve: resolve(text, cancel_token) -> result or None (None: nothing worth reusing).
+    :param is_idle: False while a real request runs; speculation is skipped then.
+    :param max_age: Seconds a finished result stays reusable.
+    """
+    def __init__(self, resolve: Callable[[str, CancellationToken], Any], debounce_ms: int = 300, min_chars: int = 4,
+                 max_per_minute: int = 20, burst: int = 3, max_age: float = 30.0,
+                 is_idle: Optional[Callable[[], bool]] = None):
+        self.resolve = resolve
+        self.debounce = max(debounce_ms, 0) / 1000.0
+        self.min_chars = min_chars
+        self.max_age = max_age
+        self.is_idle = is_idle or (lambda: True)
+        self.bucket = TokenBucket(max_per_minute, burst)
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._current: Optional[_Speculation] = None
+
+    def update(self, text: str):
+        """Keystroke: (re)starts the debounce for text."""
+        key = prefetch_key(text)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            current = self._current
+            if len(key) < self.min_chars or (current is not None and current.key == key and self._fresh(current)):
+                return
+            timer = self._timer = threading.Timer(self.debounce, self._fire, args=(text, key))
+            timer.daemon = True
+            timer.start()
+
+    def _fresh(self, speculation: _Speculation) -> bool:
+        if speculation.token.cancelled:
+            return False
+        return speculation.finished_at is None or time.monotonic() - speculation.finished_at <= self.max_age
+
+    def _fire(self, text: str, key: str):
+        """Timer thread: the text has been stable for the debounce interval."""
+        with self._lock:
+            if self._timer is None or self._timer is not threading.current_thread():
+                return # Superseded or taken meanwhile
+            self._timer = None
+            if not self.is_idle():
+                return
+            if not self.bucket.take():
+                PREFETCHES.inc(outcome="throttled")
+                return
+            previous, speculation = self._current, _Speculation(key, text)
+            self._current = speculation
+        if previous is not None and not previous.done.is_set():
+            PREFETCHES.inc(outcome="cancelled")
+            previous.token.cancel()
+        PREFETCHES.inc(outcome="started")
+        try:
+            result = self.resolve(text, speculation.token)
+        except Exception as e:
+            print(f"Prefetch Error: {e}")
+            result = None
+        speculation.result = None if speculation.token.cancelled else result
+        speculation.finished_at = time.monotonic()
+        speculation.done.set()
+
+    def take(self, text: str, cancel_token: Optional[CancellationToken] = None):
+        """
+        Enter: the speculative result for text (waiting for it if still in flight), or None.
+        Whatever else was pending or running is cancelled.
+        """
+        key = prefetch_key(text)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            speculation, self._current = self._current, None
+        if speculation is None:
+            return None
+        if speculation.key != key or not self._fresh(speculation):
+            self._discard(speculation)
+            PREFETCHES.inc(outcome="miss")
+            return None
+        while not speculation.done.wait(0.05):
+            if cancel_token is not None and cancel_token.cancelled:
+                self._discard(speculation)
+                return None
+        if speculation.result is None:
+            PREFETCHES.inc(outcome="miss")
+            return None
+        PREFETCHES.inc(outcome="hit")
+        return speculation.result
+
+    @staticmethod
+    def _discard(speculation: _Speculation):
+        if not speculation.done.is_set():
+            PREFETCHES.inc(outcome="cancelled")
+            speculation.token.cancel()
+
+    def cancel(self):
+        """Drops the pending and in-flight speculation (window hidden, input cleared)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            speculation, self._current = self._current, None
+        if speculation is not None:
+            self._discard(speculation)
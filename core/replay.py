@@ -0,0 +1,174 @@
+"""
+Record-and-replay transport for the Kernel session.
+
+Recording (INTENTSHELL_RECORD=<file>, or `python main.py --record FILE`) appends every
+request script, its response and the round-trip time to a gzip JSONL file. The init
+script is never recorded, so the API key and local module paths stay out of the file.
+
+Replaying (INTENTSHELL_REPLAY=<file>) swaps the pwsh process for ReplaySession, which
+answers the bridges from that file at the recorded speed (INTENTSHELL_REPLAY_SPEED=1),
+scaled, or as fast as possible (0). The Python side then runs real workloads without
+Windows or the LLM.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .powershell_session import CANCELLED_RESPONSE, PowerShellSession
+
+RECORD_ENV = "INTENTSHELL_RECORD"
+REPLAY_ENV = "INTENTSHELL_REPLAY"
+REPLAY_SPEED_ENV = "INTENTSHELL_REPLAY_SPEED"
+RECORDING_FORMAT = "intentshell-recording"
+RECORDING_VERSION = 1
+CWD_PLACEHOLDER = "{CWD}"
+NO_RECORDING_RESPONSE = "ERROR: No recorded response for this request"
+
+
+def normalize_script(script: str) -> str:
+    """Replay key: the working directory (embedded in Import-Module paths) and whitespace don't matter."""
+    return " ".join(script.replace(os.getcwd(), CWD_PLACEHOLDER).split())
+
+
+class SessionRecorder:
+    """
+    Appends Kernel exchanges to a gzip JSONL file. Sessions recording to the same path share
+    one recorder (see for_path), so worker and job sessions interleave safely.
+    """
+    _instances: Dict[str, "SessionRecorder"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, secrets: Optional[List[str]] = None):
+        self.path = path
+        self.secrets = [s for s in (secrets or []) if s]
+        self._lock = threading.Lock()
+        self._started = time.time()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        if is_new:
+            self._write({"format": RECORDING_FORMAT, "version": RECORDING_VERSION,
+                         "created": round(self._started, 3)})
+
+    @classmethod
+    def for_path(cls, path: str, secrets: Optional[List[str]] = None) -> "SessionRecorder":
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            recorder = cls._instances.get(key)
+            if recorder is None or recorder._file.closed:
+                recorder = cls._instances[key] = cls(path, secrets)
+            return recorder
+
+    def _write(self, entry: dict):
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush() # Sync-flushes the gzip stream; a crash loses at most the current entry
+
+    def record(self, script: str, output: str, duration: float):
+        entry = {
+            "t": round(time.time() - self._started, 3),
+            "script": self._scrub(normalize_script(script)),
+            "output": self._scrub(output),
+            "ms": round(duration * 1000, 2),
+        }
+        with self._lock:
+            if not self._file.closed:
+                self._write(entry)
+
+    def _scrub(self, text: str) -> str:
+        for secret in self.secrets:
+            text = text.replace(secret, "***")
+        return text
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def load_recording(path: str) -> List[dict]:
+    """Returns the recorded exchanges in order. A truncated tail (crash while recording) is ignored."""
+    entries = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if "format" in entry:
+                    if entry["format"] != RECORDING_FORMAT or entry.get("version", 0) > RECORDING_VERSION:
+                        raise ValueError(f"Unsupported recording: {path}")
+                    continue
+                entries.append(entry)
+        except EOFError:
+            pass
+    return entries
+
+
+class ReplaySession(PowerShellSession):
+    """
+    Drop-in session that serves recorded responses instead of running pwsh.
+    Requests are matched on their normalized script; repeated requests get the recorded
+    responses in order and then cycle through them again.
+    :param speed: 1.0 replays recorded latencies, 2.0 twice as fast, 0 as fast as possible.
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        self.replay_path = path
+        self.speed = speed
+        self.responses: Dict[str, deque] = {}
+        for entry in load_recording(path):
+            self.responses.setdefault(entry["script"], deque()).append((entry["output"], entry["ms"] / 1000.0))
+        self.hits = 0
+        self.misses = 0
+        super().__init__()
+
+    def _start_session(self):
+        # No process: responses come from the recording
+        self.process = None
+        self.recorder = None
+
+    def _run_command(self, script_block: str, is_init: bool = False, timeout: Optional[float] = None,
+                     on_line: Optional[Callable[[str], None]] = None, cancel_token=None) -> str:
+        queue = self.responses.get(normalize_script(script_block))
+        if not queue:
+            self.misses += 1
+            return NO_RECORDING_RESPONSE
+        self.hits += 1
+        output, duration = queue[0]
+        queue.rotate(-1)
+
+        delay = duration / self.speed if self.speed > 0 else 0.0
+        read_timeout = timeout if timeout is not None else self.read_timeout_seconds
+        if cancel_token is not None:
+            if cancel_token.wait(min(delay, read_timeout)):
+                return CANCELLED_RESPONSE
+            if delay > read_timeout:
+                return "ERROR: TIMEOUT waiting for response"
+        elif delay > read_timeout:
+            time.sleep(read_timeout)
+            return "ERROR: TIMEOUT waiting for response"
+        elif delay:
+            time.sleep(delay)
+        if on_line:
+            for line in output.split("\n"):
+                on_line(line)
+        return output
+
+    def close(self):
+        pass
+
+
+def open_session() -> PowerShellSession:
+    """The Kernel session to use: a ReplaySession when INTENTSHELL_REPLAY is set, else pwsh (or INTENTSHELL_KERNEL)."""
+    path = os.getenv(REPLAY_ENV)
+    if path:
+        return ReplaySession(path, speed=float(os.getenv(REPLAY_SPEED_ENV, "1")))
+    return PowerShellSession()
@@ -0,0 +1,173 @@
+import configparser
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .schemas import Intent, RiskLevel
+from .security.command_parser import parse_command, walk_command_positions
+from .metrics import counter
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+
+# Query cmdlets that don't have a Get-/Test- verb but only reshape pipeline output
+PURE_CMDLETS = {
+    "select-object", "where-object", "sort-object", "group-object", "measure-object",
+    "format-table", "format-list", "format-wide", "out-string",
+    "convertto-json", "convertto-csv", "select-string",
+}
+# Read-only, but every call must give a fresh answer
+NEVER_CACHE = {"get-random", "get-date", "get-credential", "get-clipboard"}
+_ASSIGNMENT = re.compile(r"^(?:[+\-*/%]|\?\?)?=$")
+_REDIRECTIONS = {">", ">>", "2>", "2>>", "*>", "*>>", "2>&1", "*>&1", "<"}
+
+RESULT_CACHE = counter("intentshell_result_cache_lookups_total", "Result cache lookups for cacheable queries by result (hit/miss/expired)")
+
+
+def is_read_only_command(command: str) -> bool:
+    """
+    True if every command the lexer finds (including ones inside script blocks,
+    subexpressions and hashtable values) is a Get-*/Test-* query or a pure formatting
+    cmdlet, with no redirection, call operator or .NET method call.
+    """
+    parsed = parse_command(command)
+    tokens = [t for t in parsed.tokens if t.kind != "comment"]
+    if not tokens:
+        return False
+
+    for step in walk_command_positions(tokens):
+        token = step.token
+        if token.kind == "operator" and (token.value in _REDIRECTIONS or token.value == "&"):
+            return False
+
+        if token.kind == "string" and "$(" in token.text and not token.text.startswith(("'", "@'")):
+            return False # Subexpression inside an expandable string runs code
+
+        if token.kind == "word":
+            if _ASSIGNMENT.match(token.value) and not step.in_hashtable:
+                return False # Changes session state (in @{ } it just separates key and value)
+
+            # Method call: $x.Kill() / [IO.File]::Delete(...) / (Get-Item a).Delete()
+            following = tokens[step.index + 1] if step.index + 1 < len(tokens) else None
+            if following is not None and following.kind == "group" and following.value == "(" \
+                    and following.start == token.end and ("." in token.value or "::" in token.value):
+                return False
+
+            # Expressions ($var, [type], numbers, -not) are not commands; anything else in command position
+            # (including . dot-sourcing and .\script.ps1) must be an allowed cmdlet
+            if step.command_position and not token.value.startswith(("$", "[", "-")) and not token.value[:1].isdigit():
+                name = token.value.lower()
+                if not (name.startswith(("get-", "test-")) or name in PURE_CMDLETS):
+                    return False
+    return True
+
+
+class ResultCache:
+    """
+    TTL cache for the output of read-only query intents (see is_read_only_command).
+    TTLs come from the [ResultCache] section of config/main.ini, per intent type.
+    """
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 10.0,
+                 enabled: bool = True, max_entries: int = 128):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # (intent_type, command) -> (stored_at, output)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path: str = CONFIG_PATH) -> "ResultCache":
+        config = configparser.ConfigParser()
+        if os.path.exists(path):
+            config.read(path, encoding="utf-8")
+        if not config.has_section("ResultCache"):
+            return cls()
+        section = config["ResultCache"]
+        ttls = {}
+        for key, value in section.items():
+            if key in ("enabled", "default_ttl"):
+                continue
+            try:
+                ttls[key] = float(value)
+            except ValueError:
+                print(f"ResultCache: ignoring invalid TTL '{key} = {value}'")
+        return cls(
+            ttls=ttls,
+            default_ttl=section.getfloat("default_ttl", fallback=10.0),
+            enabled=section.getboolean("enabled", fallback=True),
+        )
+
+    def ttl_for(self, intent_type: str) -> float:
+        return self.ttls.get(intent_type.lower(), self.default_ttl)
+
+    def is_cacheable(self, command: str, intent: Optional[Intent]) -> bool:
+        if not self.enabled or intent is None or not command:
+            return False
+        if intent.risk != RiskLevel.LOW or self.ttl_for(intent.intent_type) <= 0:
+            return False
+        # Get-Date and friends are read-only, but their answer is stale as soon as it is stored
+        return is_read_only_command(command) and not parse_command(command).has_command(*NEVER_CACHE)
+
+    @staticmethod
+    def _key(intent: Intent, command: str) -> Tuple[str, str]:
+        return intent.intent_type.lower(), " ".join(command.split())
+
+    def get(self, command: str, intent: Intent) -> Optional[Tuple[str, float]]:
+        """Returns (output, age in seconds) for a fresh entry, else None."""
+        if not self.is_cacheable(command, intent):
+            return None
+        key = self._key(intent, command)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                RESULT_CACHE.inc(result="miss")
+                return None
+            stored_at, output = entry
+            age = time.time() - stored_at
+            if age > self.ttl_for(intent.intent_type):
+                del self._entries[key]
+                RESULT_CACHE.inc(result="expired")
+                return None
+            self._entries.move_to_end(key)
+            RESULT_CACHE.inc(result="hit")
+            return output, age
+
+    def put(self, command: str, intent: Intent, output: str):
+        if not self.is_cacheable(command, intent):
+            return
+        with self._lock:
+            key = self._key(intent, command)
+            self._entries[key] = (time.time(), output)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, intent_type: Optional[str] = None) -> int:
+        """Drops entries for one intent type (or everything). Returns how many were dropped."""
+        with self._lock:
+            if intent_type is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [k for k in self._entries if k[0] == intent_type.lower()]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache shared by every RunnerBridge (REPL, overlay, batch and API workers)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache.from_config()
+        return _default_cache
@@ -3,6 +3,7 @@ import tempfile
 import shutil
 from typing import Optional, Tuple
 from .schemas import Intent, RiskLevel
+from .security.command_parser import parse_command
 
 class SandboxManager:
     """
@@ -49,48 +50,50 @@ class SandboxManager:
         # We replace common paths with sandbox paths
         sandbox_desktop = os.path.join(self.sandbox_root, "Desktop")
         sandbox_downloads = os.path.join(self.sandbox_root, "Downloads")
-        
-        new_cmd = command
-        modifications = []
 
-        # 1. Replace $HOME variables if used in PowerShell
-        if "$HOME" in new_cmd:
-            # We can't easily replace $HOME env var in PS session without more complex logic,
-            # but we can replace string occurrences if the command uses them directly.
-            # A better approach for specific known paths:
-            pass
-
-        # 2. Redirect specific target paths from Intent
-        # If the intent targets Desktop or Downloads, we rewrite the command logic
-        # This is tricky with raw PowerShell strings. 
-        # Strategy: Prepend path variables to the command.
-        
-        # Simple string replacement for demonstration of concept
-        # In a real robust system, we'd parse the AST, but here we do string replacement
-        
+        # 1. Redirect path tokens
+        # The lexer gives us every path the command references (barewords and quoted strings),
+        # so we rewrite those tokens only. Text in comments or unrelated strings is left alone,
+        # and "Desktop" inside a longer name (e.g. DesktopBackup) no longer matches.
+        user_profile = os.environ.get('USERPROFILE', os.path.expanduser('~'))
         mappings = {
             "$HOME\\Desktop": sandbox_desktop,
             "$HOME/Desktop": sandbox_desktop,
-            os.path.join(os.environ['USERPROFILE'], 'Desktop'): sandbox_desktop,
-            # "Desktop": sandbox_desktop, # REMOVED: Causes recursive replacement issue
+            "~\\Desktop": sandbox_desktop,
+            os.path.join(user_profile, 'Desktop'): sandbox_desktop,
             
             "$HOME\\Downloads": sandbox_downloads,
             "$HOME/Downloads": sandbox_downloads,
-            os.path.join(os.environ['USERPROFILE'], 'Downloads'): sandbox_downloads,
-            # "Downloads": sandbox_downloads # REMOVED: Causes recursive replacement issue
+            "~\\Downloads": sandbox_downloads,
+            os.path.join(user_profile, 'Downloads'): sandbox_downloads,
         }
         
-        for original, replacement in mappings.items():
-            if original in new_cmd:
-                new_cmd = new_cmd.replace(original, replacement)
-                modifications.append(f"Redirected '{original}' -> Sandbox")
+        parsed = parse_command(command)
+        new_cmd = command
+        modifications = []
+
+        # Right to left, so earlier token offsets stay valid
+        for token in reversed(parsed.path_tokens):
+            for original, replacement in mappings.items():
+                rewritten = self._redirect_path(token.text, original, replacement)
+                if rewritten is not None:
+                    new_cmd = new_cmd[:token.start] + rewritten + new_cmd[token.end:]
+                    change = f"Redirected '{original}' -> Sandbox"
+                    if change not in modifications:
+                        modifications.append(change)
+                    break
 
-        # 3. Handle System Commands (High Risk)
+        # 2. Handle System Commands (High Risk)
+        # Commands in script blocks, subexpressions and strings (powershell -Command "...") are checked too.
+        # The plain substring match stays as a backstop for anything the lexer can't see (iex, aliases in strings).
         if intent.risk == RiskLevel.HIGH:
-            if "shutdown" in new_cmd or "Restart-Computer" in new_cmd or "Stop-Service" in new_cmd:
+            blocked = ("shutdown", "Restart-Computer", "Stop-Service")
+            lowered = command.lower()
+            if parsed.has_command(*blocked) or any(parse_command(s).has_command(*blocked) for s in parsed.strings) \
+                    or any(name.lower() in lowered for name in blocked):
                 return (f'Write-Host "[SANDBOX BLOCKED] Destructive command intercepted: {command}" -ForegroundColor Yellow', "Blocked High Risk Command")
 
-        # 4. Wrap in a try-catch block for reporting
+        # 3. Wrap in a try-catch block for reporting
         wrapped_cmd = f"""
         Write-Host "[SANDBOX MODE] Executing in: {self.sandbox_root}" -ForegroundColor Cyan
         try {{
@@ -103,3 +106,18 @@ class SandboxManager:
         
         return wrapped_cmd, ", ".join(modifications) if modifications else "Executed in Sandbox"
 
+    @staticmethod
+    def _redirect_path(token_text: str, original: str, replacement: str) -> Optional[str]:
+        """
+        Replaces `original` at the start of a path token (after an opening quote, if any).
+        Matches whole path components only and ignores case, like Windows paths.
+        """
+        quote = token_text[0] if token_text[:1] in ("'", '"') else ""
+        body = token_text[len(quote):]
+        if not body.lower().startswith(original.lower()):
+            return None
+        rest = body[len(original):]
+        if rest and rest[0] not in ("\\", "/", quote):
+            return None
+        return quote + replacement + rest
+
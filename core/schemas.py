@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
+from .security.scanner import scan_command
 
 class RiskLevel(str, Enum):
     LOW = "low"
@@ -36,31 +37,39 @@ class Intent(BaseModel):
     @field_validator('generated_command')
     def validate_command_safety(cls, v):
         if v:
-            import re
-            
-            # ALLOW Add-Type ONLY IF it is loading standard Windows Forms for UI interactions
-            # This is required for the Timer feature (MessageBox)
-            # We use a negative lookahead to ensure we are only blocking potentially malicious uses,
-            # or we explicitly allow the specific AssemblyName pattern used in our Timer.
-            
-            # Regex Explanation:
-            # Block Add-Type UNLESS it is followed by 'System.Windows.Forms', 'System.Drawing' or 'System.Speech'
-            if re.search(r"\bAdd-Type\b(?!\s+-AssemblyName\s+(?:System\.Windows\.Forms|System\.Drawing|System\.Speech))", v, re.IGNORECASE):
-                 raise ValueError("Security Alert: Dynamic code compilation detected (Add-Type blocked unless for UI/Audio).")
-
-            # Block other reflection methods
-            if re.search(r"\b(Reflection\.Assembly|Emit)\b", v, re.IGNORECASE):
-                raise ValueError("Security Alert: Reflection/Emit is prohibited.")
-                
-            # Block Invoke-Expression aliases
-            # ALLOW Invoke-Expression ONLY IF it is used safely inside a Start-Job scriptblock wrapper for background tasks
-            # This is required for the Timer feature which runs a scriptblock in a job
-            
-            if re.search(r"\b(iex|Invoke-Expression)\b", v, re.IGNORECASE):
-                # If it's part of the standard Start-Job wrapper we use in IntentResolver, allow it
-                # The pattern we use is: Start-Job -ScriptBlock { param($script); Invoke-Expression $script }
-                if "Start-Job" in v and "param($script); Invoke-Expression $script" in v:
-                    pass # Allow this specific safe pattern
-                else:
-                    raise ValueError("Security Alert: Invoke-Expression is prohibited.")
+            # Add-Type (unless loading UI/Audio assemblies), Reflection/Emit and Invoke-Expression
+            # are matched by the shared SecurityScanner (core/security/scanner.py)
+            for finding in scan_command(v, "schema"):
+                if finding.rule_id == "invoke_expression":
+                    # ALLOW Invoke-Expression ONLY IF it is used safely inside a Start-Job scriptblock wrapper for background tasks
+                    # This is required for the Timer feature which runs a scriptblock in a job
+                    # The pattern we use is: Start-Job -ScriptBlock { param($script); Invoke-Expression $script }
+                    if "Start-Job" in v and "param($script); Invoke-Expression $script" in v:
+                        continue # Allow this specific safe pattern
+                raise ValueError(finding.reason)
         return v
+
+    @classmethod
+    def from_trusted(cls, fields: dict) -> "Intent":
+        """
+        Builds an Intent WITHOUT validation, for data that already passed validation when it
+        was written (signed intent cache entries). Never use it for Kernel or user input.
+        Same result as model_construct, minus its per-call default_factory introspection.
+        """
+        values = dict(_INTENT_DEFAULTS)
+        values.update(fields)
+        # Lists are copied so instances never share them with fields (or each other)
+        values["filters"] = list(values["filters"] or ())
+        values["needs_external_tool"] = list(values["needs_external_tool"] or ())
+        intent = cls.__new__(cls)
+        object.__setattr__(intent, "__dict__", values)
+        object.__setattr__(intent, "__pydantic_fields_set__", set(fields))
+        object.__setattr__(intent, "__pydantic_extra__", None)
+        object.__setattr__(intent, "__pydantic_private__", None)
+        return intent
+
+# Field defaults for Intent.from_trusted (mutable ones are recreated per instance)
+_INTENT_DEFAULTS = {
+    name: None if field.default_factory else field.default
+    for name, field in Intent.model_fields.items()
+}
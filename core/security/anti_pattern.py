@@ -1,25 +1,14 @@
-import re
-from typing import List, Tuple
-from ..schemas import Intent, RiskAssessment, RiskLevel
+from typing import List, Union
+from .command_parser import ParsedCommand, parse_command
+from .scanner import ANTI_PATTERN_RULES
 
 class AntiPatternDetector:
     """
     Detects suspicious patterns that might indicate an attempt to bypass security or abuse the system.
     """
     
-    OBFUSCATION_PATTERNS = [
-        (r'\^', "Caret Obfuscation (cmd.exe style)"),
-        (r'%.+%', "Variable Expansion Obfuscation"),
-        (r'\$env:\w+', "Environment Variable Access"),
-        (r'\[char\]', "Char Casting Obfuscation"),
-        (r'base64', "Base64 Encoding"),
-        (r'-enc\s+', "Encoded Command Execution"),
-        (r'invoke-expression', "Invoke-Expression (IEX) Usage"),
-        (r'iex\s+', "IEX Alias Usage"),
-        (r'downloadstring', "Web Download Attempt"),
-        (r'hidden', "Hidden Window Attempt"),
-        (r'bypass', "Execution Policy Bypass Attempt")
-    ]
+    # Compiled into the shared SecurityScanner (core/security/scanner.py)
+    OBFUSCATION_PATTERNS = [(rule.pattern, rule.reason) for rule in ANTI_PATTERN_RULES]
 
     CHAINING_PATTERNS = [
         (r';', "Command Chaining (Semicolon)"),
@@ -28,26 +17,28 @@ class AntiPatternDetector:
     ]
 
     @staticmethod
-    def scan(command: str) -> List[str]:
+    def scan(command: Union[str, ParsedCommand]) -> List[str]:
         """
         Scans a command string for known anti-patterns.
         Returns a list of detected suspicious reasons.
         """
-        if not command:
+        parsed = parse_command(command)
+        if not parsed.source:
             return []
             
         detections = []
-        cmd_lower = command.lower()
         
         # 1. Check Obfuscation
-        for pattern, reason in AntiPatternDetector.OBFUSCATION_PATTERNS:
-            if re.search(pattern, cmd_lower):
-                detections.append(f"Suspicious Pattern Detected: {reason}")
+        for finding in parsed.findings:
+            if finding.source != "anti_pattern":
+                continue
+            detections.append(f"Suspicious Pattern Detected: {finding.reason}")
                 
         # 2. Check Chaining Abuse (Excessive chaining)
-        # Simple chaining is allowed, but excessive is suspicious
-        semicolon_count = cmd_lower.count(';')
-        pipe_count = cmd_lower.count('|')
+        # Simple chaining is allowed, but excessive is suspicious.
+        # Only real operators count; ';' and '|' inside strings or comments are not chaining.
+        semicolon_count = parsed.operator_count(';')
+        pipe_count = parsed.operator_count('|')
         
         if semicolon_count > 2:
             detections.append(f"Excessive Chaining Detected ({semicolon_count} commands)")
@@ -57,7 +48,7 @@ class AntiPatternDetector:
             
         # 3. Length Heuristic
         # Very long commands are often malicious payloads
-        if len(command) > 1000:
+        if len(parsed.source) > 1000:
             detections.append("Command Length Exceeds Safety Threshold (>1000 chars)")
             
         return detections
@@ -0,0 +1,367 @@
+import re
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+from .scanner import Finding, scan_command
+
+class Token(NamedTuple):
+    kind: str   # "word", "string", "variable", "operator", "group", "comment" or "newline"
+    text: str   # Exact source text (quotes included)
+    value: str  # Unquoted value for strings, bare name for variables, text otherwise
+    start: int
+    end: int
+
+# Longest first, so '>>' wins over '>' and '2>&1' over '2>'
+_OPERATORS = ("2>&1", "*>&1", "&&", "||", ">>", "2>>", "*>>", "2>", "*>", ";", "|", "&", ">", "<", ",")
+_OPERATOR_RE = re.compile("|".join(re.escape(op) for op in sorted(_OPERATORS, key=len, reverse=True)))
+_GROUP_OPEN = ("$(", "@(", "@{", "(", "{")
+_GROUP_CLOSE = (")", "}")
+_WORD_STOP = set(" \t\r\n;|&(){},<>") # '>' and '<' end a word (redirection)
+
+# $env:TEMP, $script:x, $_, $?, $$, $^, $args
+_VARIABLE_RE = re.compile(r"\$(?:\{(?P<braced>[^}]*)\}|(?P<name>(?:[A-Za-z_][\w]*:)?[\w]+|[_?$^]))")
+_DRIVE_RE = re.compile(r"^[A-Za-z]:(?:[\\/]|$)")
+_PATH_VARIABLE_RE = re.compile(r"^\$(?:\{[^}]*\}|[\w:]+)[\\/]")
+# Tokens after which the next word is in command position
+_COMMAND_START = {";", "|", "&&", "||", "\n", "(", "{", "$(", "@("}
+
+class ParsedCommand:
+    """
+    Lexed form of a PowerShell command, shared by every analyzer (anti-patterns,
+    risk classification, suspension context, sandbox rewriting).
+    Instances are cached per command text and must be treated as read-only.
+    """
+    def __init__(self, source: str, tokens: List[Token]):
+        self.source = source
+        self.tokens = tuple(tokens)
+        self.strings = tuple(t.value for t in self.tokens if t.kind == "string")
+        self.variables = tuple(_collect_variables(self.tokens))
+        self.statements = tuple(_split_statements(self.tokens))
+        self.pipelines = tuple(segment for statement in self.statements for segment in statement)
+        self.commands = tuple(name for name in (_command_name(s) for s in self.pipelines) if name)
+        # Every command position, including script blocks, subexpressions and if/foreach bodies
+        self.invoked_commands = tuple(_invoked_commands(self.tokens))
+        self.path_tokens = tuple(t for t in self.tokens if t.kind in ("word", "string") and looks_like_path(t.value))
+        self.paths = tuple(t.value for t in self.path_tokens)
+
+    def operator_count(self, operator: str) -> int:
+        """Counts real operators only; text inside strings and comments never counts."""
+        return sum(1 for t in self.tokens if t.kind == "operator" and t.value == operator)
+
+    def has_command(self, *names: str) -> bool:
+        """True if any of the commands runs anywhere in the command, nested blocks included."""
+        wanted = {n.lower() for n in names}
+        return any(c in wanted for c in self.invoked_commands)
+
+    @property
+    def findings(self) -> List[Finding]:
+        """Security scanner findings for the raw command (memoised by the scanner)."""
+        return scan_command(self.source)
+
+    def __repr__(self):
+        return f"ParsedCommand({self.source!r}, tokens={len(self.tokens)}, statements={len(self.statements)})"
+
+def looks_like_path(value: str) -> bool:
+    """
+    Heuristic for filesystem references: drive paths, UNC, relative (./ ..\\),
+    home (~) and variable-rooted paths ($HOME\\Desktop). URLs and parameters are not paths.
+    """
+    if not value or value.startswith("-") or "://" in value:
+        return False
+    if _DRIVE_RE.match(value) or value.startswith(("\\\\", "~", ".\\", "./", "..\\", "../")):
+        return True
+    if _PATH_VARIABLE_RE.match(value):
+        return True
+    return "\\" in value or "/" in value
+
+def is_absolute_path(value: str) -> bool:
+    """True for paths that do not depend on the current directory."""
+    return bool(_DRIVE_RE.match(value)) or value.startswith(("\\", "/", "~", "$"))
+
+def _read_quoted(text: str, i: int) -> Tuple[int, str]:
+    """Reads a '...' or "..." string starting at i. Returns (end, value)."""
+    quote = text[i]
+    j = i + 1
+    value = []
+    while j < len(text):
+        ch = text[j]
+        if quote == '"' and ch == "`" and j + 1 < len(text):
+            value.append(text[j + 1])
+            j += 2
+            continue
+        if ch == quote:
+            if j + 1 < len(text) and text[j + 1] == quote: # '' or "" escape
+                value.append(quote)
+                j += 2
+                continue
+            return j + 1, "".join(value)
+        value.append(ch)
+        j += 1
+    return j, "".join(value) # Unterminated: runs to the end
+
+def _read_here_string(text: str, i: int) -> Tuple[int, str]:
+    """Reads @"...\"@ / @'...'@. The terminator must start a line."""
+    quote = text[i + 1]
+    body_start = text.find("\n", i) + 1
+    terminator = re.compile(r"\n[ \t]*" + re.escape(quote) + "@")
+    match = terminator.search(text, body_start - 1)
+    if not match:
+        return len(text), text[body_start:]
+    return match.end(), text[body_start:match.start()].rstrip("\r")
+
+def _read_word(text: str, i: int) -> int:
+    """Reads a bareword (argument-mode token). Quotes inside it are part of the same token."""
+    j = i
+    while j < len(text):
+        ch = text[j]
+        if ch == "`" and j + 1 < len(text):
+            j += 2
+            continue
+        if ch in ("'", '"') and j > i:
+            j, _ = _read_quoted(text, j)
+            continue
+        if ch == "$" and text.startswith("${", j):
+            close = text.find("}", j)
+            j = len(text) if close == -1 else close + 1
+            continue
+        if ch == "$" and text.startswith("$(", j):
+            break
+        if ch in _WORD_STOP:
+            break
+        j += 1
+    return j
+
+def tokenize(text: str) -> List[Token]:
+    tokens = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+
+        if ch in " \t\r":
+            i += 1
+            continue
+
+        if ch == "\n":
+            tokens.append(Token("newline", ch, ch, i, i + 1))
+            i += 1
+            continue
+
+        # Comments: <# block #> and # line
+        if text.startswith("<#", i):
+            end = text.find("#>", i + 2)
+            end = n if end == -1 else end + 2
+            tokens.append(Token("comment", text[i:end], text[i:end], i, end))
+            i = end
+            continue
+        if ch == "#":
+            end = text.find("\n", i)
+            end = n if end == -1 else end
+            tokens.append(Token("comment", text[i:end], text[i:end], i, end))
+            i = end
+            continue
+
+        # Here-strings
+        if ch == "@" and text[i + 1:i + 2] in ("'", '"') and text[i + 2:].lstrip(" \t\r").startswith("\n"):
+            end, value = _read_here_string(text, i)
+            tokens.append(Token("string", text[i:end], value, i, end))
+            i = end
+            continue
+
+        # Quoted strings
+        if ch in ("'", '"'):
+            end, value = _read_quoted(text, i)
+            tokens.append(Token("string", text[i:end], value, i, end))
+            i = end
+            continue
+
+        # Grouping
+        group = next((g for g in _GROUP_OPEN if text.startswith(g, i)), None) or (ch if ch in _GROUP_CLOSE else None)
+        if group:
+            tokens.append(Token("group", group, group, i, i + len(group)))
+            i += len(group)
+            continue
+
+        # Operators (incl. redirection like 2>&1). A digit only starts an operator when it is a stream redirect.
+        match = _OPERATOR_RE.match(text, i)
+        if match and (not ch.isdigit() or match.group().startswith(ch + ">")):
+            op = match.group()
+            tokens.append(Token("operator", op, op, i, match.end()))
+            i = match.end()
+            continue
+
+        # Variables and barewords
+        end = _read_word(text, i)
+        if end == i:
+            end = i + 1
+        word = text[i:end]
+        var = _VARIABLE_RE.match(word)
+        if var and var.end() == len(word):
+            tokens.append(Token("variable", word, var.group("braced") if var.group("braced") is not None else var.group("name"), i, end))
+        else:
+            tokens.append(Token("word", word, _unquote_word(word), i, end))
+        i = end
+    return tokens
+
+def _unquote_word(word: str) -> str:
+    if "'" not in word and '"' not in word and "`" not in word:
+        return word
+    value = []
+    j = 0
+    while j < len(word):
+        ch = word[j]
+        if ch == "`" and j + 1 < len(word):
+            value.append(word[j + 1])
+            j += 2
+        elif ch in ("'", '"'):
+            j, part = _read_quoted(word, j)
+            value.append(part)
+        else:
+            value.append(ch)
+            j += 1
+    return "".join(value)
+
+def _collect_variables(tokens) -> List[str]:
+    names = []
+    for token in tokens:
+        if token.kind == "variable":
+            names.append(token.value)
+        elif token.kind == "word" or (token.kind == "string" and not token.text.startswith(("'", "@'"))):
+            # Barewords and expandable strings can embed variables ("$HOME\Desktop")
+            for match in _VARIABLE_RE.finditer(token.text):
+                names.append(match.group("braced") if match.group("braced") is not None else match.group("name"))
+    return names
+
+def _split_statements(tokens) -> List[Tuple[Tuple[Token, ...], ...]]:
+    """
+    Splits top-level tokens into statements (';', newline, '&&', '||') and each statement
+    into pipeline segments ('|'). Script block bodies stay inside their segment.
+    """
+    statements = []
+    segments = []
+    current = []
+    depth = 0
+
+    def close_segment():
+        if current:
+            segments.append(tuple(current))
+            current.clear()
+
+    def close_statement():
+        close_segment()
+        if segments:
+            statements.append(tuple(segments))
+            segments.clear()
+
+    for token in tokens:
+        if token.kind == "comment":
+            continue
+        if token.kind == "group":
+            depth += 1 if token.value in _GROUP_OPEN else -1
+            depth = max(depth, 0)
+        elif depth == 0 and (token.kind == "newline" or (token.kind == "operator" and token.value in (";", "&&", "||"))):
+            close_statement()
+            continue
+        elif depth == 0 and token.kind == "operator" and token.value == "|":
+            close_segment()
+            continue
+        if token.kind != "newline":
+            current.append(token)
+    close_statement()
+    return statements
+
+def _program_name(token: Token, invoked: bool) -> str:
+    name = re.split(r"[\\/]", token.value)[-1].lower() if invoked else token.value.lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+def _command_name(segment) -> Optional[str]:
+    invoked = False
+    for token in segment:
+        if token.kind == "operator" and token.value == "&":
+            invoked = True # Call operator: & "C:\Tools\x.exe"
+            continue
+        if token.kind == "word" or (invoked and token.kind == "string"):
+            if token.value == ".":
+                continue # Dot-sourcing
+            return _program_name(token, invoked)
+        return None
+    return None
+
+class CommandStep(NamedTuple):
+    index: int             # Position in the token list that was walked
+    token: Token
+    command_position: bool # The token starts a command (if it names one)
+    invoked: bool          # Follows the & call operator
+    in_hashtable: bool     # Directly inside @{ }, where ';' and newlines separate keys, not statements
+
+def walk_command_positions(tokens) -> Iterator[CommandStep]:
+    """
+    Walks the token stream tracking command position: the start of each statement and
+    pipeline segment, and the start of every group ({ }, $( ), ( )) at any depth.
+    Inside a @{ } hashtable, ';' and newlines only separate entries; the value after
+    'key=' is in command position instead (@{a = Get-Date}). A bareword value glued to
+    its key (Key=Get-Date) is yielded as its own token.
+    """
+    groups = []
+    command_position = True
+    invoked = False
+    for i, token in enumerate(tokens):
+        if token.kind == "comment":
+            continue
+        in_hashtable = bool(groups) and groups[-1] == "@{"
+        yield CommandStep(i, token, command_position, invoked, in_hashtable)
+
+        if token.kind == "operator":
+            invoked = token.value == "&"
+            command_position = invoked or (token.value in _COMMAND_START and not in_hashtable)
+            continue
+        if token.kind == "group":
+            if token.value in _GROUP_OPEN:
+                groups.append(token.value)
+            elif groups:
+                groups.pop()
+            invoked = False
+            command_position = token.value in _COMMAND_START
+            continue
+        if token.kind == "newline":
+            invoked = False
+            command_position = not in_hashtable
+            continue
+        if command_position and token.kind == "word" and token.value == ".":
+            continue # Dot-sourcing: the script comes next
+        invoked = False
+        command_position = False
+        if in_hashtable and token.kind == "word" and "=" in token.text:
+            key, _, value = token.text.partition("=")
+            if not value:
+                command_position = True # Key= / = : the value follows
+            elif not value.startswith(("'", '"', "$", "[", "-", "@")) and not value[:1].isdigit():
+                start = token.start + len(key) + 1
+                yield CommandStep(i, Token("word", value, _unquote_word(value), start, token.end), True, False, True)
+
+def _invoked_commands(tokens) -> List[str]:
+    """
+    Names in command position anywhere in the token stream (see walk_command_positions).
+    Keywords such as if/foreach show up as names too; their bodies are groups, so the
+    commands inside are found as well.
+    """
+    names = []
+    for step in walk_command_positions(tokens):
+        token = step.token
+        if not step.command_position or token.value == ".":
+            continue
+        if token.kind == "word" or (step.invoked and token.kind == "string"):
+            if step.invoked or not token.value.startswith(("$", "[", "-")):
+                names.append(_program_name(token, step.invoked))
+    return names
+
+@lru_cache(maxsize=256)
+def _parse_cached(command: str) -> ParsedCommand:
+    return ParsedCommand(command, tokenize(command))
+
+def parse_command(command: Union[str, ParsedCommand, None]) -> ParsedCommand:
+    """
+    Returns the cached ParsedCommand for a command string (already parsed commands pass through).
+    """
+    if isinstance(command, ParsedCommand):
+        return command
+    return _parse_cached(command or "")
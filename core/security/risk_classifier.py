@@ -1,5 +1,6 @@
-import re
-from typing import Tuple
+from typing import Tuple, Union
+from .command_parser import ParsedCommand, parse_command
+from .scanner import RISK_CRITICAL_RULES, RISK_ROUTINE_RULES
 
 class RiskClassifier:
     """
@@ -8,35 +9,26 @@ class RiskClassifier:
     Critical: Dangerous operations (system drives, format, deep recursive deletes).
     """
     
-    ROUTINE_PATTERNS = [
-        r'temp', r'tmp', r'cache', r'logs?', r'history',
-        r'download', r'recycle\.bin', r'\.log$', r'\.tmp$', r'\.bak$'
-    ]
-    
-    CRITICAL_PATTERNS = [
-        r'[c-z]:\\windows', r'[c-z]:\\program files', r'[c-z]:\\users\\[^\\]+$',
-        r'system32', r'format', r'diskpart', r'vssadmin',
-        r'del\s+/s\s+/q\s+[c-z]:\\', r'rm\s+-rf\s+/'
-    ]
+    # Compiled into the shared SecurityScanner (core/security/scanner.py)
+    ROUTINE_PATTERNS = [rule.pattern for rule in RISK_ROUTINE_RULES]
+    CRITICAL_PATTERNS = [rule.pattern for rule in RISK_CRITICAL_RULES]
 
     @staticmethod
-    def classify_destructive(command: str) -> Tuple[str, float]:
+    def classify_destructive(command: Union[str, ParsedCommand]) -> Tuple[str, float]:
         """
         Returns (Classification, RiskWeight).
         Routine = 0.5
         Critical = 2.0
         Default = 1.0
         """
-        cmd_lower = command.lower()
+        sources = {finding.source for finding in parse_command(command).findings}
         
         # Check Critical First
-        for pattern in RiskClassifier.CRITICAL_PATTERNS:
-            if re.search(pattern, cmd_lower):
-                return "Critical Destructive", 2.0
+        if "risk_critical" in sources:
+            return "Critical Destructive", 2.0
                 
         # Check Routine
-        for pattern in RiskClassifier.ROUTINE_PATTERNS:
-            if re.search(pattern, cmd_lower):
-                return "Routine Destructive", 0.5
+        if "risk_routine" in sources:
+            return "Routine Destructive", 0.5
                 
         return "Destructive", 1.0
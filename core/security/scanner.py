@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple
+
+class Rule(NamedTuple):
+    source: str         # "anti_pattern", "risk_critical", "risk_routine" or "schema"
+    rule_id: str
+    pattern: str        # Matched case-insensitively
+    reason: str
+    triggers: Tuple[str, ...]  # Lowercase literals; the pattern can only match if one of them occurs
+
+class Finding(NamedTuple):
+    source: str
+    rule_id: str
+    reason: str
+
+# --- Rule Tables ---
+# AntiPatternDetector, RiskClassifier and Intent.validate_command_safety all read their rules from here.
+
+ANTI_PATTERN_RULES = [
+    Rule("anti_pattern", "caret", r'\^', "Caret Obfuscation (cmd.exe style)", ("^",)),
+    Rule("anti_pattern", "percent_expansion", r'%.+%', "Variable Expansion Obfuscation", ("%",)),
+    Rule("anti_pattern", "env_access", r'\$env:\w+', "Environment Variable Access", ("$env:",)),
+    Rule("anti_pattern", "char_cast", r'\[char\]', "Char Casting Obfuscation", ("[char]",)),
+    Rule("anti_pattern", "base64", r'base64', "Base64 Encoding", ("base64",)),
+    Rule("anti_pattern", "encoded_command", r'-enc\s+', "Encoded Command Execution", ("-enc",)),
+    Rule("anti_pattern", "invoke_expression", r'invoke-expression', "Invoke-Expression (IEX) Usage", ("invoke-expression",)),
+    Rule("anti_pattern", "iex_alias", r'iex\s+', "IEX Alias Usage", ("iex",)),
+    Rule("anti_pattern", "download_string", r'downloadstring', "Web Download Attempt", ("downloadstring",)),
+    Rule("anti_pattern", "hidden_window", r'hidden', "Hidden Window Attempt", ("hidden",)),
+    Rule("anti_pattern", "policy_bypass", r'bypass', "Execution Policy Bypass Attempt", ("bypass",)),
+]
+
+RISK_CRITICAL_RULES = [
+    Rule("risk_critical", "windows_dir", r'[c-z]:\\windows', "Critical Destructive", (":\\windows",)),
+    Rule("risk_critical", "program_files", r'[c-z]:\\program files', "Critical Destructive", (":\\program files",)),
+    Rule("risk_critical", "user_root", r'[c-z]:\\users\\[^\\]+$', "Critical Destructive", (":\\users\\",)),
+    Rule("risk_critical", "system32", r'system32', "Critical Destructive", ("system32",)),
+    Rule("risk_critical", "format", r'format', "Critical Destructive", ("format",)),
+    Rule("risk_critical", "diskpart", r'diskpart', "Critical Destructive", ("diskpart",)),
+    Rule("risk_critical", "vssadmin", r'vssadmin', "Critical Destructive", ("vssadmin",)),
+    Rule("risk_critical", "del_drive", r'del\s+/s\s+/q\s+[c-z]:\\', "Critical Destructive", ("del",)),
+    Rule("risk_critical", "rm_root", r'rm\s+-rf\s+/', "Critical Destructive", ("-rf",)),
+]
+
+RISK_ROUTINE_RULES = [
+    Rule("risk_routine", "temp", r'temp', "Routine Destructive", ("temp",)),
+    Rule("risk_routine", "tmp", r'tmp', "Routine Destructive", ("tmp",)),
+    Rule("risk_routine", "cache", r'cache', "Routine Destructive", ("cache",)),
+    Rule("risk_routine", "logs", r'logs?', "Routine Destructive", ("log",)),
+    Rule("risk_routine", "history", r'history', "Routine Destructive", ("history",)),
+    Rule("risk_routine", "download", r'download', "Routine Destructive", ("download",)),
+    Rule("risk_routine", "recycle_bin", r'recycle\.bin', "Routine Destructive", ("recycle.bin",)),
+    Rule("risk_routine", "log_file", r'\.log$', "Routine Destructive", (".log",)),
+    Rule("risk_routine", "tmp_file", r'\.tmp$', "Routine Destructive", (".tmp",)),
+    Rule("risk_routine", "bak_file", r'\.bak$', "Routine Destructive", (".bak",)),
+]
+
+SCHEMA_RULES = [
+    # Block Add-Type UNLESS it is followed by 'System.Windows.Forms', 'System.Drawing' or 'System.Speech'
+    # (required for the Timer feature's MessageBox and audio)
+    Rule("schema", "add_type",
+         r"\bAdd-Type\b(?!\s+-AssemblyName\s+(?:System\.Windows\.Forms|System\.Drawing|System\.Speech))",
+         "Security Alert: Dynamic code compilation detected (Add-Type blocked unless for UI/Audio).", ("add-type",)),
+    Rule("schema", "reflection", r"\b(Reflection\.Assembly|Emit)\b",
+         "Security Alert: Reflection/Emit is prohibited.", ("reflection.assembly", "emit")),
+    Rule("schema", "invoke_expression", r"\b(iex|Invoke-Expression)\b",
+         "Security Alert: Invoke-Expression is prohibited.", ("iex", "invoke-expression")),
+]
+
+DEFAULT_RULES = ANTI_PATTERN_RULES + RISK_CRITICAL_RULES + RISK_ROUTINE_RULES + SCHEMA_RULES
+
+class SecurityScanner:
+    """
+    Single scanning engine for every Python-side security rule.
+
+    The command is lowercased once. A literal prefilter (plain substring search,
+    which stops at the first occurrence) decides which rules can possibly match,
+    and only those run their precompiled regex.
+    """
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self._compiled = [re.compile(rule.pattern, re.IGNORECASE) for rule in self.rules]
+
+        self._rules_by_trigger = {}
+        self._always = [] # Rules without a usable literal are always verified
+        for index, rule in enumerate(self.rules):
+            if not rule.triggers:
+                self._always.append(index)
+            for trigger in rule.triggers:
+                self._rules_by_trigger.setdefault(trigger, []).append(index)
+
+    def scan(self, command: str) -> List[Finding]:
+        """
+        Returns every matching rule as a Finding, in rule-table order.
+        """
+        if not command:
+            return []
+
+        text = command.lower()
+        candidates = set(self._always)
+        for trigger, indexes in self._rules_by_trigger.items():
+            if trigger in text:
+                candidates.update(indexes)
+
+        findings = []
+        for index in sorted(candidates):
+            if self._compiled[index].search(text):
+                rule = self.rules[index]
+                findings.append(Finding(rule.source, rule.rule_id, rule.reason))
+        return findings
+
+default_scanner = SecurityScanner(DEFAULT_RULES)
+
+@lru_cache(maxsize=256)
+def _scan_cached(command: str) -> Tuple[Finding, ...]:
+    return tuple(default_scanner.scan(command))
+
+def scan_command(command: str, source: str = None) -> List[Finding]:
+    """
+    Scans with the default rule set. Results are memoised per command, so the
+    validator, AntiPatternDetector and RiskClassifier share one pass per command.
+    """
+    findings = _scan_cached(command or "")
+    if source:
+        return [f for f in findings if f.source == source]
+    return list(findings)
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+from typing import Any, List, Optional, Tuple
+from ..schemas import RiskAssessment, RiskLevel
+
+RULES_FILE = os.path.join("engine", "kernel", "sentinel_rules.json")
+
+class SentinelRuleEngine:
+    """
+    Python port of Get-RiskScore / Measure-Risk (engine/kernel/Sentinel.psm1).
+    Both evaluate the same declarative rule file, so they must produce the same score and reasons.
+    """
+
+    def __init__(self, rules: dict):
+        self.rules = rules
+        self.version = rules.get("version", 0)
+        self.thresholds = rules["thresholds"]
+
+        # PowerShell -match is case-insensitive
+        self._heuristics = [
+            ([re.compile(p, re.IGNORECASE) for p in rule["patterns"]], rule["score"], rule["reason"])
+            for rule in rules.get("heuristics", [])
+        ]
+        self._sensitive_paths = rules.get("sensitive_paths", [])
+        self._destructive = rules["destructive"]
+        self._destructive_patterns = [
+            (kw, re.compile(rf"\b{re.escape(kw)}\b", re.IGNORECASE))
+            for kw in self._destructive["keywords"]
+        ]
+        self._mitigation = rules["safe_extensions"]
+        self._safe_extensions = {ext.lower() for ext in self._mitigation["extensions"]}
+        self._ai_override = rules["ai_override"]
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SentinelRuleEngine":
+        path = path or os.path.join(os.getcwd(), RULES_FILE)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _field(intent: Any, name: str, default=None):
+        # Accepts both Intent models and plain dicts (Kernel JSON)
+        if isinstance(intent, dict):
+            value = intent.get(name, default)
+        else:
+            value = getattr(intent, name, default)
+        return value.value if hasattr(value, "value") else value
+
+    def score(self, command: str, intent: Any) -> Tuple[int, List[str]]:
+        """
+        Equivalent of Get-RiskScore. Returns (score, reasons).
+        """
+        command = command or ""
+        score = 0
+        reasons = []
+
+        # --- 1. System Integrity & Malware Heuristics ---
+        for patterns, rule_score, reason in self._heuristics:
+            if any(p.search(command) for p in patterns):
+                score += rule_score
+                reasons.append(reason)
+
+        # --- 2. Path Sensitivity Analysis ---
+        target = self._field(intent, "target")
+        if isinstance(target, str) and target.strip():
+            target_lower = target.lower()
+            for rule in self._sensitive_paths:
+                path_lower = rule["path"].lower()
+                hit = target_lower == path_lower
+                if not hit and rule.get("match") == "tree":
+                    hit = target_lower.startswith(path_lower + "\\")
+                if hit:
+                    score += rule["score"]
+                    reasons.append(rule["reason"].replace("{target}", target))
+
+        # --- 3. Destructive Command Analysis ---
+        filters = self._field(intent, "filters") or []
+        for keyword, pattern in self._destructive_patterns:
+            if pattern.search(command):
+                score += self._destructive["score"]
+                reasons.append(self._destructive["reason"].replace("{keyword}", keyword))
+
+                if self._field(intent, "recursive"):
+                    score += self._destructive["recursive_score"]
+                    reasons.append(self._destructive["recursive_reason"])
+
+                if (isinstance(target, str) and "*" in target) or not filters:
+                    score += self._destructive["bulk_score"]
+                    reasons.append(self._destructive["bulk_reason"])
+                break # Count once
+
+        # --- 4. Intent Specifics ---
+        intent_type = self._field(intent, "intent_type")
+        if isinstance(intent_type, str) and intent_type.lower() == self._mitigation["intent_type"] and filters:
+            if all(str(f).lower() in self._safe_extensions for f in filters):
+                score += self._mitigation["score"]
+                reasons.append(self._mitigation["reason"])
+
+        return score, reasons
+
+    def measure(self, intent: Any, command: str) -> RiskAssessment:
+        """
+        Equivalent of Measure-Risk.
+        """
+        score, reasons = self.score(command, intent)
+
+        level = RiskLevel.LOW
+        if score >= self.thresholds["high"]:
+            level = RiskLevel.HIGH
+        elif score >= self.thresholds["medium"]:
+            level = RiskLevel.MEDIUM
+
+        # AI Override (Conservative)
+        risk = self._field(intent, "risk")
+        if isinstance(risk, str) and risk.lower() == self._ai_override["risk"] and level != RiskLevel.HIGH:
+            level = RiskLevel.HIGH
+            reasons.append(self._ai_override["reason"])
+
+        return RiskAssessment(level=level, reasons=reasons, score=score)
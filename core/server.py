@@ -0,0 +1,465 @@
+"""
+Local JSON API for ExecutionManager.
+
+Keeps a pool of warm ExecutionManagers (one Kernel session each) behind a bounded
+request queue, so scripted callers skip the cold start of the REPL and the overlay.
+
+Endpoints:
+    POST /process   {"input": "...", "bypass_cache": false}  -> intent, command, risk, timings
+    POST /assess    {"intent": {...}, "command": "..."}       -> risk
+    POST /dry-run   {"input": "..."}                          -> what would run, nothing is executed
+    POST /execute   {"input": "...", "confirmed": true}       -> executes (HIGH risk also needs "allow_high_risk": true)
+    GET  /metrics                                             -> request counters, latency percentiles, pool state, registry
+    GET  /metrics?format=prometheus                           -> core.metrics registry as Prometheus text
+    GET  /health
+
+Usage:
+    python main.py serve --port 8765
+    python main.py serve --socket /tmp/intentshell.sock
+
+The server only binds to loopback or a Unix socket (created with mode 0600), and every
+request needs "Authorization: Bearer <token>". The token comes from INTENTSHELL_API_TOKEN,
+otherwise a new one is generated at startup and written to cache/api_token (mode 0600).
+POST bodies must be sent as application/json. Requests carrying an Origin header, or a Host
+header that doesn't name a loopback address, are refused, so web pages (including DNS
+rebinding) can't reach the API from the user's browser.
+"""
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+from .batch import percentile
+from .metrics import REGISTRY, counter, histogram
+from .schemas import Intent, RiskLevel
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+TOKEN_FILE = os.path.join("cache", "api_token")
+
+API_REQUESTS = counter("intentshell_api_requests_total", "API requests by endpoint and outcome")
+API_LATENCY = histogram("intentshell_api_request_seconds", "API request latency by endpoint")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def write_token_file(token: str, path: str = TOKEN_FILE):
+    """Writes the API token readable by the current user only (clients read it from there)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.chmod(path, 0o600) # O_CREAT's mode doesn't apply to an existing file
+
+
+def _host_name(header: str) -> str:
+    """Host header without the port: '127.0.0.1:8765' -> '127.0.0.1', '[::1]:8765' -> '::1'."""
+    host = header.strip().lower()
+    if host.startswith("["):
+        return host[1:host.find("]")] if "]" in host else host
+    return host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+
+
+class ServerMetrics:
+    """Request counters and a sliding window of latencies per endpoint."""
+    def __init__(self, window: int = 1000):
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.rejected = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self._latencies = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self._latencies.setdefault(endpoint, deque(maxlen=self._window)).append(seconds * 1000)
+        API_REQUESTS.inc(endpoint=endpoint, outcome="ok" if ok else "error")
+        API_LATENCY.observe(seconds, endpoint=endpoint)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_cache(self, hit: bool):
+        with self._lock:
+            self.cache_lookups += 1
+            self.cache_hits += 1 if hit else 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latency = {
+                endpoint: {
+                    "p50": percentile(list(values), 50),
+                    "p90": percentile(list(values), 90),
+                    "p99": percentile(list(values), 99),
+                }
+                for endpoint, values in self._latencies.items()
+            }
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "rejected": self.rejected,
+                "latency_ms": latency,
+                "cache_hit_rate": round(self.cache_hits / self.cache_lookups, 3) if self.cache_lookups else 0.0,
+            }
+
+
+class ManagerPool:
+    """
+    Fixed pool of warm ExecutionManagers plus a bounded wait queue.
+    acquire() fails fast (-> 503) when every worker is busy and the queue is full.
+    """
+    def __init__(self, workers: int = 2, queue_size: int = 16,
+                 manager_factory: Optional[Callable[[dict], object]] = None, acquire_timeout: float = 30.0):
+        from .bridge_nlu import NLUBridge
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.acquire_timeout = acquire_timeout
+        self.shared_cache = NLUBridge(session=None).cache
+        factory = manager_factory or self._default_manager
+        self._idle = queue.Queue()
+        self._managers = [factory(self.shared_cache) for _ in range(self.workers)]
+        # One suspension budget for the whole server, so risky requests can't be spread across workers
+        suspension = self._managers[0].sentinel.suspension_system
+        for manager in self._managers:
+            manager.sentinel.suspension_system = suspension
+            self._idle.put(manager)
+        # Slots = requests being served + requests allowed to wait
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_manager(shared_cache: dict):
+        from .execution import ExecutionManager
+        return ExecutionManager.create_worker(shared_cache)
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise ApiError(503, "Server busy: request queue is full")
+        try:
+            manager = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            self._slots.release()
+            raise ApiError(503, "Server busy: timed out waiting for a worker")
+        with self._lock:
+            self._in_flight += 1
+        return manager
+
+    def release(self, manager):
+        with self._lock:
+            self._in_flight -= 1
+        self._idle.put(manager)
+        self._slots.release()
+
+    def state(self) -> dict:
+        with self._lock:
+            busy = self._in_flight
+        return {"workers": self.workers, "busy": busy, "idle": self._idle.qsize(), "queue_size": self.queue_size}
+
+    def close(self):
+        for manager in self._managers:
+            try:
+                manager.close()
+            except Exception:
+                pass
+
+
+class IntentShellAPI:
+    """Endpoint logic, independent of the HTTP transport."""
+    def __init__(self, pool: ManagerPool, metrics: Optional[ServerMetrics] = None):
+        self.pool = pool
+        self.metrics = metrics or ServerMetrics()
+        self.routes = {
+            ("POST", "/process"): self.process,
+            ("POST", "/assess"): self.assess,
+            ("POST", "/dry-run"): self.dry_run,
+            ("POST", "/execute"): self.execute,
+            ("GET", "/metrics"): self.get_metrics,
+            ("GET", "/health"): self.health,
+        }
+
+    def handle(self, method: str, path: str, body: dict) -> dict:
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        handler = self.routes.get((method, path))
+        if handler is None:
+            raise ApiError(404, f"No endpoint {method} {path}")
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = handler(body)
+            ok = True
+            return result
+        except ApiError as e:
+            if e.status == 503:
+                self.metrics.record_rejected()
+            raise
+        finally:
+            self.metrics.record(path, time.perf_counter() - start, ok)
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _require_input(body: dict) -> str:
+        text = body.get("input")
+        if not isinstance(text, str) or not text.strip():
+            raise ApiError(400, "'input' must be a non-empty string")
+        return text
+
+    def _process(self, manager, body: dict):
+        text = self._require_input(body)
+        nlu = manager.nlu
+        hits_before = getattr(nlu, "cache_hits", 0)
+        intent, command, risk, timings = manager.process_input(text, bypass_cache=bool(body.get("bypass_cache")), with_timings=True)
+        if hasattr(nlu, "cache_hits"):
+            self.metrics.record_cache(nlu.cache_hits > hits_before)
+        return intent, command, risk, timings
+
+    @staticmethod
+    def _payload(intent: Intent, command: str, risk, timings: dict) -> dict:
+        return {
+            "intent": intent.model_dump(mode="json"),
+            "command": command,
+            "risk": risk.model_dump(mode="json"),
+            "timings_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+        }
+
+    # --- Endpoints ---
+
+    def process(self, body: dict) -> dict:
+        manager = self.pool.acquire()
+        try:
+            return self._payload(*self._process(manager, body))
+        finally:
+            self.pool.release(manager)
+
+    def assess(self, body: dict) -> dict:
+        try:
+            intent = Intent.model_validate(body.get("intent") or {})
+        except ValueError as e:
+            raise ApiError(400, f"Invalid intent: {e}")
+        command = body.get("command", intent.generated_command or "")
+        if not isinstance(command, str):
+            raise ApiError(400, "'command' must be a string")
+        manager = self.pool.acquire()
+        try:
+            # A caller-supplied intent is hypothetical: it must not spend the shared suspension budget
+            risk = manager.sentinel.assess(intent, command, record=False)
+        finally:
+            self.pool.release(manager)
+        return {"risk": risk.model_dump(mode="json")}
+
+    def dry_run(self, body: dict) -> dict:
+        manager = self.pool.acquire()
+        try:
+            intent, command, risk, timings = self._process(manager, body)
+        finally:
+            self.pool.release(manager)
+        from .bridge_runner import RunnerBridge
+        logs = []
+        RunnerBridge(lambda msg, style="info": logs.append(msg)).dry_run(command, intent.description)
+        payload = self._payload(intent, command, risk, timings)
+        payload["dry_run"] = [line for line in logs if line.strip()]
+        return payload
+
+    def execute(self, body: dict) -> dict:
+        if body.get("confirmed") is not True:
+            raise ApiError(403, "Execution requires \"confirmed\": true")
+        manager = self.pool.acquire()
+        try:
+            intent, command, risk, timings = self._process(manager, body)
+            payload = self._payload(intent, command, risk, timings)
+            if intent.intent_type in ("unknown", "error", "kernel_error"):
+                raise ApiError(422, f"Intent Resolution Failed: {intent.description}")
+            if risk.level == RiskLevel.VERY_HIGH:
+                raise ApiError(403, "Blocked: " + "; ".join(risk.reasons))
+            if risk.level == RiskLevel.HIGH and body.get("allow_high_risk") is not True:
+                raise ApiError(403, "HIGH risk command requires \"allow_high_risk\": true")
+
+            from .bridge_runner import RunnerBridge
+            logs = []
+            runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=manager.session)
+            payload["success"] = runner.execute(command, intent)
+            payload["output"] = "\n".join(logs)
+            return payload
+        finally:
+            self.pool.release(manager)
+
+    def get_metrics(self, body: dict) -> dict:
+        snapshot = self.metrics.snapshot()
+        snapshot["pool"] = self.pool.state()
+        snapshot["registry"] = REGISTRY.snapshot()["metrics"]
+        return snapshot
+
+    def health(self, body: dict) -> dict:
+        return {"status": "ok", "pool": self.pool.state()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "IntentShellAPI/1.0"
+    api: IntentShellAPI = None
+    token: Optional[str] = None
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet; /metrics has the numbers
+
+    def _check_origin(self):
+        # Browsers add Origin to cross-site requests; a local client never needs it
+        if self.headers.get("Origin") is not None:
+            raise ApiError(403, "Cross-origin requests are not allowed")
+        # DNS rebinding: a page on evil.example resolved to 127.0.0.1 still sends Host: evil.example.
+        # Unix socket peers can't be browsers.
+        if isinstance(self.client_address, tuple) and _host_name(self.headers.get("Host", "")) not in LOOPBACK_HOSTS:
+            raise ApiError(403, "Host header must name a loopback address")
+
+    def _dispatch(self, method: str):
+        try:
+            self._check_origin()
+            supplied = self.headers.get("Authorization", "")
+            if not self.token or not hmac.compare_digest(supplied, f"Bearer {self.token}"):
+                raise ApiError(401, "Missing or invalid API token")
+            body = {}
+            if method == "POST":
+                # Forms and text/plain are "simple" requests a web page can send without a preflight
+                if self.headers.get_content_type() != "application/json":
+                    raise ApiError(415, "Content-Type must be application/json")
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    raise ApiError(400, "Invalid Content-Length")
+                if length < 0:
+                    raise ApiError(400, "Invalid Content-Length")
+                if length > MAX_BODY_BYTES:
+                    raise ApiError(413, "Request body too large")
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw or b"{}")
+                except json.JSONDecodeError as e:
+                    raise ApiError(400, f"Invalid JSON: {e}")
+                if not isinstance(body, dict):
+                    raise ApiError(400, "Request body must be a JSON object")
+            if method == "GET" and self.path.split("?", 1)[0].rstrip("/") == "/metrics" and "format=prometheus" in self.path:
+                start = time.perf_counter()
+                text = REGISTRY.render_prometheus()
+                self.api.metrics.record("/metrics", time.perf_counter() - start, True)
+                self._send_text(200, text)
+                return
+            self._send(200, self.api.handle(method, self.path, body))
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"Internal error: {e}"})
+
+    def _send_text(self, status: int, text: str):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixHTTPServer = None
+
+
+class _IPv6HTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_INET6
+
+
+def create_server(api: IntentShellAPI, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  socket_path: Optional[str] = None, token: Optional[str] = None):
+    """Builds the HTTP server (TCP on loopback, or a Unix socket if socket_path is given)."""
+    if not socket_path and host not in LOOPBACK_HOSTS:
+        raise ValueError(f"Refusing to bind to non-loopback host '{host}'")
+    if not token:
+        raise ValueError("An API token is required")
+    handler = type("IntentShellHandler", (_Handler,), {"api": api, "token": token})
+    if socket_path:
+        if _UnixHTTPServer is None:
+            raise RuntimeError("Unix sockets are not supported on this platform")
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # The socket is created by bind(): with this umask it is 0600 from the start
+        previous_umask = os.umask(0o177)
+        try:
+            return _UnixHTTPServer(socket_path, handler)
+        finally:
+            os.umask(previous_umask)
+    server_class = _IPv6HTTPServer if ":" in host else ThreadingHTTPServer
+    server = server_class((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: Optional[str] = None,
+          workers: int = 2, queue_size: int = 16, token_file: str = TOKEN_FILE) -> int:
+    token = os.getenv("INTENTSHELL_API_TOKEN")
+    if not token:
+        token = secrets.token_urlsafe(32)
+        write_token_file(token, token_file)
+        print(f"API token written to {token_file}")
+    print(f"Starting {workers} Kernel worker(s)...")
+    pool = ManagerPool(workers=workers, queue_size=queue_size)
+    api = IntentShellAPI(pool)
+    try:
+        server = create_server(api, host, port, socket_path, token=token)
+    except Exception:
+        pool.close()
+        raise
+    where = socket_path or f"http://{host}:{port}"
+    print(f"IntentShell API listening on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+    return 0
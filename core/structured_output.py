@@ -0,0 +1,313 @@
+import base64
+import configparser
+import csv
+import gzip
+import io
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .security.command_parser import parse_command
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+MARKER = "STRUCTURED_GZIP:"
+FORMATS = ("text", "json", "csv")
+# Trailing pipeline stages that only turn objects into host text; the client renders instead
+FORMATTING_CMDLETS = {"format-table", "format-list", "format-wide", "ft", "fl", "fw", "out-string"}
+# Format-* switches that only change the layout, so they can be dropped along with the stage
+DISPLAY_SWITCHES = {"autosize", "wrap", "hidetableheaders", "repeatheader", "force", "showerror", "displayerror"}
+
+
+def load_output_settings(path: str = CONFIG_PATH) -> Tuple[str, int]:
+    """Returns (format, max_rows) from the [Output] section of config/main.ini."""
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path, encoding="utf-8")
+    fmt = config.get("Output", "format", fallback="json").strip().lower()
+    if fmt not in FORMATS:
+        print(f"Output: unknown format '{fmt}', using text")
+        fmt = "text"
+    return fmt, config.getint("Output", "max_rows", fallback=50)
+
+
+def _format_columns(arguments) -> Optional[List[str]]:
+    """
+    Column list of a Format-* stage (Name, CPU / -Property Name) as source text, or None
+    when an argument has no Select-Object equivalent (-GroupBy, -View, script blocks, @{ }).
+    """
+    columns = []
+    for token in arguments:
+        if token.kind == "operator" and token.value == ",":
+            continue
+        if token.kind == "word" and token.value.startswith("-") and len(token.value) > 1:
+            name = token.value[1:].split(":")[0].lower()
+            if "property".startswith(name):
+                continue # The column list follows
+            if len([s for s in DISPLAY_SWITCHES if s.startswith(name)]) != 1:
+                return None
+            continue
+        if token.kind in ("word", "string"):
+            columns.append(token.text)
+            continue
+        return None
+    return columns
+
+
+def strip_formatting(command: str) -> Optional[str]:
+    """
+    Rewrites trailing Format-*/Out-String stages so the Kernel returns objects: the
+    columns of Format-Table Name, CPU become Select-Object Name, CPU, and a stage without
+    columns is dropped. Returns None when a stage can't be mapped (Format-Table -GroupBy x);
+    such a command has to run as text. Anything else is returned unchanged.
+    """
+    parsed = parse_command(command)
+    tokens = [t for t in parsed.tokens if t.kind != "comment"]
+    while tokens and tokens[-1].kind == "newline":
+        tokens.pop()
+
+    depth = 0
+    last_pipe = None
+    for i, token in enumerate(tokens):
+        if token.kind == "group":
+            depth += 1 if token.value not in (")", "}") else -1
+        elif depth == 0 and token.kind == "operator":
+            if token.value == "|":
+                last_pipe = i
+            elif token.value in (";", "&&", "||"):
+                last_pipe = None # Only a single trailing pipeline is rewritten
+        elif depth == 0 and token.kind == "newline":
+            last_pipe = None
+
+    if last_pipe is None or last_pipe + 1 >= len(tokens):
+        return command
+    stage = tokens[last_pipe + 1]
+    name = stage.value.lower()
+    if stage.kind != "word" or name not in FORMATTING_CMDLETS:
+        return command
+
+    columns = [] if name == "out-string" else _format_columns(tokens[last_pipe + 2:])
+    if columns is None:
+        return None
+    rest = strip_formatting(parsed.source[:tokens[last_pipe].start].rstrip())
+    if rest is None or not columns:
+        return rest
+    return f"{rest} | Select-Object {', '.join(columns)}"
+
+
+def _sort_key(value: Any):
+    # Numbers (including numeric CSV strings) before text, text case-insensitive
+    if isinstance(value, bool):
+        return (0, float(value), "")
+    if isinstance(value, (int, float)):
+        return (0, float(value), "")
+    text = str(value)
+    try:
+        return (0, float(text), "")
+    except ValueError:
+        return (1, 0, text.lower())
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class StructuredResult:
+    """
+    Column-oriented query result decoded from a STRUCTURED_GZIP payload.
+    Decoding happens on first access; filter/sort/slice/select return views that share
+    the decoded columns and only carry a row index.
+    """
+    def __init__(self, fmt: str = "json", payload: Optional[bytes] = None,
+                 columns: Optional[Dict[str, list]] = None, index: Optional[List[int]] = None,
+                 names: Optional[List[str]] = None):
+        self.format = fmt
+        self._payload = payload
+        self._columns = columns
+        self._index = index
+        self._names = names
+
+    @classmethod
+    def from_marker(cls, line: str) -> "StructuredResult":
+        """Parses 'STRUCTURED_GZIP:<format>:<base64>' without decompressing."""
+        fmt, _, data = line[len(MARKER):].partition(":")
+        if fmt not in ("json", "csv") or not data:
+            raise ValueError("Malformed structured output")
+        return cls(fmt, base64.b64decode(data))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "StructuredResult":
+        result = cls()
+        result._columns = cls._columnize(rows)
+        return result
+
+    @staticmethod
+    def _columnize(rows: Sequence[Any]) -> Dict[str, list]:
+        columns: Dict[str, list] = {}
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                row = {"Value": row}
+            for name in row:
+                if name not in columns:
+                    columns[name] = [None] * i
+            for name, values in columns.items():
+                values.append(row.get(name))
+        return columns
+
+    def _load(self) -> Dict[str, list]:
+        if self._columns is None:
+            text = gzip.decompress(self._payload).decode("utf-8-sig") if self._payload else ""
+            if self.format == "csv":
+                rows = list(csv.DictReader(io.StringIO(text)))
+            else:
+                data = json.loads(text) if text.strip() else []
+                rows = data if isinstance(data, list) else [data]
+            self._columns = self._columnize(rows)
+            self._payload = None
+        return self._columns
+
+    def _rows_index(self) -> List[int]:
+        if self._index is not None:
+            return self._index
+        columns = self._load()
+        return list(range(len(next(iter(columns.values()), []))))
+
+    def _view(self, index: Optional[List[int]] = None, names: Optional[List[str]] = None) -> "StructuredResult":
+        return StructuredResult(self.format, columns=self._load(), index=self._rows_index() if index is None else index,
+                                names=self._names if names is None else names)
+
+    @property
+    def columns(self) -> List[str]:
+        columns = self._load()
+        return list(self._names) if self._names is not None else list(columns)
+
+    def __len__(self) -> int:
+        return len(self._rows_index())
+
+    def column(self, name: str) -> list:
+        values = self._load()[self._resolve(name)]
+        return [values[i] for i in self._rows_index()]
+
+    def _resolve(self, name: str) -> str:
+        for column in self._load():
+            if column.lower() == name.lower():
+                return column
+        raise KeyError(f"Unknown column: {name}")
+
+    def rows(self) -> List[Dict[str, Any]]:
+        columns = self._load()
+        names = self.columns
+        return [{name: columns[name][i] for name in names} for i in self._rows_index()]
+
+    def filter(self, column: str, match: Union[str, Callable[[Any], bool]]) -> "StructuredResult":
+        """Keeps rows whose column satisfies match (a predicate, or a case-insensitive substring)."""
+        values = self._load()[self._resolve(column)]
+        if not callable(match):
+            needle = str(match).lower()
+            match = lambda value: needle in _cell(value).lower()
+        return self._view([i for i in self._rows_index() if match(values[i])])
+
+    def sort(self, column: str, descending: bool = False) -> "StructuredResult":
+        """Stable, numbers before text; empty cells stay last in both directions."""
+        values = self._load()[self._resolve(column)]
+        index = self._rows_index()
+        present = [i for i in index if values[i] is not None and values[i] != ""]
+        missing = [i for i in index if values[i] is None or values[i] == ""]
+        return self._view(sorted(present, key=lambda i: _sort_key(values[i]), reverse=descending) + missing)
+
+    def slice(self, start: int = 0, stop: Optional[int] = None) -> "StructuredResult":
+        return self._view(self._rows_index()[start:stop])
+
+    def select(self, *columns: str) -> "StructuredResult":
+        return self._view(names=[self._resolve(c) for c in columns])
+
+    def render(self, max_rows: int = 50, max_width: int = 40) -> str:
+        """Plain text table, like Format-Table but computed on the client."""
+        names = self.columns
+        if not names:
+            return ""
+        columns = self._load()
+        index = self._rows_index()
+        shown = index[:max_rows] if max_rows else index
+        cells = [[_cell(columns[name][i]).replace("\n", " ") for name in names] for i in shown]
+        if names == ["Value"]:
+            # Plain values (strings, numbers): no table chrome
+            lines = [row[0] for row in cells]
+            if len(index) > len(shown):
+                lines.append(f"... {len(index) - len(shown)} more rows")
+            return "\n".join(lines)
+        widths = [min(max_width, max([len(name)] + [len(row[c]) for row in cells])) for c, name in enumerate(names)]
+
+        def fit(text, width):
+            return text if len(text) <= width else text[:width - 1] + "…"
+
+        lines = [" ".join(fit(n, w).ljust(w) for n, w in zip(names, widths)).rstrip(),
+                 " ".join("-" * w for w in widths)]
+        lines += [" ".join(fit(v, w).ljust(w) for v, w in zip(row, widths)).rstrip() for row in cells]
+        if len(index) > len(shown):
+            lines.append(f"... {len(index) - len(shown)} more rows")
+        return "\n".join(lines)
+
+
+def parse_output(output: str) -> Tuple[str, Optional[StructuredResult]]:
+    """Splits Kernel output into (other text lines, structured result or None)."""
+    if not output or MARKER not in output:
+        return output, None
+    text_lines = []
+    result = None
+    for line in output.splitlines():
+        if result is None and line.startswith(MARKER):
+            try:
+                result = StructuredResult.from_marker(line)
+                continue
+            except ValueError:
+                pass
+        text_lines.append(line)
+    return "\n".join(text_lines), result
+
+
+def apply_view_command(result: StructuredResult, args: List[str]) -> StructuredResult:
+    """
+    Shared by the REPL and overlay 'view' command:
+    sort <col> [desc] | filter <col> <text> | cols <a,b> | head <n>
+    """
+    if not args:
+        return result
+    action = args[0].lower()
+    if action == "sort" and len(args) >= 2:
+        return result.sort(args[1], descending=len(args) > 2 and args[2].lower() == "desc")
+    if action == "filter" and len(args) >= 3:
+        return result.filter(args[1], " ".join(args[2:]))
+    if action == "cols" and len(args) >= 2:
+        return result.select(*[c for c in " ".join(args[1:]).replace(",", " ").split() if c])
+    if action == "head" and len(args) >= 2 and args[1].isdigit():
+        return result.slice(0, int(args[1]))
+    raise ValueError("Usage: view [sort <col> [desc] | filter <col> <text> | cols <a,b> | head <n> | reset]")
+
+
+class ResultView:
+    """
+    'view' state for one UI: operations compose on the current view of the last result
+    and start over when a new query result arrives.
+    """
+    def __init__(self, max_rows: int = 50):
+        self.max_rows = max_rows
+        self.base: Optional[StructuredResult] = None
+        self.current: Optional[StructuredResult] = None
+
+    def handle(self, result: Optional[StructuredResult], args: List[str]) -> str:
+        if result is None:
+            raise ValueError("No structured result to view (run a query first)")
+        if result is not self.base:
+            self.base = self.current = result
+        if args and args[0].lower() == "reset":
+            self.current = self.base
+        else:
+            try:
+                self.current = apply_view_command(self.current, args)
+            except KeyError as e:
+                raise ValueError(e.args[0])
+        return self.current.render(self.max_rows)
@@ -0,0 +1,224 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+TRACE_ENV = "INTENTSHELL_TRACE"
+FORMATS = ("jsonl", "chrome")
+
+_current: contextvars.ContextVar = contextvars.ContextVar("intentshell_span", default=None)
+
+
+class Span:
+    """One timed operation. Spans nest through a context variable, so pipeline stages keep their parent."""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attrs", "thread_id", "_token", "_t0")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = 0.0
+        self.attrs = attrs
+        self.thread_id = threading.get_ident()
+        self._token = None
+        self._t0 = time.perf_counter()
+
+    def set(self, key: str, value: Any):
+        self.attrs[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "thread": self.thread_id,
+            "attrs": self.attrs,
+        }
+
+
+class _NullSpan:
+    """Returned while tracing is off: no allocation, no clock reads."""
+    trace_id = None
+    span_id = None
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.duration = time.perf_counter() - span._t0
+        if exc_type is not None:
+            span.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(span._token)
+        self.tracer.export(span)
+        return False
+
+
+class JsonlExporter:
+    """One span per line, in the order spans end."""
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ChromeTraceExporter(JsonlExporter):
+    """
+    Chrome trace event format (chrome://tracing, Perfetto). Written as a streaming JSON
+    array; the closing bracket is optional in that format, so a crash still leaves a loadable file.
+    """
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.write("[\n")
+
+    def write(self, span: Span):
+        event = {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": int(span.start * 1_000_000),
+            "dur": int(span.duration * 1_000_000),
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": dict(span.attrs, trace_id=span.trace_id, span_id=span.span_id, parent_id=span.parent_id),
+        }
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + ",\n")
+            self._file.flush()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.exporter = None
+
+    def configure(self, path: Optional[str], fmt: Optional[str] = None):
+        """Starts writing spans to path (format from fmt, else .json -> chrome, anything else -> jsonl)."""
+        self.shutdown()
+        if not path:
+            return
+        fmt = fmt or ("chrome" if path.lower().endswith(".json") else "jsonl")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown trace format: {fmt}")
+        self.exporter = ChromeTraceExporter(path) if fmt == "chrome" else JsonlExporter(path)
+        self.enabled = True
+
+    def shutdown(self):
+        self.enabled = False
+        if self.exporter is not None:
+            self.exporter.close()
+            self.exporter = None
+
+    def span(self, name: str, trace_id: Optional[str] = None, **attrs):
+        """
+        Context manager timing a block. Nests under the current span; trace_id joins an
+        earlier trace (e.g. execution after the confirmation prompt) when there is no parent.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        parent = _current.get()
+        if parent is not None:
+            return _SpanContext(self, Span(name, parent.trace_id, parent.span_id, attrs))
+        return _SpanContext(self, Span(name, trace_id or uuid.uuid4().hex, None, attrs))
+
+    def record(self, name: str, start: float, duration: float, parent: Optional[Span] = None, **attrs) -> Optional[Span]:
+        """
+        Adds an already measured span (e.g. timings reported by the Kernel) under parent,
+        which defaults to the current span. Returns the span, so others can nest under it.
+        """
+        if not self.enabled:
+            return None
+        parent = parent or _current.get()
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attrs)
+        span.start = start
+        span.duration = duration
+        self.export(span)
+        return span
+
+    def export(self, span: Span):
+        exporter = self.exporter
+        if exporter is not None:
+            try:
+                exporter.write(span)
+            except (OSError, ValueError):
+                pass # Tracing must never break a request
+
+
+tracer = Tracer()
+
+
+def span(name: str, trace_id: Optional[str] = None, **attrs):
+    return tracer.span(name, trace_id=trace_id, **attrs)
+
+
+def new_trace_id() -> Optional[str]:
+    """ID for grouping separate root spans of one intent (None while tracing is off)."""
+    return uuid.uuid4().hex if tracer.enabled else None
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span(); costs one attribute check while tracing is off."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_from_env():
+    """Enables tracing when INTENTSHELL_TRACE names an output file (used by the overlay)."""
+    path = os.getenv(TRACE_ENV)
+    if path:
+        tracer.configure(path)
@@ -1,70 +1,245 @@
 import json
 import os
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 PROFILE_PATH = "config/user_profile.json"
+HISTORY_LIMIT = 100    # History entries kept in the snapshot (and in memory)
+COMPACT_EVENTS = 500   # Journal events before it is folded into the snapshot
+
+
+def journal_path(profile_path: str) -> str:
+    return os.path.splitext(profile_path)[0] + ".journal.jsonl"
+
+
+@contextmanager
+def _interprocess_lock(path: str):
+    """Exclusive lock on a sidecar file, shared by every process using the profile (overlay, CLI)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1) # Retries for ~10s, then raises OSError
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
 
 class UserProfile:
-    def __init__(self):
+    """
+    Trust level, per-intent success counts and recent history.
+
+    Every event is appended as one JSON line to a journal next to the profile snapshot
+    (config/user_profile.journal.jsonl); the snapshot is only rewritten when the journal is
+    compacted. The journal's first line names the snapshot generation it extends, so a
+    crash mid-compaction never replays events twice, and a torn last line is skipped.
+    Other processes' events are picked up when the journal changes on disk.
+    """
+    def __init__(self, path: str = PROFILE_PATH):
+        self.path = path
+        self.journal_file = journal_path(path)
+        self.lock_file = f"{path}.lock"
         self.trust_level: float = 0.0 # 0.0 to 1.0
         self.command_history: List[Dict] = []
         self.trusted_intents: Dict[str, int] = {} # intent_type -> count
-        self._load()
+        self._lock = threading.Lock()
+        self._generation: Optional[str] = None
+        self._offset = 0          # Journal bytes already applied
+        self._journal_events = 0  # Events in the journal since the last compaction
+        self._journal_stat = None
+        try:
+            with self._locked():
+                self._load()
+        except Exception as e:
+            print(f"Error loading profile: {e}")
+
+    @contextmanager
+    def _locked(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, _interprocess_lock(self.lock_file):
+            yield
 
     def _load(self):
-        if os.path.exists(PROFILE_PATH):
+        """Snapshot, then the journal events made since it. Caller holds the lock."""
+        self.trust_level = 0.0
+        self.command_history = []
+        self.trusted_intents = {}
+        self._generation = None
+        if os.path.exists(self.path):
             try:
-                with open(PROFILE_PATH, "r") as f:
+                with open(self.path, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    self.trust_level = data.get("trust_level", 0.0)
-                    self.command_history = data.get("command_history", [])
-                    self.trusted_intents = data.get("trusted_intents", {})
-            except Exception as e:
+                self.trust_level = data.get("trust_level", 0.0)
+                self.command_history = data.get("command_history", [])[-HISTORY_LIMIT:]
+                self.trusted_intents = data.get("trusted_intents", {})
+                self._generation = data.get("journal_generation")
+            except (OSError, ValueError) as e:
                 print(f"Error loading profile: {e}")
+        self._offset = 0
+        self._journal_events = 0
+        self._read_journal()
+
+    def _read_journal(self):
+        """Applies journal lines after _offset. Caller holds the lock."""
+        try:
+            with open(self.journal_file, "rb") as f:
+                self._journal_stat = os.fstat(f.fileno())
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            self._journal_stat = None
+            return
+        end = data.rfind(b"\n") + 1 # A line without its newline is still being written (or torn)
+        for raw in data[:end].splitlines():
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                continue
+            if "generation" in event:
+                if event["generation"] != self._generation:
+                    # Left over from a compaction that crashed after writing the snapshot:
+                    # its events are already in the snapshot. Start a fresh journal.
+                    self._compact()
+                    return
+                continue
+            self._apply(event)
+            self._journal_events += 1
+        self._offset += end
+
+    def _apply(self, event: Dict):
+        self.command_history.append(event)
+        if len(self.command_history) > 2 * HISTORY_LIMIT:
+            del self.command_history[:-HISTORY_LIMIT]
+
+        # Update trust count for this intent
+        intent_type = event.get("intent", "")
+        self.trusted_intents[intent_type] = self.trusted_intents.get(intent_type, 0) + 1
+
+        # Increase global trust level slightly
+        # Cap at 1.0
+        increment = 0.01
+        if event.get("risk") == "medium":
+            increment = 0.05
+        elif event.get("risk") == "high":
+            increment = 0.1 # Successful high risk ops build more trust
 
-    def _save(self):
+        self.trust_level = min(1.0, self.trust_level + increment)
+
+    def refresh(self):
+        """Applies events other processes appended since the last read (reloads after their compaction)."""
+        try:
+            stat = os.stat(self.journal_file)
+        except OSError:
+            stat = None
+        seen = self._journal_stat
+        if stat is not None and seen is not None and (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (seen.st_ino, seen.st_size, seen.st_mtime_ns):
+            return
+        if stat is None and seen is None:
+            return
+        try:
+            with self._locked():
+                self._sync()
+        except Exception as e:
+            print(f"Error loading profile: {e}")
+
+    def _sync(self):
+        """Catches up with the files on disk. Caller holds the lock."""
         try:
-            os.makedirs(os.path.dirname(PROFILE_PATH), exist_ok=True)
-            data = {
-                "trust_level": self.trust_level,
-                "command_history": self.command_history[-100:], # Keep last 100
-                "trusted_intents": self.trusted_intents
-            }
-            with open(PROFILE_PATH, "w") as f:
-                json.dump(data, f, indent=4)
+            stat = os.stat(self.journal_file)
+        except OSError:
+            stat = None
+        seen = self._journal_stat
+        if stat is None or seen is None or stat.st_ino != seen.st_ino or stat.st_size < self._offset:
+            self._load() # Journal replaced by a compaction
+        else:
+            self._read_journal()
+
+    def compact(self):
+        """Folds the journal into the snapshot and starts an empty journal."""
+        try:
+            with self._locked():
+                self._sync()
+                self._compact()
         except Exception as e:
             print(f"Error saving profile: {e}")
 
+    def _compact(self):
+        """Caller holds the lock and has applied the whole journal."""
+        generation = uuid.uuid4().hex
+        journal_tmp = f"{self.journal_file}.tmp"
+        with open(journal_tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": generation}) + "\n")
+
+        data = {
+            "trust_level": self.trust_level,
+            "command_history": self.command_history[-HISTORY_LIMIT:], # Keep last 100
+            "trusted_intents": self.trusted_intents,
+            "journal_generation": generation,
+        }
+        # Write to a temp file first so a crash never leaves a half-written profile
+        snapshot_tmp = f"{self.path}.tmp"
+        with open(snapshot_tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(snapshot_tmp, self.path)
+        # A crash here leaves the old journal, whose generation no longer matches: it is ignored
+        os.replace(journal_tmp, self.journal_file)
+
+        self._generation = generation
+        self.command_history = data["command_history"]
+        with open(self.journal_file, "rb") as f:
+            self._journal_stat = os.fstat(f.fileno())
+            self._offset = self._journal_stat.st_size
+        self._journal_events = 0
+
     def record_success(self, intent_type: str, risk_level: str, user_input: str = ""):
         """
         Updates profile after a successful command execution.
         """
-        # Update history
-        self.command_history.append({
+        event = {
             "timestamp": datetime.now().isoformat(),
             "intent": intent_type,
             "risk": risk_level,
             "user_input": user_input,
             "status": "success"
-        })
-        
-        # Update trust count for this intent
-        self.trusted_intents[intent_type] = self.trusted_intents.get(intent_type, 0) + 1
-        
-        # Increase global trust level slightly
-        # Cap at 1.0
-        increment = 0.01
-        if risk_level == "medium":
-            increment = 0.05
-        elif risk_level == "high":
-            increment = 0.1 # Successful high risk ops build more trust
-            
-        self.trust_level = min(1.0, self.trust_level + increment)
-        self._save()
+        }
+        try:
+            with self._locked():
+                self._sync()
+                if self._journal_stat is None:
+                    self._compact() # First event (or pre-journal profile): start a journal for this snapshot
+                line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                with open(self.journal_file, "r+b") as f:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() > self._offset:
+                        # Torn line from a crashed writer: end it so this event starts on its own line
+                        line = b"\n" + line
+                    f.write(line)
+                    self._journal_stat = os.fstat(f.fileno())
+                    self._offset = f.tell()
+                self._apply(event)
+                self._journal_events += 1
+                if self._journal_events >= COMPACT_EVENTS:
+                    self._compact()
+        except Exception as e:
+            print(f"Error saving profile: {e}")
 
     def get_recent_history(self, limit: int = 5) -> List[Dict]:
         """Returns the last N successful commands."""
+        self.refresh()
         return self.command_history[-limit:]
 
     def get_trust_modifier(self, intent_type: str) -> float:
@@ -72,12 +247,13 @@ class UserProfile:
         Returns a trust modifier based on history.
         High trust might lower the risk confirmation barrier.
         """
+        self.refresh()
         count = self.trusted_intents.get(intent_type, 0)
-        
+
         # If user did this 10+ times, we trust them more with this specific action
         if count > 10:
             return 0.3 # 30% reduction in risk sensitivity
         elif count > 5:
             return 0.1
-            
+
         return 0.0
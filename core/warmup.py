@@ -0,0 +1,108 @@
+"""
+Background Kernel warm-up for the overlay.
+
+The overlay has to appear as soon as the hotkey is pressed, but pwsh startup and module
+loading take seconds. KernelWarmup loads the bridges and starts the session on a daemon
+thread, in two steps:
+
+1. local:  the bridges are imported and built without a session. resolve_local() can now
+           answer intent-cache hits whose command and risk need no Kernel round trip.
+2. ready:  the session is up and exec_manager serves every request.
+
+Anything resolve_local() can't answer is queued by the UI until `ready` is set.
+"""
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from core.tracing import span
+
+# Intents whose handling needs the Kernel (or a dialog) even when they are cached
+KERNEL_ONLY_INTENTS = {"unknown", "error", "kernel_error", "security_challenge_required", "experimental_join"}
+
+
+class KernelWarmup:
+    """
+    :param profile: core.user_profile.UserProfile for trust lookups (shared with the ExecutionManager).
+    :param session_factory: Builds the Kernel session (defaults to core.replay.open_session).
+    :param on_local: Called with the warm-up when step 1 is done, before resolve_local() answers (from the warm-up thread).
+    :param on_ready: Called with the warm-up when step 2 is done or failed (from the warm-up thread).
+    """
+    def __init__(self, profile: Any = None, session_factory: Optional[Callable[[], Any]] = None,
+                 on_local: Optional[Callable[["KernelWarmup"], None]] = None,
+                 on_ready: Optional[Callable[["KernelWarmup"], None]] = None):
+        self.profile = profile
+        self.session_factory = session_factory
+        self.on_local = on_local
+        self.on_ready = on_ready
+        self.local = threading.Event()
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+        self.nlu = None
+        self.sentinel = None
+        self.session = None
+        self.exec_manager = None
+        self._thread = None
+
+    def start(self) -> "KernelWarmup":
+        self._thread = threading.Thread(target=self._warm_up, name="intentshell-kernel-warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def _warm_up(self):
+        try:
+            with span("warmup.local"):
+                # Heavy imports (pydantic) happen here, off the UI thread
+                from core.bridge_nlu import NLUBridge
+                from core.bridge_sentinel import SentinelBridge
+                from core.execution import ExecutionManager
+                self.nlu = NLUBridge()
+                self.sentinel = SentinelBridge()
+            # The UI builds its local components (explainer, dry-run executor) here, so
+            # resolve_local() only starts answering once they exist
+            if self.on_local:
+                self.on_local(self)
+            self.local.set()
+
+            with span("warmup.kernel"):
+                if self.session_factory is None:
+                    from core.replay import open_session
+                    self.session_factory = open_session
+                session = self.session_factory()
+                # Same bridges, now backed by the Kernel: cache and suspension state carry over
+                self.nlu.session = session
+                self.sentinel.session = session
+                self.exec_manager = ExecutionManager(session, nlu_bridge=self.nlu, sentinel=self.sentinel,
+                                                     profile=self.profile)
+                self.session = session
+        except Exception as e:
+            print(f"Kernel warm-up failed: {e}")
+            self.error = e
+        finally:
+            self.ready.set()
+            if self.on_ready:
+                self.on_ready(self)
+
+    def wait(self, cancel_token=None, poll: float = 0.1) -> bool:
+        """Blocks until the warm-up is over; False if cancel_token was cancelled first."""
+        while not self.ready.wait(poll):
+            if cancel_token is not None and cancel_token.cancelled:
+                return False
+        return True
+
+    def resolve_local(self, raw_input: str) -> Optional[Tuple[Any, str, Any, float]]:
+        """
+        (intent, command, risk, trust_modifier) for a cached intent that carries its command and
+        whose Python Sentinel verdict needs no Kernel double-check; None if the Kernel is needed.
+        """
+        if not self.local.is_set():
+            return None
+        from core.execution import ExecutionManager
+        intent = self.nlu.lookup_cache(ExecutionManager.normalize(raw_input))
+        if intent is None or not intent.generated_command or intent.intent_type in KERNEL_ONLY_INTENTS:
+            return None
+        command = intent.generated_command
+        risk = self.sentinel.assess(intent, command, local_only=True)
+        if risk is None:
+            return None
+        trust = self.profile.get_trust_modifier(intent.intent_type) if self.profile else 0.0
+        return intent, command, risk, trust
@@ -1,45 +1,229 @@
+import time
+_STARTED = time.perf_counter()
+
 import sys
 import os
+import argparse
+import atexit
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import TYPE_CHECKING
 
 # Add project root to sys.path
 sys.path.append(os.getcwd())
 
+# Only what the banner and argument handling need. The bridges (pydantic), jobs and
+# prompts are imported in main() while the Kernel session starts in the background.
 from rich.console import Console
-from rich.prompt import Prompt, Confirm
-from core.bridge_nlu import NLUBridge
-from core.bridge_dispatch import DispatchBridge
-from core.command_explainer import CommandExplainer
-from core.bridge_runner import RunnerBridge
-from core.schemas import RiskLevel
-from core.bridge_sentinel import SentinelBridge
-from core.powershell_session import PowerShellSession
-import getpass
-import datetime
-import random
+from core.tracing import span, tracer, new_trace_id
+from core.metrics import format_metrics, start_exporter_from_config
+
+if TYPE_CHECKING:
+    from core.jobs import JobManager
 
 console = Console()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IntentShell - Safe Natural Language Shell")
+    parser.add_argument("mode", nargs="?", choices=["serve"], help="serve: run the local JSON API instead of the REPL")
+    parser.add_argument("--batch", metavar="FILE", help="Process utterances from FILE ('-' for stdin) without prompts")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel Kernel sessions in batch mode (default: 4)")
+    parser.add_argument("--confirm-policy", choices=["skip", "auto-low", "queue"], default="skip",
+                        help="skip: never execute; auto-low: execute LOW risk only; queue: execute LOW risk, queue the rest")
+    parser.add_argument("--output", default="cache/batch_results.jsonl", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("--queue-file", default="cache/batch_queue.jsonl", help="Where --confirm-policy queue writes pending confirmations")
+    parser.add_argument("--host", default="127.0.0.1", help="serve: loopback address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="serve: TCP port (default: 8765)")
+    parser.add_argument("--socket", help="serve: listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=2, help="serve: warm Kernel sessions (default: 2)")
+    parser.add_argument("--queue-size", type=int, default=16, help="serve: requests allowed to wait for a worker before 503 (default: 16)")
+    parser.add_argument("--token-file", default="cache/api_token", help="serve: where the generated API token is written (default: cache/api_token)")
+    parser.add_argument("--trace", metavar="FILE", help="Write per-intent spans to FILE (.json: Chrome trace, otherwise JSONL)")
+    parser.add_argument("--trace-format", choices=["jsonl", "chrome"], help="Override the format --trace infers from the file name")
+    parser.add_argument("--record", metavar="FILE", help="Record every Kernel request and response to FILE (gzip JSONL)")
+    parser.add_argument("--replay", metavar="FILE", help="Serve Kernel responses from a --record FILE instead of PowerShell")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="--replay: latency scale (1 = recorded speed, 0 = as fast as possible)")
+    parser.add_argument("--startup-report", action="store_true", help="Print startup phase timings and exit at the first prompt")
+    return parser.parse_args(argv)
+
+def run_batch_mode(args) -> int:
+    from core.batch import run_batch, format_summary
+    summary = run_batch(args.batch, args.output, concurrency=args.concurrency,
+                        confirm_policy=args.confirm_policy, queue_file=args.queue_file)
+    # Summary goes to stderr so `--output -` stays valid JSONL
+    Console(stderr=True).print(format_summary(summary))
+    return 1 if summary["statuses"].get("error") else 0
+
+def handle_jobs_command(jobs: "JobManager", user_input: str):
+    """jobs | jobs tail <id> [n] | jobs cancel <id> | jobs collect <id>"""
+    from core.jobs import format_job
+    parts = user_input.split()
+    action = parts[1].lower() if len(parts) > 1 else "list"
+    job_id = parts[2] if len(parts) > 2 else None
+
+    if action == "list":
+        listed = jobs.list_jobs()
+        if not listed:
+            console.print("[dim]No background jobs.[/dim]")
+        for meta in listed:
+            console.print(format_job(meta), markup=False)
+    elif not job_id:
+        console.print(f"[red]Usage: jobs {action} <id>[/red]")
+    elif action == "tail":
+        count = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 20
+        meta = jobs.get(job_id)
+        if not meta:
+            console.print(f"[red]Unknown job: {job_id}[/red]")
+            return
+        console.print(format_job(meta), markup=False)
+        for line in jobs.tail(job_id, count):
+            console.print(line, markup=False)
+    elif action == "cancel":
+        if jobs.cancel(job_id):
+            console.print(f"[yellow]Job {job_id} cancelled.[/yellow]")
+        else:
+            console.print(f"[red]Job {job_id} is unknown or already finished.[/red]")
+    elif action == "collect":
+        collected = jobs.collect(job_id)
+        if not collected:
+            console.print(f"[red]Job {job_id} is unknown or still running (see 'jobs tail {job_id}').[/red]")
+            return
+        meta, output = collected
+        console.print(format_job(meta), markup=False)
+        console.print(output.rstrip(), markup=False)
+    else:
+        console.print("[red]Usage: jobs [list | tail <id> [n] | cancel <id> | collect <id>][/red]")
+
+def format_startup_report(phases: list) -> str:
+    """phases: (name, seconds) in order; the Kernel phase runs in parallel with the imports."""
+    lines = [f"{'phase':<34}{'ms':>10}", "-" * 44]
+    for name, seconds in phases:
+        lines.append(f"{name:<34}{seconds * 1000:>10.1f}")
+    lines.append("")
+    lines.append("Per-module import times: python -X importtime main.py --startup-report")
+    return "\n".join(lines)
+
+def run_cancellable(func, *args, **kwargs):
+    """
+    Runs func(*args, cancel_token=token, **kwargs) on a worker thread so that Ctrl+C cancels
+    the command instead of leaving the REPL. Returns (result, cancelled).
+    A second Ctrl+C while the Kernel is being resynchronised exits as before.
+    """
+    from core.cancellation import CancellationToken, OperationCancelled
+    token = CancellationToken()
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intentshell-command")
+    try:
+        future = worker.submit(func, *args, cancel_token=token, **kwargs)
+        while True:
+            try:
+                # Short waits: a blocking wait can't be interrupted by Ctrl+C on Windows
+                return future.result(timeout=0.2), token.cancelled
+            except FutureTimeout:
+                continue
+            except KeyboardInterrupt:
+                token.cancel()
+                console.print("\n[yellow]Cancelling...[/yellow]")
+                try:
+                    return future.result(), True
+                except OperationCancelled:
+                    return None, True
+            except OperationCancelled:
+                return None, True
+    finally:
+        worker.shutdown(wait=False)
+
+def _open_timed_session():
+    from core.replay import open_session
+    start = time.perf_counter()
+    session = open_session()
+    return session, time.perf_counter() - start
+
 def main():
+    phases = [("top-level imports", time.perf_counter() - _STARTED)]
+    args = parse_args()
+    if args.trace:
+        tracer.configure(args.trace, args.trace_format)
+    # Periodic Prometheus/JSON snapshots ([Metrics] in config/main.ini); last write on exit
+    exporter = start_exporter_from_config()
+    if exporter:
+        atexit.register(exporter.stop)
+    # Through the environment so worker, job and batch sessions follow too
+    if args.record:
+        from core.replay import RECORD_ENV
+        os.environ[RECORD_ENV] = args.record
+    if args.replay:
+        from core.replay import REPLAY_ENV, REPLAY_SPEED_ENV
+        os.environ[REPLAY_ENV] = args.replay
+        os.environ[REPLAY_SPEED_ENV] = str(args.replay_speed)
+    if args.batch:
+        sys.exit(run_batch_mode(args))
+    if args.mode == "serve":
+        from core.server import serve
+        sys.exit(serve(host=args.host, port=args.port, socket_path=args.socket,
+                       workers=args.workers, queue_size=args.queue_size, token_file=args.token_file))
+
     console.print("[bold blue]IntentShell v1.0.0 (Stable)[/bold blue] - Safe Natural Language Shell", justify="center")
     console.print("[dim]Type 'exit' to quit[/dim]\n")
 
-    # Initialize Persistent Session
+    # Initialize Persistent Session: pwsh startup and module loading overlap with the imports below
+    starter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intentshell-kernel-start")
+    pending_session = starter.submit(_open_timed_session)
+
+    imports_started = time.perf_counter()
+    import getpass
+    import datetime
+    import random
+    from rich.prompt import Prompt, Confirm
+    from core.bridge_nlu import NLUBridge
+    from core.bridge_dispatch import DispatchBridge
+    from core.command_explainer import CommandExplainer
+    from core.bridge_runner import RunnerBridge
+    from core.schemas import RiskLevel
+    from core.bridge_sentinel import SentinelBridge
+    from core.jobs import JobManager, is_potentially_slow
+    from core.structured_output import ResultView
+    from core.user_profile import UserProfile
+    phases.append(("REPL imports (during Kernel start)", time.perf_counter() - imports_started))
+
+    waited = time.perf_counter()
     with console.status("[bold green]Initializing Kernel...[/bold green]"):
-        session = PowerShellSession()
+        session, kernel_seconds = pending_session.result()
+    starter.shutdown(wait=False)
+    phases.append(("Kernel session start", kernel_seconds))
+    phases.append(("waiting for Kernel after imports", time.perf_counter() - waited))
 
     parser = NLUBridge(session)
     generator = DispatchBridge(session)
     sentinel = SentinelBridge(session)
     explainer = CommandExplainer()
     executor = RunnerBridge(session=session) # Execution uses shared session
+    profile = UserProfile() # Shared with the overlay through its journal
+
+    # Slow intents run on their own worker Kernel; finished jobs are announced before the next prompt
+    finished_jobs = []
+    jobs = JobManager(on_finish=finished_jobs.append)
+    # Client-side sort/filter of the last structured query result
+    result_view = ResultView(executor.max_rows)
 
     while True:
         try:
+            while finished_jobs:
+                meta = finished_jobs.pop(0)
+                style = "green" if meta["status"] == "done" else "red"
+                console.print(f"[{style}]Job {meta['id']} {meta['status']}[/{style}] [dim](jobs collect {meta['id']})[/dim]")
+                if meta["status"] == "done" and meta.get("intent"):
+                    parser.cache_successful_execution(meta["input"], meta["intent"])
+
             # Dynamic Prompt
             prompt_text = "\n[bold green]Intent[/bold green]"
             if session.ghost_mode_active:
                 prompt_text = "\n[bold red]⚠️ Ghost Mode ACTIVE[/bold red] | [bold green]Intent[/bold green]"
 
+            if phases is not None:
+                phases.append(("time to first prompt", time.perf_counter() - _STARTED))
+                if args.startup_report:
+                    console.print(format_startup_report(phases), markup=False)
+                    break
+                phases = None
             user_input = Prompt.ask(prompt_text)
             
             if user_input.lower() in ['exit', 'quit', 'q']:
@@ -48,8 +232,28 @@ def main():
             if not user_input.strip():
                 continue
 
-            with console.status("[bold green]Thinking...[/bold green]"):
-                intent = parser.resolve_intent(user_input)
+            if user_input.split()[0].lower() == "jobs":
+                handle_jobs_command(jobs, user_input)
+                continue
+
+            if user_input.strip().lower() == "metrics":
+                console.print(format_metrics(), markup=False)
+                continue
+
+            if user_input.split()[0].lower() == "view":
+                try:
+                    console.print(result_view.handle(executor.last_result, user_input.split()[1:]), markup=False)
+                except ValueError as e:
+                    console.print(f"[red]{e}[/red]")
+                continue
+
+            # Every step of this intent shares one trace; the prompts in between are not timed
+            trace_id = new_trace_id()
+            with console.status("[bold green]Thinking...[/bold green]"), span("intent.resolve", trace_id=trace_id, input=user_input):
+                intent, cancelled = run_cancellable(parser.resolve_intent, user_input)
+            if cancelled:
+                console.print("[yellow]Cancelled.[/yellow]")
+                continue
 
             # Security Challenge Check
             if intent.intent_type == "security_challenge_required":
@@ -122,11 +326,13 @@ def main():
             console.print(f"\n{explanation}")
 
             # Generate Command
-            command = generator.get_safe_command(intent)
+            with span("intent.dispatch", trace_id=trace_id):
+                command = generator.get_safe_command(intent)
             console.print(f"[dim]Command: {command}[/dim]")
 
             # Risk Check & Confirmation via Sentinel (Kernel)
-            risk_assessment = sentinel.assess(intent, command)
+            with span("intent.assess", trace_id=trace_id):
+                risk_assessment = sentinel.assess(intent, command)
             
             if risk_assessment.level == RiskLevel.HIGH:
                 console.print("[bold red]!!! HIGH RISK ACTION !!![/bold red]")
@@ -151,10 +357,19 @@ def main():
             
             # 2. Real Execution (Ask again for MVP safety)
             if Confirm.ask("[bold cyan]Execute Real Command?[/bold cyan]"):
-                success = executor.execute(command, intent)
-                if success:
+                if is_potentially_slow(intent, command):
+                    job_id = jobs.submit(command, intent, user_input)
+                    console.print(f"[cyan]Running in the background as job {job_id}[/cyan] [dim](jobs tail {job_id} | jobs cancel {job_id})[/dim]")
+                    continue
+                console.print("[dim](Ctrl+C cancels the command)[/dim]")
+                with span("intent.execute", trace_id=trace_id, intent_type=intent.intent_type):
+                    success, cancelled = run_cancellable(executor.execute, command, intent)
+                if cancelled:
+                    console.print("[yellow]Command cancelled.[/yellow]")
+                elif success:
                     # Cache successful execution
                     parser.cache_successful_execution(user_input, intent.__dict__)
+                    profile.record_success(intent.intent_type, risk_assessment.level.value, user_input)
             else:
                 console.print("[yellow]Skipped execution.[/yellow]")
 
@@ -164,5 +379,9 @@ def main():
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {e}")
 
+    # Kills a still running job's worker Kernel; its meta is marked interrupted on next start
+    jobs.close()
+    tracer.shutdown()
+
 if __name__ == "__main__":
     main()
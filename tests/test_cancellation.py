@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+import shutil
+import time
+import threading
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_runner import RunnerBridge, build_kernel_script
+from core.cancellation import CancellationToken
+from core.powershell_session import CANCELLED_RESPONSE, KERNEL_ENV, RESYNC_TIMEOUT, PowerShellSession
+from core.result_cache import ResultCache
+from tests.conftest import fake_kernel_command
+from tests.fake_kernel import DEFAULT_FIXTURE
+
+RESOLVE = "$json = Resolve-Intent -UserInput 'saat kaç'\nWrite-Output $json"
+
+@pytest.fixture
+def slow_fixture(tmp_path):
+    """The default fixture, with a 10 s Invoke-SafePowerShell and instant everything else."""
+    with open(DEFAULT_FIXTURE, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    fixture["latency_ms"] = {"execute": 10000}
+    path = tmp_path / "slow_kernel.json"
+    path.write_text(json.dumps(fixture), encoding="utf-8")
+    return str(path)
+
+def cancel_after(token: CancellationToken, seconds: float):
+    timer = threading.Timer(seconds, token.cancel)
+    timer.start()
+    return timer
+
+@pytest.mark.skipif(sys.platform == "win32", reason="The Kernel is interrupted with SIGINT")
+def test_cancel_interrupts_pipeline_and_keeps_warm_kernel(slow_fixture):
+    session = PowerShellSession(kernel_command=fake_kernel_command(slow_fixture, latency_scale=1))
+    try:
+        pid = session.process.pid
+        logs = []
+        runner = RunnerBridge(lambda msg, style="info": logs.append((msg, style)), session=session,
+                              result_cache=ResultCache(enabled=False))
+        token = CancellationToken()
+        cancel_after(token, 0.3)
+        start = time.perf_counter()
+        assert runner.execute("Get-Date", cancel_token=token) is False
+        assert time.perf_counter() - start < 3
+        assert logs[-1] == ("CANCELLED", "warning")
+
+        # Same process, and the next request gets its own answer (not the stopped one's)
+        assert session.process.pid == pid
+        session.read_timeout_seconds = 5
+        assert '"intent": "get_date"' in session.run_command(RESOLVE.replace("saat kaç", "what time is it"))
+    finally:
+        session.close()
+
+@pytest.mark.skipif(sys.platform == "win32" or shutil.which("pwsh") is None,
+                    reason="Needs pwsh on a POSIX system (the interrupt is SIGINT)")
+def test_cancel_keeps_a_real_pwsh_kernel(monkeypatch):
+    # The fake Kernel is written to stop on SIGINT; this checks that pwsh -Command - does too
+    monkeypatch.delenv(KERNEL_ENV, raising=False)
+    session = PowerShellSession()
+    try:
+        pid = session.process.pid
+        token = CancellationToken()
+        cancel_after(token, 1.0)
+        start = time.perf_counter()
+        assert session.run_command("Start-Sleep -Seconds 30; Write-Output 'late'", cancel_token=token) == CANCELLED_RESPONSE
+        assert time.perf_counter() - start < 1.0 + RESYNC_TIMEOUT
+        assert session.process is not None and session.process.pid == pid
+        assert session.run_command("Write-Output 'next'") == "next"
+    finally:
+        session.close()
+
+def test_unresponsive_kernel_is_recycled(slow_fixture, monkeypatch):
+    monkeypatch.setattr("core.powershell_session.RESYNC_TIMEOUT", 0.5)
+    session = PowerShellSession(kernel_command=fake_kernel_command(slow_fixture, latency_scale=1, ignore_interrupt=True))
+    try:
+        pid = session.process.pid
+        token = CancellationToken()
+        cancel_after(token, 0.3)
+        start = time.perf_counter()
+        assert session.run_command(build_kernel_script("Get-Date"), cancel_token=token) == CANCELLED_RESPONSE
+        assert time.perf_counter() - start < 3
+        assert session.process is None
+
+        # Already cancelled: nothing is sent
+        assert session.run_command(RESOLVE, cancel_token=token) == CANCELLED_RESPONSE
+        # The next call starts a fresh Kernel
+        session.read_timeout_seconds = 5
+        assert '"intent": "get_date"' in session.run_command(RESOLVE)
+        assert session.process.pid != pid
+    finally:
+        session.close()
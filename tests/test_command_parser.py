@@ -0,0 +1,125 @@
+import sys
+import os
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.security.command_parser import parse_command, looks_like_path, is_absolute_path
+from core.security.anti_pattern import AntiPatternDetector
+from core.bridge_sentinel import SuspensionSystem
+from core.sandbox import SandboxManager
+from core.schemas import Intent, RiskLevel
+
+def kinds(command):
+    return [(t.kind, t.value) for t in parse_command(command).tokens]
+
+def test_strings_and_comments_hide_operators():
+    parsed = parse_command('Get-Date; Write-Host "a;b|c" | Out-Null # x;y|z')
+    assert parsed.operator_count(";") == 1
+    assert parsed.operator_count("|") == 1
+    assert parsed.strings == ("a;b|c",)
+    assert parsed.commands == ("get-date", "write-host", "out-null")
+    assert len(parsed.statements) == 2
+
+def test_quote_escapes_and_here_strings():
+    assert kinds("Write-Host 'it''s; fine'") == [("word", "Write-Host"), ("string", "it's; fine")]
+    assert kinds('Write-Host "say `"hi`"|x"') == [("word", "Write-Host"), ("string", 'say "hi"|x')]
+    parsed = parse_command('$s = @"\nline; | x\n"@\nGet-Item .\\a')
+    assert parsed.strings == ("line; | x",)
+    assert parsed.operator_count(";") == 0
+    assert parsed.commands[-1] == "get-item"
+
+def test_variables_and_paths():
+    parsed = parse_command('Remove-Item "$HOME\\Desktop\\*.tmp" ${env:TEMP}\\x -Recurse; Get-Content C:\\a.txt 2>&1 > .\\out.log')
+    assert parsed.variables == ("HOME", "env:TEMP")
+    assert parsed.paths == ("$HOME\\Desktop\\*.tmp", "${env:TEMP}\\x", "C:\\a.txt", ".\\out.log")
+    assert parsed.operator_count("2>&1") == 1
+
+def test_pipeline_segments_keep_script_blocks():
+    parsed = parse_command("Get-ChildItem | ForEach-Object { $_.Name; $_.Length } | Sort-Object")
+    assert len(parsed.statements) == 1
+    assert len(parsed.pipelines) == 3
+    assert parsed.commands == ("get-childitem", "foreach-object", "sort-object")
+
+def test_call_operator_names_the_invoked_program():
+    assert parse_command('& "C:\\Tools\\x y\\shutdown.exe" /s').commands == ("shutdown",)
+
+@pytest.mark.parametrize("value,is_path,absolute", [
+    ("C:\\Windows", True, True),
+    (".\\build", True, False),
+    ("src/app.py", True, False),
+    ("$HOME\\Desktop", True, True),
+    ("~/Downloads", True, True),
+    ("https://example.com/x", False, False),
+    ("-Recurse", False, False),
+    ("*.tmp", False, False),
+])
+def test_path_heuristics(value, is_path, absolute):
+    assert looks_like_path(value) == is_path
+    if is_path:
+        assert is_absolute_path(value) == absolute
+
+def test_parse_is_cached():
+    assert parse_command("Get-Process") is parse_command("Get-Process")
+    parsed = parse_command("Get-Process")
+    assert parse_command(parsed) is parsed
+
+def test_anti_pattern_ignores_quoted_separators():
+    noisy = 'Write-Host "a;b;c;d|e|f|g|h"'
+    assert AntiPatternDetector.scan(noisy) == []
+    chained = "a; b; c; d"
+    assert "Excessive Chaining Detected (3 commands)" in AntiPatternDetector.scan(chained)
+
+def test_safe_context_uses_referenced_paths():
+    system = SuspensionSystem()
+    assert system._is_safe_context('Remove-Item .\\build -Recurse; Write-Host "Done: C:\\ is fine"') is True
+    assert system._is_safe_context("Remove-Item C:\\Windows\\Temp\\x") is False
+
+def test_sandbox_rewrites_path_tokens_only():
+    sandbox = SandboxManager()
+    sandbox.sandbox_root = os.path.join("sandbox_root")
+    sandbox.is_active = True
+    intent = Intent(intent_type="delete_files", target="Desktop", description="test", risk=RiskLevel.LOW)
+    command = 'Remove-Item "$HOME\\Desktop\\a.txt"; Get-Item $HOME\\DesktopBackup # $HOME\\Desktop'
+    new_cmd, description = sandbox.transform_command(command, intent)
+    desktop = os.path.join("sandbox_root", "Desktop")
+    assert f'Remove-Item "{desktop}\\a.txt"' in new_cmd
+    assert "Get-Item $HOME\\DesktopBackup # $HOME\\Desktop" in new_cmd
+    assert description == "Redirected '$HOME\\Desktop' -> Sandbox"
+
+def test_sandbox_blocks_nested_high_risk_commands():
+    sandbox = SandboxManager()
+    sandbox.is_active = True
+    intent = Intent(intent_type="system", target="service", description="test", risk=RiskLevel.HIGH)
+    _, description = sandbox.transform_command('powershell -Command "Stop-Service Spooler"', intent)
+    assert description == "Blocked High Risk Command"
+    _, description = sandbox.transform_command('Get-Service Spooler | Format-List', intent)
+    assert description == "Executed in Sandbox"
+
+def test_nested_commands_are_found():
+    parsed = parse_command("Get-Service spooler | ForEach-Object { Stop-Service $_ -Force }")
+    assert parsed.commands == ("get-service", "foreach-object")
+    assert parsed.has_command("Stop-Service")
+    assert parse_command("if ($true) { Restart-Computer -Force }").has_command("restart-computer")
+    assert parse_command("$(shutdown /s /t 0)").has_command("shutdown")
+    assert not parse_command("Write-Host $env:Stop").has_command("stop-service")
+
+def test_hashtable_entries_are_not_commands():
+    parsed = parse_command('Get-PSDrive | Select-Object @{Name="x";Expression={Get-Date}}')
+    assert parsed.invoked_commands == ("get-psdrive", "select-object", "get-date")
+    # Values are statements, so a command there still runs
+    assert parse_command("@{a = Stop-Service x}").has_command("stop-service")
+    assert parse_command("@{a=Stop-Service}").has_command("stop-service")
+
+@pytest.mark.parametrize("command", [
+    "Get-Service spooler | ForEach-Object { Stop-Service $_ -Force }",
+    "if ($true) { Restart-Computer -Force }",
+    "$(shutdown /s /t 0)",
+])
+def test_sandbox_blocks_high_risk_commands_in_blocks(command):
+    sandbox = SandboxManager()
+    sandbox.is_active = True
+    intent = Intent(intent_type="system", target="service", description="test", risk=RiskLevel.HIGH)
+    _, description = sandbox.transform_command(command, intent)
+    assert description == "Blocked High Risk Command"
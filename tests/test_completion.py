@@ -0,0 +1,94 @@
+import sys
+import os
+import json
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_nlu import NLUBridge
+from core.completion import Autocomplete, CompletionIndex, load_completion_settings
+from core.user_profile import UserProfile
+
+DAY = 86400.0
+
+def test_ranking_by_frequency_and_recency():
+    index = CompletionIndex(top_k=3, half_life_days=1)
+    now = time.time()
+    index.add("clean temp folder", when=now - 10 * DAY)
+    for _ in range(3):
+        index.add("clean temp files", when=now - 1 * DAY)
+    index.add("Clean Taskbar", when=now)
+    index.add("cleanup disk", when=now)
+
+    # Three uses a day ago (1.5) beat one today (1) and one ten days ago (~0.001)
+    assert index.complete("clean t") == ["clean temp files", "Clean Taskbar", "clean temp folder"]
+    assert index.complete("CLEAN   TEMP ") == ["clean temp files", "clean temp folder"]
+    assert index.complete("clean ", limit=1) == ["clean temp files"]
+    assert index.complete("clean temp files") == []
+    assert index.complete("zzz") == []
+
+    # Recency catches up: two more uses now move the folder to the top
+    index.add("clean temp folder")
+    index.add("clean temp folder")
+    assert index.complete("clean temp")[0] == "clean temp folder"
+
+def test_sources_and_updates(tmp_path):
+    cache_file = tmp_path / "intent_cache.json"
+    bridge = NLUBridge(session=None)
+    bridge.cache = {}
+    bridge.cache_file = str(cache_file)
+    bridge.key_file = str(tmp_path / "intent_cache.key")
+    bridge.cache_successful_execution("list processes", {"intent": "list_processes", "target": "processes",
+                                                         "risk": "low", "description": "List processes",
+                                                         "generated_command": "Get-Process"})
+    # Entries from before utterances were stored are skipped
+    cache = json.loads(cache_file.read_text(encoding="utf-8"))
+    cache["legacy"] = {"intent": "get_date", "risk": "low"}
+    cache_file.write_text(json.dumps(cache), encoding="utf-8")
+
+    profile = UserProfile(str(tmp_path / "user_profile.json"))
+    profile.record_success("clean_temp", "high", "temp klasörünü temizle")
+    macros = tmp_path / "user_macros.ini"
+    macros.write_text("# comment\nBrowser=Start-Process chrome\nBackup_Docs=Copy docs\nbad name=x\n", encoding="utf-8")
+
+    completer = Autocomplete(profile, cache_file=str(cache_file), macros_file=str(macros)).build()
+    assert completer.suggest("list") == ["list processes"]
+    assert completer.suggest("temp") == ["temp klasörünü temizle"]
+    assert completer.suggest("open #b") == ["open #Browser", "open #Backup_Docs"]
+    assert completer.suggest("#") == ["#Browser", "#Backup_Docs"]
+    assert completer.suggest("") == []
+
+    # Successful commands are ranked up at once; used macros too
+    completer.record("list services")
+    completer.record("list services")
+    completer.record("run #Backup_Docs")
+    assert completer.suggest("list") == ["list services", "list processes"]
+    assert completer.suggest("#B") == ["#Backup_Docs", "#Browser"]
+
+    # A macro created meanwhile (through the Kernel) shows up after the next success; usage is kept
+    macros.write_text(macros.read_text(encoding="utf-8") + "Bookmarks=Open bookmarks\n", encoding="utf-8")
+    os.utime(macros, (time.time() + 5, time.time() + 5))
+    completer.record("list services")
+    assert completer.suggest("#Bo") == ["#Bookmarks"]
+    assert completer.suggest("#B")[0] == "#Backup_Docs"
+
+def test_lookup_stays_under_a_millisecond():
+    completer = Autocomplete(cache_file="missing.json", macros_file="missing.ini")
+    words = ["clean", "temp", "list", "show", "kill", "open", "disk", "network", "process", "service"]
+    for i in range(20000):
+        completer.inputs.add(f"{words[i % 10]} {words[i // 10 % 10]} {words[i // 100 % 10]} item {i}", when=time.time() - i)
+
+    prefixes = ["c", "cl", "clean t", "clean temp l", "list s", "open network d", "kill process service item 1"]
+    start = time.perf_counter()
+    for _ in range(200):
+        for prefix in prefixes:
+            assert len(completer.suggest(prefix)) <= 5
+    per_lookup = (time.perf_counter() - start) / (200 * len(prefixes))
+    assert per_lookup < 0.001
+    assert completer.suggest("clean t")[0].startswith("clean temp")
+
+def test_settings(tmp_path):
+    config = tmp_path / "main.ini"
+    config.write_text("[Completion]\nenabled = false\nmax_suggestions = 3\n", encoding="utf-8")
+    assert load_completion_settings(str(config)) == (False, 3, 14.0)
@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.execution import ExecutionManager
+from core.bridge_runner import RunnerBridge
+from core.powershell_session import KERNEL_ENV, PowerShellSession
+from core.result_cache import ResultCache
+from core.schemas import RiskLevel
+from tests.conftest import fake_kernel_command
+
+def test_bridges_round_trip_through_fake_kernel(fake_session):
+    manager = ExecutionManager(fake_session)
+    try:
+        intent, command, risk = manager.process_input("saat kaç", bypass_cache=True)
+        assert intent.intent_type == "get_date" and command == "Get-Date"
+        assert risk.level == RiskLevel.LOW
+
+        # No generated_command: the dispatch bridge asks ConvertTo-SafePowerShellCommand
+        intent, command, _ = manager.process_input("disk kullanımı", bypass_cache=True)
+        assert command.startswith("Get-PSDrive")
+
+        intent, command, risk = manager.process_input("temp klasörünü temizle", bypass_cache=True)
+        assert risk.level in (RiskLevel.HIGH, RiskLevel.VERY_HIGH)
+
+        # Unknown input falls back to the scripted LLM answer
+        intent, _, _ = manager.process_input("bilgisayarımı anlat", bypass_cache=True)
+        assert intent.intent_type == "custom_script" and "bilgisayarımı anlat" in intent.description
+    finally:
+        manager.stage_executor.shutdown()
+
+def test_execution_output_sizes_and_structured_results(fake_session):
+    logs = []
+    runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=fake_session,
+                          result_cache=ResultCache(enabled=False), output_format="json")
+    assert runner.execute("Get-Process | Select-Object Name, Id, CPU | Format-Table")
+    assert len(runner.last_result) == 250
+
+    assert any(msg.startswith("Name") and "CPU" in msg.splitlines()[0] for msg in logs)
+
+    # Recursive listings produce the fixture's 5000 lines of text
+    runner.execute("Get-ChildItem -Path $HOME\\Documents -Recurse")
+    assert runner.last_result is None
+    assert any(len(msg.splitlines()) == 5001 for msg in logs) # Debug line plus the listing
+
+def test_session_selected_through_environment(monkeypatch):
+    command = " ".join(f'"{part}"' for part in fake_kernel_command(latency_scale=1.0))
+    monkeypatch.setenv(KERNEL_ENV, command)
+    session = PowerShellSession()
+    try:
+        assert session.kernel_command[-3:] == ["1.0", "--output-scale", "1.0"]
+        output = session.run_command("$json = Resolve-Intent -UserInput 'what time is it'\nWrite-Output $json")
+        assert '"generated_command": "Get-Date"' in output
+
+        # Scripted latency is real: the LLM fallback (900 ms) outlives a short read timeout
+        output = session.run_command("$json = Resolve-Intent -UserInput 'something new'", timeout=0.2)
+        assert output.endswith("ERROR: TIMEOUT waiting for response")
+    finally:
+        session.close()
@@ -0,0 +1,94 @@
+import sys
+import os
+import threading
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.jobs import JobManager, is_potentially_slow
+from core.schemas import Intent, RiskLevel
+
+class StreamingSession:
+    """Worker Kernel double: streams lines, optionally blocking until closed."""
+    def __init__(self, lines=("scanning C:\\", "42.5 GB"), block=False):
+        self.lines = lines
+        self.block = block
+        self.closed = threading.Event()
+        self.started = threading.Event()
+
+    def run_command(self, script, timeout=None, on_line=None):
+        self.started.set()
+        for line in self.lines:
+            on_line(line)
+        if self.block and self.closed.wait(5):
+            return "\n".join(self.lines) + "\nERROR: Session terminated"
+        return "\n".join(self.lines)
+
+    def close(self):
+        self.closed.set()
+
+def _intent(**extra):
+    return Intent(intent_type="folder_size", target="C:\\", risk=RiskLevel.LOW, description="Folder size", **extra)
+
+def _wait_for(manager, job_id, statuses=("done", "failed", "cancelled")):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        if manager.get(job_id)["status"] in statuses:
+            return manager.get(job_id)
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {manager.get(job_id)['status']}")
+
+def test_slow_detection():
+    assert is_potentially_slow(_intent(potential_slow=True), "Get-Date")
+    assert is_potentially_slow(_intent(), "Measure-FolderSize -Path C:\\")
+    assert is_potentially_slow(_intent(), "Get-ChildItem C:\\ -Recurse -Filter *.log")
+    assert not is_potentially_slow(_intent(), "Get-ChildItem C:\\Users")
+    assert not is_potentially_slow(_intent(), "Write-Output 'Measure-FolderSize'")
+
+def test_job_streams_output_to_disk_and_collects(tmp_path):
+    finished = []
+    manager = JobManager(session_factory=StreamingSession, jobs_dir=str(tmp_path), on_finish=finished.append)
+    job_id = manager.submit("Measure-FolderSize -Path C:\\", _intent(), "c diski ne kadar yer kaplıyor")
+
+    meta = _wait_for(manager, job_id)
+    assert meta["status"] == "done" and meta["lines"] == 2
+    assert manager.tail(job_id, 1) == ["42.5 GB"]
+    assert os.path.exists(tmp_path / job_id / "meta.json")
+
+    collected_meta, output = manager.collect(job_id)
+    assert collected_meta["collected"] and "42.5 GB" in output
+    deadline = time.time() + 5
+    while not finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert finished[0]["id"] == job_id
+
+def test_cancel_kills_worker_and_reload_marks_interrupted(tmp_path):
+    sessions = []
+    def factory():
+        session = StreamingSession(block=True)
+        sessions.append(session)
+        return session
+
+    manager = JobManager(session_factory=factory, jobs_dir=str(tmp_path))
+    running = manager.submit("Find-DuplicateFiles -Path D:\\", _intent())
+    queued = manager.submit("Find-DuplicateFiles -Path E:\\", _intent())
+    _wait_for(manager, running, ("running",))
+    deadline = time.time() + 5
+    while not (sessions and sessions[0].started.is_set()) and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert manager.cancel(queued)
+    assert manager.cancel(running)
+    assert sessions[0].closed.is_set()
+    assert _wait_for(manager, running)["status"] == "cancelled"
+    assert manager.collect(queued)[0]["status"] == "cancelled"
+    assert not manager.cancel(running)
+
+    # A job left "running" by a process that died comes back as interrupted
+    os.makedirs(tmp_path / "deadbeef")
+    (tmp_path / "deadbeef" / "meta.json").write_text(
+        '{"id": "deadbeef", "status": "running", "created_at": 1, "started_at": 1, "lines": 3}', encoding="utf-8")
+    reloaded = JobManager(session_factory=factory, jobs_dir=str(tmp_path))
+    assert reloaded.get("deadbeef")["status"] == "interrupted"
+    assert reloaded.get(running)["status"] == "cancelled"
@@ -0,0 +1,34 @@
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.load_generator import format_report, load_mix, percentile, run_load
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values[:3], 0.99) == 3.0
+    assert percentile([], 0.5) == 0.0
+
+def test_load_mix_formats(tmp_path):
+    weighted = tmp_path / "mix.json"
+    weighted.write_text('{"saat kaç": 3, "list processes": 1}', encoding="utf-8")
+    plain = tmp_path / "mix.txt"
+    plain.write_text("# comment\nsaat kaç\n\nlist processes\n", encoding="utf-8")
+    assert load_mix(str(weighted)) == {"saat kaç": 3.0, "list processes": 1.0}
+    assert load_mix(str(plain)) == {"saat kaç": 1.0, "list processes": 1.0}
+
+def test_closed_and_open_loop_against_fake_kernel():
+    mix = {"saat kaç": 1, "disk kullanımı": 1, "something unknown": 1}
+    report = run_load(mix, concurrency=2, workers=1, duration=0.5, cached=0.34, latency_scale=0, seed=7)
+    assert report["requests"] > 0 and report["outcomes"].get("ok") == report["requests"]
+    assert {"wait", "resolve", "dispatch", "assess", "total"} <= set(report["stages"])
+    assert report["kernel"]["requests"] > 0 and report["kernel"]["restarts"] == 0
+    assert "p99 ms" in format_report(report)
+
+    report = run_load(mix, concurrency=2, workers=1, rate=40, duration=0.5, latency_scale=0, seed=7)
+    assert 5 <= report["requests"] <= 60
+    assert report["settings"]["rate"] == 40
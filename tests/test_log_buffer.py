@@ -0,0 +1,46 @@
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.log_buffer import LogBuffer, load_log_settings, FULL_OUTPUT_TAG, PREVIEW_LINES
+
+def test_batches_are_coalesced_and_bounded(tmp_path):
+    buffer = LogBuffer(max_lines=100, spill_lines=0, spill_dir=str(tmp_path))
+    # Only the first message of a batch asks for a flush
+    assert buffer.append("first", "success") is True
+    assert all(buffer.append(f"line {i}") is False for i in range(299))
+
+    batch = buffer.drain()
+    assert not batch.reset
+    assert len(batch.lines) == 100 and batch.lines[-1] == ("line 298", "normal")
+    assert len(buffer.lines) == 100
+    assert buffer.drain() is None
+
+    assert buffer.clear() is True
+    assert buffer.append("after clear") is False
+    batch = buffer.drain()
+    assert batch.reset and batch.lines == [("after clear", "normal")]
+    assert buffer.text() == "after clear"
+
+def test_large_output_spills_to_file(tmp_path):
+    buffer = LogBuffer(max_lines=1000, spill_lines=500, spill_dir=str(tmp_path))
+    output = "\n".join(f"row {i}" for i in range(5000))
+    buffer.append(output, "normal")
+
+    lines = buffer.drain().lines
+    assert len(lines) == PREVIEW_LINES + 1
+    marker, tag = lines[-1]
+    assert tag == FULL_OUTPUT_TAG and "4,960 more lines" in marker
+    path = buffer.spill_path(marker[marker.rfind("(") + 1:].rstrip(")"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == output
+
+    buffer.clear()
+    assert not os.path.exists(path)
+
+def test_settings(tmp_path):
+    config = tmp_path / "main.ini"
+    config.write_text("[Overlay]\nmax_lines = 300\n", encoding="utf-8")
+    assert load_log_settings(str(config)) == (300, 500)
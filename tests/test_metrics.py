@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import threading
+import http.client
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.metrics import REGISTRY, MetricsExporter, MetricsRegistry, format_metrics
+from core.execution import ExecutionManager
+from core.schemas import Intent, RiskLevel
+
+class NullSession:
+    def run_command(self, script):
+        return "ERROR: no kernel"
+
+    def close(self):
+        pass
+
+class DictNLU:
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.cache_hits = 0
+
+    def resolve_intent(self, user_input, bypass_cache=False):
+        return Intent(intent_type="get_date", target="clock", risk=RiskLevel.LOW, description="Date",
+                      generated_command="Get-Date")
+
+def test_counter_gauge_histogram_and_prometheus_text():
+    registry = MetricsRegistry()
+    hits = registry.counter("cache_lookups_total", "Cache lookups")
+    hits.inc(result="hit")
+    hits.inc(2, result="miss")
+    active = registry.gauge("jobs_running")
+    active.inc()
+    active.dec()
+    latency = registry.histogram("stage_seconds", "Stage time", buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 3.0):
+        latency.observe(value, stage='resolve "llm"')
+
+    assert hits.value(result="miss") == 2
+    assert latency.count(stage='resolve "llm"') == 4
+    assert latency.quantile(0.5, stage='resolve "llm"') == 0.01
+
+    text = registry.render_prometheus()
+    assert "# TYPE cache_lookups_total counter" in text
+    assert 'cache_lookups_total{result="hit"} 1' in text
+    assert "jobs_running 0" in text
+    # Cumulative buckets, escaped label values, +Inf bucket equals _count
+    assert 'stage_seconds_bucket{stage="resolve \\"llm\\"",le="0.01"} 2' in text
+    assert 'stage_seconds_bucket{stage="resolve \\"llm\\"",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="resolve \\"llm\\""} 4' in text
+    assert "cache_lookups_total" in format_metrics(registry)
+
+def test_exporter_writes_prometheus_and_json(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("kernel_requests_total").inc(3)
+    exporter = MetricsExporter(registry, prometheus_file=str(tmp_path / "m.prom"), json_file=str(tmp_path / "m.json"))
+    exporter.write()
+    assert "kernel_requests_total 3" in (tmp_path / "m.prom").read_text(encoding="utf-8")
+    snapshot = json.loads((tmp_path / "m.json").read_text(encoding="utf-8"))
+    assert snapshot["metrics"]["kernel_requests_total"]["values"][""] == 3
+
+def test_pipeline_and_sentinel_are_instrumented():
+    stages = REGISTRY.get("intentshell_stage_seconds")
+    assessments = REGISTRY.get("intentshell_risk_assessments_total")
+    resolve_before = stages.count(stage="resolve")
+    low_before = assessments.value(level="low")
+
+    manager = ExecutionManager(NullSession(), nlu_bridge=DictNLU())
+    manager.process_input("saat kaç")
+    manager.close()
+
+    assert stages.count(stage="resolve") == resolve_before + 1
+    assert assessments.value(level="low") == low_before + 1
+
+def test_server_exposes_prometheus_text():
+    from core.server import IntentShellAPI, ManagerPool, create_server
+    pool = ManagerPool(workers=1, queue_size=0, manager_factory=lambda cache: ExecutionManager(NullSession(), nlu_bridge=DictNLU(cache)))
+    httpd = create_server(IntentShellAPI(pool), port=0, token="secret")
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection(*httpd.server_address[:2], timeout=5)
+        auth = {"Authorization": "Bearer secret"}
+        conn.request("GET", "/metrics?format=prometheus", headers=auth)
+        response = conn.getresponse()
+        body = response.read().decode("utf-8")
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/plain")
+        assert "# TYPE intentshell_kernel_requests_total counter" in body
+
+        conn.request("GET", "/metrics", headers=auth)
+        payload = json.loads(conn.getresponse().read())
+        assert payload["registry"]["intentshell_api_requests_total"]["type"] == "counter"
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        pool.close()
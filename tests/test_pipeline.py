@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.pipeline import StagedPipeline
+from core.execution import ExecutionManager
+from core.schemas import Intent, RiskLevel
+
+class NullSession:
+    """Kernel stand-in: the Python Sentinel fast path never needs it for low risk."""
+    def __init__(self):
+        self.calls = 0
+
+    def run_command(self, script):
+        self.calls += 1
+        return "ERROR: no kernel"
+
+class DictNLU:
+    def __init__(self, intents):
+        self.intents = intents
+
+    def resolve_intent(self, user_input, bypass_cache=False):
+        return self.intents[user_input]
+
+class TrustProfile:
+    def get_trust_modifier(self, intent_type):
+        return 0.3 if intent_type == "get_date" else 0.0
+
+def test_independent_stages_overlap():
+    executor = ThreadPoolExecutor(max_workers=4)
+    barrier = threading.Barrier(2, timeout=2)
+    pipeline = StagedPipeline(executor)
+    pipeline.add("root", lambda r: 1)
+    # Both stages must be running at the same time to pass the barrier
+    def meet(value):
+        barrier.wait()
+        return value
+    pipeline.add("left", lambda r: meet(r["root"] + 1), after=["root"])
+    pipeline.add("right", lambda r: meet(r["root"] + 2), after=["root"])
+    pipeline.add("join", lambda r: r["left"] + r["right"], after=["left", "right"])
+
+    results, timings = pipeline.run()
+    assert results["join"] == 5
+    assert set(timings) == {"root", "left", "right", "join"}
+    executor.shutdown()
+
+def test_stage_errors_propagate_and_skip_dependents():
+    ran = []
+    pipeline = StagedPipeline(ThreadPoolExecutor(max_workers=2))
+    pipeline.add("boom", lambda r: 1 / 0)
+    pipeline.add("after", lambda r: ran.append("after"), after=["boom"])
+    with pytest.raises(ZeroDivisionError):
+        pipeline.run()
+    assert ran == []
+
+def test_unknown_dependencies_and_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        StagedPipeline().add("a", lambda r: 1, after=["missing"]).run()
+    cycle = StagedPipeline().add("a", lambda r: 1, after=["b"]).add("b", lambda r: 1, after=["a"])
+    with pytest.raises(ValueError):
+        cycle.run()
+
+def test_process_input_returns_stage_timings():
+    intent = Intent(intent_type="get_date", target="clock", description="Date", risk=RiskLevel.LOW, generated_command="Get-Date")
+    manager = ExecutionManager(NullSession(), nlu_bridge=DictNLU({"saat kaç": intent}), profile=TrustProfile())
+
+    resolved, command, risk, timings = manager.process_input("  saat kaç​ ", with_timings=True)
+    assert resolved.intent_type == "get_date"
+    assert command == "Get-Date"
+    assert risk.level == RiskLevel.LOW
+    assert {"normalize", "cache_lookup", "resolve", "dispatch", "prescan", "trust", "assess", "total"} <= set(timings)
+    assert manager.process_input("saat kaç", with_trust=True)[3] == 0.3
+
+    # Default shape is unchanged
+    assert len(manager.process_input("saat kaç")) == 3
+
+def test_prescan_findings_are_reused_by_assess(monkeypatch):
+    from core.security.anti_pattern import AntiPatternDetector
+    scans = []
+    original = AntiPatternDetector.scan
+    monkeypatch.setattr(AntiPatternDetector, "scan", staticmethod(lambda command: scans.append(command) or original(command)))
+    intent = Intent(intent_type="chain", target="x", description="Chain", risk=RiskLevel.LOW, generated_command="a; b; c; d")
+    manager = ExecutionManager(NullSession(), nlu_bridge=DictNLU({"chain": intent}))
+
+    _, _, risk = manager.process_input("chain")
+    assert len(scans) == 1
+    assert "Excessive Chaining Detected (3 commands)" in risk.reasons
@@ -0,0 +1,130 @@
+import sys
+import os
+import threading
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_nlu import NLUBridge, LLM_FALLBACKS
+from core.cancellation import CancellationToken
+from core.execution import ExecutionManager
+from core.prefetch import SpeculativePrefetcher, TokenBucket, PREFETCHES, load_prefetch_settings
+
+class RecordingResolver:
+    def __init__(self, gate: threading.Event = None):
+        self.calls = []
+        self.tokens = []
+        self.gate = gate
+
+    def __call__(self, text, token):
+        self.calls.append(text)
+        self.tokens.append(token)
+        if self.gate is not None:
+            while not self.gate.wait(0.01):
+                if token.cancelled:
+                    return None
+        return f"intent for {text}"
+
+def test_debounced_and_reused_on_enter():
+    resolver = RecordingResolver()
+    prefetcher = SpeculativePrefetcher(resolver, debounce_ms=50, min_chars=3)
+    for text in ["li", "lis", "list p", "list processes"]:
+        prefetcher.update(text)
+    time.sleep(0.3)
+    # Only the text the user paused on was resolved
+    assert resolver.calls == ["list processes"]
+    # Typing the same text again doesn't resolve it twice
+    prefetcher.update("List Processes ")
+    time.sleep(0.15)
+    assert len(resolver.calls) == 1
+
+    hits = PREFETCHES.value(outcome="hit")
+    assert prefetcher.take(" List Processes") == "intent for list processes"
+    assert PREFETCHES.value(outcome="hit") == hits + 1
+    # Taken once
+    assert prefetcher.take("list processes") is None
+
+def test_edits_inside_quotes_are_resolved_again():
+    resolver = RecordingResolver()
+    prefetcher = SpeculativePrefetcher(resolver, debounce_ms=10, min_chars=3)
+    prefetcher.update("echo 'a b'")
+    time.sleep(0.1)
+    prefetcher.update("echo 'a  b'")
+    time.sleep(0.1)
+    assert resolver.calls == ["echo 'a b'", "echo 'a  b'"]
+    assert prefetcher.take("echo 'a  b'") == "intent for echo 'a  b'"
+
+def test_in_flight_result_is_awaited_and_others_cancelled():
+    gate = threading.Event()
+    resolver = RecordingResolver(gate)
+    prefetcher = SpeculativePrefetcher(resolver, debounce_ms=10, min_chars=3)
+    prefetcher.update("show disk usage")
+    time.sleep(0.1)
+    threading.Timer(0.1, gate.set).start()
+    # Enter while the speculation is still running: wait for it rather than resolve again
+    assert prefetcher.take("show disk usage") == "intent for show disk usage"
+
+    gate.clear()
+    prefetcher.update("clean temp")
+    time.sleep(0.1)
+    assert resolver.calls[-1] == "clean temp"
+    # Enter on different text: the speculation is cancelled so the Kernel is free for the real request
+    assert prefetcher.take("clean temp files") is None
+    assert resolver.tokens[-1].cancelled
+
+    # Cancelling the real request while waiting also drops the speculation
+    prefetcher.update("list services")
+    time.sleep(0.1)
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel).start()
+    assert prefetcher.take("list services", cancel_token=token) is None
+    assert resolver.tokens[-1].cancelled
+    gate.set()
+
+def test_limits():
+    resolver = RecordingResolver()
+    busy = {"value": False}
+    prefetcher = SpeculativePrefetcher(resolver, debounce_ms=10, min_chars=4, max_per_minute=0, burst=2,
+                                       is_idle=lambda: not busy["value"])
+    prefetcher.update("abc") # Below min_chars
+    busy["value"] = True
+    prefetcher.update("while a request runs")
+    time.sleep(0.1)
+    assert resolver.calls == []
+
+    busy["value"] = False
+    for text in ["first text", "second text", "third text"]:
+        prefetcher.update(text)
+        time.sleep(0.1)
+    # Bucket of 2 that never refills
+    assert resolver.calls == ["first text", "second text"]
+
+    bucket = TokenBucket(per_minute=600, burst=1)
+    assert bucket.take() and not bucket.take()
+    time.sleep(0.12)
+    assert bucket.take()
+
+def test_speculative_resolve_never_reaches_the_llm(fake_session):
+    nlu = NLUBridge(fake_session)
+    nlu.cache = {}
+    manager = ExecutionManager(fake_session, nlu_bridge=nlu)
+    try:
+        llm_calls = LLM_FALLBACKS.value()
+        assert manager.resolve_speculatively("what time is it").intent_type == "get_date"
+        # A registry miss would go to the LLM; speculatively it is just not prefetched
+        assert manager.resolve_speculatively("write me a poem about disks") is None
+        assert LLM_FALLBACKS.value() == llm_calls
+
+        resolved = manager.resolve_speculatively("what time is it")
+        intent, command, risk = manager.process_input("what time is it", resolved=resolved)
+        assert intent is resolved
+        _, plain_command, plain_risk = manager.process_input("what time is it")
+        assert command == plain_command and risk.level == plain_risk.level
+    finally:
+        manager.stage_executor.shutdown(wait=False)
+
+def test_settings(tmp_path):
+    config = tmp_path / "main.ini"
+    config.write_text("[Prefetch]\nenabled = false\nburst = 1\n", encoding="utf-8")
+    assert load_prefetch_settings(str(config)) == (False, 300, 4, 20, 1)
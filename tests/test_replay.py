@@ -0,0 +1,66 @@
+import sys
+import os
+import gzip
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_runner import RunnerBridge
+from core.execution import ExecutionManager
+from core.powershell_session import PowerShellSession
+from core.replay import NO_RECORDING_RESPONSE, REPLAY_ENV, ReplaySession, SessionRecorder, load_recording, open_session
+from core.result_cache import ResultCache
+from tests.conftest import fake_kernel_command
+
+INPUTS = ["saat kaç", "disk kullanımı", "temp klasörünü temizle", "bilgisayarımı anlat"]
+
+def _run_workload(session):
+    manager = ExecutionManager(session)
+    results = [manager.process_input(text, bypass_cache=True) for text in INPUTS]
+    manager.stage_executor.shutdown()
+    logs = []
+    runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=session,
+                          result_cache=ResultCache(enabled=False), output_format="json")
+    runner.execute("Get-Process | Select-Object Name, Id, CPU")
+    return [(i.intent_type, cmd, r.level) for i, cmd, r in results], len(runner.last_result), logs
+
+def test_recorded_traffic_replays_identically(tmp_path):
+    path = str(tmp_path / "traffic.jsonl.gz")
+    recorder = SessionRecorder(path, secrets=["gsk_secret"])
+    live = PowerShellSession(kernel_command=fake_kernel_command(), recorder=recorder)
+    try:
+        expected = _run_workload(live)
+    finally:
+        live.close()
+        recorder.close()
+
+    entries = load_recording(path)
+    assert entries and not any("SESSION_READY" in e["script"] for e in entries) # No init script (API key)
+    assert all(e["ms"] > 0 for e in entries)
+
+    replay = ReplaySession(path, speed=0)
+    assert _run_workload(replay) == expected
+    assert replay.misses == 0 and replay.hits == len(entries)
+    assert replay.run_command("Get-Unrecorded") == NO_RECORDING_RESPONSE
+
+def test_replay_speed_secrets_and_truncated_files(tmp_path, monkeypatch):
+    path = str(tmp_path / "slow.jsonl.gz")
+    recorder = SessionRecorder(path, secrets=["gsk_secret"])
+    recorder.record("Invoke-Thing -Key 'gsk_secret'", "token gsk_secret used", 0.2)
+    recorder.record("Get-Date", "10:42", 0.001)
+    recorder.close()
+    # A crash mid-write leaves a gzip member without its trailer
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"t":1,"script":"Get-Date","output":"lost","ms":1}\n')[:-12])
+
+    entries = load_recording(path)
+    assert [e["output"] for e in entries][:2] == ["token *** used", "10:42"]
+
+    monkeypatch.setenv(REPLAY_ENV, path)
+    session = open_session()
+    assert isinstance(session, ReplaySession)
+    start = time.perf_counter()
+    assert session.run_command("Invoke-Thing -Key '***'") == "token *** used"
+    assert time.perf_counter() - start >= 0.19 # Recorded latency is honoured at speed 1
+    assert session.run_command("Invoke-Thing -Key '***'", timeout=0.05) == "ERROR: TIMEOUT waiting for response"
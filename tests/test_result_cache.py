@@ -0,0 +1,121 @@
+import sys
+import os
+import re
+import time
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.result_cache import ResultCache, is_read_only_command
+from core.bridge_runner import RunnerBridge
+from core.schemas import Intent, RiskLevel
+
+class CountingSession:
+    def __init__(self, output="Intel(R) Core(TM) i7"):
+        self.output = output
+        self.calls = 0
+
+    def run_command(self, script):
+        self.calls += 1
+        return self.output
+
+def _intent(intent_type="get_cpu_model", risk=RiskLevel.LOW):
+    return Intent(intent_type=intent_type, target="CPU", description="CPU model", risk=risk)
+
+@pytest.mark.parametrize("command,expected", [
+    ("(Get-WmiObject -Class Win32_Processor).Name", True),
+    ("Get-CimInstance Win32_Processor | Select-Object Name, NumberOfCores | Format-List", True),
+    ("Get-Process | Where-Object { $_.CPU -gt 10 } | Sort-Object CPU", True),
+    ("Test-Connection 8.8.8.8 -Count 1", True),
+    ("Get-Process | Stop-Process", False),
+    ("Get-Process | Where-Object { Remove-Item $_.Path }", False),
+    ("Get-Item C:\\x | % { rm $_ }", False),
+    ("(Get-Process notepad).Kill()", False),
+    ("[IO.File]::Delete('C:\\x')", False),
+    ("Get-Content a.txt > b.txt", False),
+    ("$cpu = Get-CimInstance Win32_Processor", False),
+    ("Write-Output \"$(Remove-Item x)\"", False),
+    ("Get-Date", True),
+    ('Get-PSDrive | Select-Object @{Name="x";Expression={1}}', True),
+    ("Get-Process | Select-Object @{\n  Name = 'x'\n  Expression = { $_.Id }\n}", True),
+    ('Get-Process | Select-Object @{Name="x";Expression={Stop-Process $_}}', False),
+    ("@{a = Remove-Item x}", False),
+    (". .\\profile.ps1", False),
+    ("Get-Service # ; Stop-Service Spooler", True),
+])
+def test_read_only_classification_uses_lexer(command, expected):
+    assert is_read_only_command(command) == expected
+
+def _registry_templates():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "engine", "kernel", "Registry.psm1")
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    for block in re.findall(r'Register-Intent -Name "(\w+)" -Definition @\{(.*?)\n\}', source, re.S):
+        name, body = block
+        template = re.search(r"command_template = (?:'(.*)'|\"(.*)\")", body)
+        yield name, template.group(1) if template.group(1) is not None else template.group(2)
+
+def test_registry_query_templates_are_read_only():
+    templates = dict(_registry_templates())
+    actions = {"flush_dns", "renew_ip", "show_wifi_profiles", "lock_screen", "shutdown_abort"}
+    for name, template in templates.items():
+        assert is_read_only_command(template) == (name not in actions), name
+    cache = ResultCache()
+    assert cache.is_cacheable(templates["get_gpu_info"], _intent("get_gpu_info"))
+    # Read-only, so it doesn't wipe the cache, but never stored
+    assert not cache.is_cacheable(templates["get_uptime"], _intent("get_uptime"))
+
+def test_runner_serves_fresh_entries_with_marker():
+    cache = ResultCache(ttls={"get_cpu_model": 86400})
+    session = CountingSession()
+    logs = []
+    runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=session, result_cache=cache)
+    command = "(Get-CimInstance Win32_Processor).Name"
+
+    assert runner.execute(command, _intent())
+    assert runner.execute(command, _intent())
+    assert session.calls == 1
+    assert "(cached 0 s ago)" in logs
+    assert logs.count("Intel(R) Core(TM) i7") == 2
+
+    # Bypass and explicit invalidation both go back to the Kernel
+    runner.execute(command, _intent(), use_cache=False)
+    assert session.calls == 2
+    assert cache.invalidate("get_cpu_model") == 1
+    runner.execute(command, _intent())
+    assert session.calls == 3
+
+def test_ttl_risk_and_mutations():
+    cache = ResultCache(ttls={"get_ip_address": 0.05, "get_cpu_usage": 0}, default_ttl=10)
+    ip = _intent("get_ip_address")
+    cache.put("Get-NetIPAddress", ip, "10.0.0.2")
+    assert cache.get("Get-NetIPAddress", ip)[0] == "10.0.0.2"
+    time.sleep(0.06)
+    assert cache.get("Get-NetIPAddress", ip) is None
+
+    # TTL 0 and non-low risk are never cached
+    assert not cache.is_cacheable("Get-Counter", _intent("get_cpu_usage"))
+    assert not cache.is_cacheable("Get-ChildItem", _intent("list_files", RiskLevel.MEDIUM))
+
+    # Executing a command that isn't a read-only query drops everything
+    cache.put("Get-CimInstance Win32_Processor", _intent(), "i7")
+    runner = RunnerBridge(lambda msg, style="info": None, session=CountingSession("done"), result_cache=cache)
+    runner.execute("Set-ItemProperty HKCU:\\x -Name a -Value 1", _intent("set_registry"))
+    assert len(cache) == 0
+
+def test_uncached_read_only_queries_keep_the_cache():
+    cache = ResultCache(ttls={"get_cpu_usage": 0}, default_ttl=10)
+    cache.put("Get-CimInstance Win32_Processor", _intent(), "i7")
+    runner = RunnerBridge(lambda msg, style="info": None, session=CountingSession("12%"), result_cache=cache)
+    # Live usage (TTL 0) is never cached, but it is read-only: nothing to invalidate
+    runner.execute("Get-Counter '\\Processor(_Total)\\% Processor Time'", _intent("get_cpu_usage"))
+    assert cache.get("Get-CimInstance Win32_Processor", _intent())[0] == "i7"
+
+def test_ttls_from_config(tmp_path):
+    config = tmp_path / "main.ini"
+    config.write_text("[ResultCache]\nenabled = true\ndefault_ttl = 5\nget_cpu_model = 86400\nbad = x\n", encoding="utf-8")
+    cache = ResultCache.from_config(str(config))
+    assert cache.ttl_for("get_cpu_model") == 86400
+    assert cache.ttl_for("GET_CPU_MODEL") == 86400
+    assert cache.ttl_for("other") == 5
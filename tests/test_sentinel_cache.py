@@ -0,0 +1,74 @@
+import sys
+import os
+import json
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_sentinel import SentinelBridge, AssessmentCache
+from core.schemas import Intent, RiskLevel
+
+class CountingSession:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def run_command(self, script):
+        self.calls += 1
+        return self.response
+
+def _intent(**overrides):
+    data = dict(intent_type="get_registry_value", target="HKLM", risk=RiskLevel.LOW, description="Query registry")
+    data.update(overrides)
+    return Intent(**data)
+
+def test_repeated_assessments_skip_kernel_but_keep_accounting():
+    session = CountingSession(json.dumps({"level": "high", "score": 60, "reasons": ["Destructive"]}))
+    bridge = SentinelBridge(session)
+    bridge.kernel_check = "always"
+    command = "Remove-Item  C:\\temp\\a.txt"
+
+    first = bridge.assess(_intent(), command)
+    first.reasons.append("mutated by caller")
+    second = bridge.assess(_intent(), "Remove-Item C:\\temp\\a.txt ")
+
+    assert session.calls == 1
+    assert second.level == RiskLevel.HIGH
+    assert "mutated by caller" not in second.reasons
+    # SuspensionSystem saw both HIGH assessments
+    assert len(bridge.suspension_system.suspension_reasons) == 2
+
+def test_risk_relevant_intent_fields_are_part_of_the_key():
+    session = CountingSession(json.dumps({"level": "low", "score": 0, "reasons": []}))
+    bridge = SentinelBridge(session)
+    bridge.kernel_check = "always"
+
+    bridge.assess(_intent(), "Get-ItemProperty HKLM:\\Software")
+    bridge.assess(_intent(recursive=True), "Get-ItemProperty HKLM:\\Software")
+    bridge.assess(_intent(description="Same command, other wording"), "Get-ItemProperty HKLM:\\Software")
+    assert session.calls == 2
+
+    bridge.engine_version = "changed"
+    bridge.assess(_intent(), "Get-ItemProperty HKLM:\\Software")
+    assert session.calls == 3
+
+def test_invalid_kernel_output_is_not_memoised():
+    session = CountingSession("not json")
+    bridge = SentinelBridge(session)
+    bridge.kernel_check = "always"
+    bridge.assess(_intent(), "Get-Date")
+    bridge.assess(_intent(), "Get-Date")
+    assert session.calls == 2
+
+def test_cache_is_bounded_and_expires(monkeypatch):
+    cache = AssessmentCache(max_entries=2, ttl_seconds=10)
+    session = CountingSession(json.dumps({"level": "low", "score": 0, "reasons": []}))
+    assessment = SentinelBridge(session, assessment_cache=cache)._parse_output(session.response)
+    for key in ["a", "b", "c"]:
+        cache.put(key, assessment)
+    assert len(cache) == 2 and cache.get("a") is None
+
+    import core.bridge_sentinel as sentinel_module
+    now = sentinel_module.time.time()
+    monkeypatch.setattr(sentinel_module.time, "time", lambda: now + 11)
+    assert cache.get("c") is None
@@ -0,0 +1,186 @@
+import sys
+import os
+import json
+import threading
+import http.client
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.server import ApiError, IntentShellAPI, ManagerPool, create_server, write_token_file
+from core.execution import ExecutionManager
+from core.schemas import Intent, RiskLevel
+
+INTENTS = {
+    "saat kaç": dict(intent_type="get_date", target="clock", risk=RiskLevel.LOW, generated_command="Get-Date"),
+    "windows temizle": dict(intent_type="delete_files", target="C:\\Windows", risk=RiskLevel.HIGH,
+                            generated_command="Remove-Item C:\\Windows\\* -Recurse -Force"),
+}
+
+class KernelStub:
+    def __init__(self):
+        self.executed = []
+
+    def run_command(self, script):
+        if "Invoke-SafePowerShell" in script:
+            self.executed.append(script)
+            return "done"
+        return "ERROR: no kernel"
+
+    def close(self):
+        pass
+
+class CachedNLU:
+    def __init__(self, cache):
+        self.cache = cache
+        self.cache_hits = 0
+
+    def lookup_cache(self, text, bypass_cache=False):
+        if not bypass_cache and text in INTENTS:
+            self.cache_hits += 1
+            return Intent(description=text, **INTENTS[text])
+        return None
+
+    def resolve_intent(self, text, bypass_cache=False):
+        if text in INTENTS:
+            return Intent(description=text, **INTENTS[text])
+        return Intent(intent_type="unknown", target="system", risk=RiskLevel.LOW, description="not found")
+
+def make_manager(shared_cache):
+    return ExecutionManager(KernelStub(), nlu_bridge=CachedNLU(shared_cache))
+
+@pytest.fixture
+def server():
+    pool = ManagerPool(workers=2, queue_size=0, manager_factory=make_manager)
+    api = IntentShellAPI(pool)
+    httpd = create_server(api, port=0, token="secret")
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    pool.close()
+
+def call(httpd, method, path, body=None, token="secret", headers=None):
+    conn = http.client.HTTPConnection(*httpd.server_address[:2], timeout=5)
+    headers = dict({"Content-Type": "application/json"}, **(headers or {}))
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+def test_process_assess_and_metrics(server):
+    status, payload = call(server, "POST", "/process", {"input": "saat kaç"})
+    assert status == 200
+    assert payload["intent"]["intent_type"] == "get_date"
+    assert payload["risk"]["level"] == "low"
+    assert "assess" in payload["timings_ms"]
+
+    status, payload = call(server, "POST", "/assess", {"intent": {"intent_type": "x", "target": "C:\\Windows\\System32", "description": "d", "risk": "low"}, "command": "Remove-Item C:\\Windows\\System32\\x"})
+    assert status == 200 and payload["risk"]["level"] == "high"
+
+    status, payload = call(server, "GET", "/metrics")
+    assert payload["requests"]["/process"] == 1
+    assert payload["cache_hit_rate"] == 1.0
+    assert payload["pool"]["workers"] == 2
+
+def test_execute_requires_confirmation(server):
+    status, payload = call(server, "POST", "/execute", {"input": "saat kaç"})
+    assert status == 403
+    status, payload = call(server, "POST", "/execute", {"input": "windows temizle", "confirmed": True})
+    assert status == 403 and "allow_high_risk" in payload["error"]
+    status, payload = call(server, "POST", "/execute", {"input": "saat kaç", "confirmed": True})
+    assert status == 200 and payload["success"] is True
+
+def test_dry_run_never_executes(server):
+    status, payload = call(server, "POST", "/dry-run", {"input": "saat kaç"})
+    assert status == 200
+    assert any("Would execute: Get-Date" in line for line in payload["dry_run"])
+
+def test_auth_and_validation(server):
+    assert call(server, "GET", "/health", token=None)[0] == 401
+    assert call(server, "POST", "/process", {"input": ""})[0] == 400
+    assert call(server, "GET", "/nope")[0] == 404
+
+def test_bad_content_length_is_a_client_error(server):
+    for length in ("abc", "-5"):
+        status, payload = call(server, "POST", "/process", headers={"Content-Length": length})
+        assert status == 400 and payload["error"] == "Invalid Content-Length"
+
+def test_ipv6_loopback_bind():
+    try:
+        httpd = create_server(IntentShellAPI(pool=None), host="::1", port=0, token="secret")
+    except OSError:
+        pytest.skip("IPv6 loopback not available")
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection("::1", httpd.server_address[1], timeout=5)
+        conn.request("GET", "/health")
+        assert conn.getresponse().status == 401 # Reached the handler
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def test_full_queue_is_rejected():
+    pool = ManagerPool(workers=1, queue_size=0, manager_factory=make_manager)
+    api = IntentShellAPI(pool)
+    held = pool.acquire()
+    with pytest.raises(ApiError) as error:
+        api.handle("POST", "/process", {"input": "saat kaç"})
+    assert error.value.status == 503
+    pool.release(held)
+    assert api.handle("POST", "/process", {"input": "saat kaç"})["command"] == "Get-Date"
+    assert api.metrics.snapshot()["rejected"] == 1
+    pool.close()
+
+def test_non_loopback_bind_is_refused():
+    with pytest.raises(ValueError):
+        create_server(IntentShellAPI(pool=None), host="0.0.0.0", port=0)
+
+def test_browser_requests_are_refused(server):
+    execute = {"input": "saat kaç", "confirmed": True, "allow_high_risk": True}
+    # A "simple" cross-site POST needs no preflight, so it must never be accepted
+    assert call(server, "POST", "/execute", execute, headers={"Content-Type": "text/plain"})[0] == 415
+    assert call(server, "POST", "/execute", execute, headers={"Origin": "https://evil.example"})[0] == 403
+    # DNS rebinding: right address, foreign Host header
+    assert call(server, "POST", "/execute", execute, headers={"Host": "evil.example:8765"})[0] == 403
+    assert call(server, "GET", "/health", headers={"Host": "localhost:8765"})[0] == 200
+    managers = server.RequestHandlerClass.api.pool._managers
+    assert all(manager.session.executed == [] for manager in managers)
+
+def test_a_token_is_always_required(tmp_path):
+    with pytest.raises(ValueError):
+        create_server(IntentShellAPI(pool=None), port=0)
+    token_file = tmp_path / "api_token"
+    token_file.write_text("old", encoding="utf-8")
+    os.chmod(token_file, 0o644)
+    write_token_file("new", str(token_file))
+    assert token_file.read_text(encoding="utf-8") == "new"
+    if os.name == "posix":
+        assert token_file.stat().st_mode & 0o777 == 0o600
+
+@pytest.mark.skipif(not hasattr(os, "umask") or os.name != "posix", reason="Unix sockets only")
+def test_unix_socket_is_private(tmp_path):
+    socket_path = str(tmp_path / "api.sock")
+    httpd = create_server(IntentShellAPI(pool=None), socket_path=socket_path, token="secret")
+    try:
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+    finally:
+        httpd.server_close()
+
+def test_assess_does_not_charge_the_suspension_budget():
+    pool = ManagerPool(workers=2, queue_size=0, manager_factory=make_manager)
+    api = IntentShellAPI(pool)
+    suspension = pool._managers[0].sentinel.suspension_system
+    body = {"intent": {"intent_type": "x", "target": "C:\\Windows\\System32", "description": "d", "risk": "low"},
+            "command": "Remove-Item C:\\Windows\\System32\\x; Remove-Item C:\\Windows\\y; a; b"}
+    for _ in range(10):
+        api.handle("POST", "/assess", body)
+    assert not suspension.is_suspended() and suspension.cumulative_risk_score == 0.0
+    pool.close()
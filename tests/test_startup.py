@@ -0,0 +1,39 @@
+import sys
+import os
+import subprocess
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cumulative `import main` budget in ms (generous for slow CI machines; ~60 ms on a laptop)
+IMPORT_BUDGET_MS = float(os.getenv("INTENTSHELL_IMPORT_BUDGET_MS", "400"))
+
+def _importtime(statement: str) -> dict:
+    """Module -> cumulative import time in microseconds, from `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def test_main_defers_heavy_imports_and_stays_within_budget():
+    modules = _importtime("import main")
+    # The bridges (pydantic), Tk dialogs and jobs load in main() while the Kernel starts
+    for heavy in ("pydantic", "core.schemas", "core.bridge_nlu", "tkinter", "ui.security_dialogs", "rich.prompt"):
+        assert heavy not in modules, f"{heavy} is imported at module load"
+    assert modules["main"] / 1000 < IMPORT_BUDGET_MS
+
+def test_session_module_does_not_pull_in_the_gui():
+    modules = _importtime("import core.powershell_session")
+    assert "tkinter" not in modules and "ui.security_dialogs" not in modules
+
+def test_overlay_warmup_loads_the_bridges_lazily():
+    # The overlay imports core.warmup on the Tk thread; pydantic loads on the warm-up thread
+    modules = _importtime("import core.warmup, core.user_profile")
+    assert "pydantic" not in modules and "core.bridge_nlu" not in modules
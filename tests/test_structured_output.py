@@ -0,0 +1,110 @@
+import sys
+import os
+import base64
+import gzip
+import json
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.structured_output import MARKER, ResultView, StructuredResult, parse_output, strip_formatting
+from core.bridge_runner import RunnerBridge
+from core.result_cache import ResultCache
+from core.schemas import Intent, RiskLevel
+
+PROCESSES = [
+    {"Name": "chrome", "Id": 4120, "CPU": 812.5},
+    {"Name": "explorer", "Id": 3312, "CPU": 95.25},
+    {"Name": "Idle", "Id": 0, "CPU": None},
+    {"Name": "code", "Id": 9001, "CPU": 240.0},
+]
+
+def _marker(fmt, text):
+    return f"{MARKER}{fmt}:" + base64.b64encode(gzip.compress(text.encode("utf-8"))).decode("ascii")
+
+def _encoded(command):
+    return base64.b64encode(command.encode("utf-16le")).decode("ascii")
+
+class StructuredSession:
+    def __init__(self):
+        self.scripts = []
+
+    def run_command(self, script):
+        self.scripts.append(script)
+        return "DEBUG: ExecutionEngine received Command: 'Get-Process'\n" + _marker("json", json.dumps(PROCESSES))
+
+@pytest.mark.parametrize("command,expected", [
+    ("Get-Process | Sort-Object CPU | Format-Table -AutoSize", "Get-Process | Sort-Object CPU"),
+    ("Get-NetIPAddress | ft IPAddress, InterfaceAlias | Out-String", "Get-NetIPAddress | Select-Object IPAddress, InterfaceAlias"),
+    ("Get-Service | ft Name,Status -AutoSize", "Get-Service | Select-Object Name, Status"),
+    ("Get-Process | Format-List -Property Name, 'CPU'", "Get-Process | Select-Object Name, 'CPU'"),
+    # Layouts Select-Object can't reproduce run as text
+    ("Get-Service | Format-Table -GroupBy Status", None),
+    ("Get-Process | Format-Table Name, @{Name='MB'; Expression={$_.WS / 1MB}}", None),
+    ("Get-Process | ft -Property { $_.Name }", None),
+    ("Get-Service | Where-Object { $_ | Format-List }", "Get-Service | Where-Object { $_ | Format-List }"),
+    ("Get-Process; Get-Service | Format-Table", "Get-Process; Get-Service"),
+    ("Get-ChildItem", "Get-ChildItem"),
+])
+def test_strip_formatting(command, expected):
+    assert strip_formatting(command) == expected
+
+def test_lazy_columnar_views():
+    result = StructuredResult.from_marker(_marker("json", json.dumps(PROCESSES)))
+    assert result._columns is None # Nothing decoded yet
+    assert len(result) == 4 and result.columns == ["Name", "Id", "CPU"]
+
+    by_cpu = result.sort("cpu", descending=True)
+    assert by_cpu.column("Name") == ["chrome", "code", "explorer", "Idle"] # Empty cells stay last
+    assert by_cpu._columns is result._columns # Views share the decoded columns
+
+    assert result.filter("name", "EX").column("Id") == [3312]
+    assert result.filter("Id", lambda v: v > 4000).slice(0, 1).rows() == [{"Name": "chrome", "Id": 4120, "CPU": 812.5}]
+    table = result.select("Name", "Id").render(max_rows=2)
+    assert table.splitlines()[0].split() == ["Name", "Id"]
+    assert table.endswith("... 2 more rows")
+
+def test_csv_and_scalar_payloads():
+    csv_result = StructuredResult.from_marker(_marker("csv", '"Name","Id"\n"b","10"\n"a","9"'))
+    assert csv_result.sort("Id").column("Name") == ["a", "b"] # Numeric strings sort as numbers
+    scalar = StructuredResult.from_marker(_marker("json", json.dumps("Intel(R) Core(TM) i7")))
+    assert scalar.render() == "Intel(R) Core(TM) i7"
+    text, result = parse_output("plain text only")
+    assert result is None and text == "plain text only"
+
+def test_runner_requests_objects_for_read_only_queries():
+    session = StructuredSession()
+    logs = []
+    runner = RunnerBridge(lambda msg, style="info": logs.append(msg), session=session,
+                          result_cache=ResultCache(enabled=False), output_format="json")
+    intent = Intent(intent_type="list_processes", target="processes", risk=RiskLevel.LOW, description="Processes")
+
+    assert runner.execute("Get-Process | Format-Table", intent)
+    assert "-OutputFormat 'Json'" in session.scripts[0]
+    assert len(runner.last_result) == 4
+    assert any(line.startswith("Name") and "CPU" in line for line in logs)
+
+    view = ResultView()
+    assert view.handle(runner.last_result, ["filter", "name", "c"]).count("\n") == 3 # header, rule, chrome, code
+    assert "code" not in view.handle(runner.last_result, ["head", "1"])
+    with pytest.raises(ValueError):
+        view.handle(runner.last_result, ["sort", "Nope"])
+
+    # Commands that change state stay in text mode
+    runner.execute("Stop-Process -Name notepad", intent)
+    assert "-OutputFormat 'Text'" in session.scripts[1]
+
+def test_runner_keeps_requested_columns_or_falls_back_to_text():
+    session = StructuredSession()
+    runner = RunnerBridge(lambda msg, style="info": None, session=session,
+                          result_cache=ResultCache(enabled=False), output_format="json")
+    intent = Intent(intent_type="list_processes", target="processes", risk=RiskLevel.LOW, description="Processes")
+
+    runner.execute("Get-Process | Format-Table Name, CPU, Id", intent)
+    assert "-OutputFormat 'Json'" in session.scripts[0]
+    assert _encoded("Get-Process | Select-Object Name, CPU, Id") in session.scripts[0]
+
+    runner.execute("Get-Service | Format-Table -GroupBy Status", intent)
+    assert "-OutputFormat 'Text'" in session.scripts[1]
+    assert _encoded("Get-Service | Format-Table -GroupBy Status") in session.scripts[1]
@@ -0,0 +1,113 @@
+import sys
+import os
+import io
+import base64
+import json
+import queue
+import threading
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tracing import span, tracer, traced, NULL_SPAN
+from core.execution import ExecutionManager
+from core.powershell_session import PowerShellSession
+from core.schemas import Intent, RiskLevel
+
+class NullSession:
+    def run_command(self, script):
+        return "ERROR: no kernel"
+
+class DictNLU:
+    def resolve_intent(self, user_input, bypass_cache=False):
+        return Intent(intent_type="get_date", target="clock", risk=RiskLevel.LOW, description="Date",
+                      generated_command="Get-Date")
+
+class FakeProcess:
+    """Enough of Popen for _run_command: the reply is queued before the request is written."""
+    def __init__(self):
+        self.stdin = io.StringIO()
+
+    def poll(self):
+        return None
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer.configure(str(path))
+    yield path
+    tracer.shutdown()
+
+def _spans(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def test_disabled_tracing_is_a_no_op():
+    assert not tracer.enabled
+    assert span("anything") is NULL_SPAN
+    assert traced("x")(lambda: 42)() == 42
+
+def test_process_input_spans_nest_across_stage_threads(trace_file):
+    manager = ExecutionManager(NullSession(), nlu_bridge=DictNLU())
+    manager.process_input("saat kaç")
+    manager.stage_executor.shutdown()
+
+    spans = _spans(trace_file)
+    root = next(s for s in spans if s["name"] == "intent")
+    assert root["parent_id"] is None and root["attrs"]["intent_type"] == "get_date"
+    assert manager.last_trace_id == root["trace_id"]
+    by_id = {s["span_id"]: s for s in spans}
+    stages = {s["name"] for s in spans if s["name"].startswith("stage.")}
+    assert {"stage.normalize", "stage.resolve", "stage.dispatch", "stage.assess", "stage.prescan"} <= stages
+    # Stages that ran on the executor still hang off the request's root span
+    for s in spans:
+        assert s["trace_id"] == root["trace_id"]
+        if s["name"].startswith("stage."):
+            assert by_id[s["parent_id"]]["name"] == "intent"
+    assert any(s["name"] == "sentinel.assess" for s in spans)
+
+def test_run_command_sub_spans_and_kernel_timings(trace_file):
+    session = PowerShellSession.__new__(PowerShellSession)
+    session.delimiter = "END"
+    session.read_timeout_seconds = 5
+    session.output_queue = queue.Queue()
+    session._lock = threading.RLock()
+    session.process = FakeProcess()
+    session.recorder = None
+    timings = '{"llm_context_ms": [2, 40], "llm_http_ms": [45, 812.5], "llm_generation_ms": [1, 900], "risk_score_ms": [905, 3]}'
+    for line in ["KERNEL_TIMINGS:" + timings, "Get-Date", "END"]:
+        session.output_queue.put(line + "\n")
+
+    with span("intent"):
+        output = session.run_command("Resolve-Intent -UserInput 'x'")
+    assert output == "Get-Date" # The timings line never reaches the bridges
+    sent = base64.b64decode(session.process.stdin.getvalue().split("'")[1]).decode("utf-16le")
+    assert "$Global:IntentShellTimings" in sent
+
+    spans = {s["name"]: s for s in _spans(trace_file)}
+    call = spans["kernel.run_command"]
+    for name in ("kernel.lock_wait", "kernel.encode", "kernel.write", "kernel.wait", "kernel.decode"):
+        assert spans[name]["parent_id"] == call["span_id"]
+    assert spans["kernel.llm_http"]["duration_ms"] == 812.5
+    assert spans["kernel.llm_http"]["attrs"]["reported_by"] == "kernel"
+    assert spans["kernel.risk_score"]["parent_id"] == call["span_id"]
+    # Stages the Kernel ran inside another one nest under it instead of following it
+    generation = spans["kernel.llm_generation"]
+    assert generation["parent_id"] == call["span_id"]
+    assert spans["kernel.llm_context"]["parent_id"] == generation["span_id"]
+    assert spans["kernel.llm_http"]["parent_id"] == generation["span_id"]
+    # Both starts are exported rounded to the microsecond
+    assert spans["kernel.llm_http"]["start"] - generation["start"] == pytest.approx(0.044, abs=1e-5)
+
+def test_chrome_trace_format(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer.configure(str(path))
+    try:
+        with span("intent.resolve", trace_id="abc", input="x"):
+            with span("nlu.query_kernel"):
+                pass
+    finally:
+        tracer.shutdown()
+    events = json.loads(path.read_text(encoding="utf-8").rstrip().rstrip(",") + "]")
+    assert [e["name"] for e in events] == ["nlu.query_kernel", "intent.resolve"]
+    assert all(e["ph"] == "X" and e["args"]["trace_id"] == "abc" for e in events)
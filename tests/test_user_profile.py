@@ -0,0 +1,64 @@
+import sys
+import os
+import json
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.user_profile as user_profile
+from core.user_profile import UserProfile
+
+def test_events_are_journaled_and_shared(tmp_path):
+    path = str(tmp_path / "user_profile.json")
+    overlay, cli = UserProfile(path), UserProfile(path)
+    overlay.record_success("list_processes", "low", "list processes")
+    with open(path, encoding="utf-8") as f:
+        snapshot = f.read()
+
+    for _ in range(5):
+        overlay.record_success("list_processes", "low", "list processes")
+    cli.record_success("clean_temp", "high", "temp klasörünü temizle")
+
+    # Appends only: the snapshot is written once, when the journal starts
+    with open(overlay.journal_file, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 1 + 7
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == snapshot
+    # Each instance sees the other's events
+    assert cli.get_trust_modifier("list_processes") == 0.1
+    assert overlay.get_recent_history(1)[0]["intent"] == "clean_temp"
+    assert abs(cli.trust_level - overlay.trust_level) < 1e-9
+
+    reloaded = UserProfile(path)
+    assert reloaded.trusted_intents == {"list_processes": 6, "clean_temp": 1}
+    assert abs(reloaded.trust_level - 0.16) < 1e-9
+
+def test_compaction_and_crash_recovery(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_profile, "COMPACT_EVENTS", 5)
+    path = str(tmp_path / "user_profile.json")
+    profile = UserProfile(path)
+    for i in range(7):
+        profile.record_success(f"intent_{i % 2}", "low", f"input {i}")
+
+    # Compacted after 5 events: the snapshot holds them, the journal the other 2
+    with open(path, encoding="utf-8") as f:
+        assert sum(json.load(f)["trusted_intents"].values()) == 5
+    with open(profile.journal_file, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 1 + 2
+
+    # Crash while appending: the torn line is skipped and the next event still lands
+    with open(profile.journal_file, "ab") as f:
+        f.write(b'{"timestamp": "2026-01-01", "intent": "torn')
+    recovered = UserProfile(path)
+    assert sum(recovered.trusted_intents.values()) == 7
+    recovered.record_success("intent_0", "low")
+    assert sum(UserProfile(path).trusted_intents.values()) == 8
+
+    # Crash between writing the snapshot and replacing the journal: the stale journal is not replayed
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["trusted_intents"] = dict(UserProfile(path).trusted_intents)
+    data["journal_generation"] = "newer"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert sum(UserProfile(path).trusted_intents.values()) == 8
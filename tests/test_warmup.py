@@ -0,0 +1,76 @@
+import sys
+import os
+import threading
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bridge_nlu import NLUBridge
+from core.powershell_session import PowerShellSession
+from core.schemas import RiskLevel
+from core.warmup import KernelWarmup
+from tests.conftest import fake_kernel_command
+
+LIST_PROCESSES = {"intent": "list_processes", "target": "processes", "action": "list", "risk": "low",
+                  "description": "List running processes", "generated_command": "Get-Process | Select-Object Name, Id"}
+CLEAN_TEMP = {"intent": "clean_temp", "target": "temp", "action": "delete", "risk": "high",
+              "description": "Clean temp files", "generated_command": "Remove-Item C:\\Temp\\* -Recurse -Force"}
+
+def test_cache_hits_are_served_while_the_kernel_starts(tmp_path):
+    gate = threading.Event()
+    def slow_session():
+        gate.wait(10)
+        return PowerShellSession(kernel_command=fake_kernel_command())
+    warmup = KernelWarmup(session_factory=slow_session).start()
+    try:
+        assert warmup.local.wait(10)
+        nlu = warmup.nlu
+        nlu.cache = {}
+        nlu.cache_file = str(tmp_path / "intent_cache.json")
+        nlu.key_file = str(tmp_path / "intent_cache.key")
+        nlu.add_cache_entries({NLUBridge.cache_key("list processes"): LIST_PROCESSES,
+                               NLUBridge.cache_key("clean temp"): CLEAN_TEMP})
+
+        intent, command, risk, trust = warmup.resolve_local(" list processes ")
+        assert intent.intent_type == "list_processes" and command == LIST_PROCESSES["generated_command"]
+        assert risk.level == RiskLevel.LOW and trust == 0.0
+        # A miss, or a verdict the Kernel double-checks ([Sentinel] kernel_double_check), waits for the Kernel
+        assert warmup.resolve_local("what time is it") is None
+        assert warmup.resolve_local("clean temp") is None
+        assert not warmup.ready.is_set() and warmup.exec_manager is None
+
+        gate.set()
+        assert warmup.wait()
+        assert warmup.error is None
+        # The manager reuses the warm bridges, so the cache loaded meanwhile is kept
+        manager = warmup.exec_manager
+        assert manager.nlu is nlu and manager.sentinel is warmup.sentinel and manager.session is warmup.session
+        intent, _, _ = manager.process_input("what time is it")
+        assert intent.intent_type == "get_date"
+    finally:
+        gate.set()
+        warmup.wait()
+        if warmup.exec_manager:
+            warmup.exec_manager.close()
+
+def test_failed_start_is_reported():
+    def broken_session():
+        raise RuntimeError("pwsh not found")
+    reported = []
+    warmup = KernelWarmup(session_factory=broken_session, on_ready=reported.append).start()
+    assert warmup.wait()
+    assert reported == [warmup]
+    assert isinstance(warmup.error, RuntimeError) and warmup.exec_manager is None
+    # The bridges loaded before the failure still answer local lookups
+    assert warmup.local.is_set() and warmup.resolve_local("something uncached") is None
+
+def test_local_answers_wait_for_on_local():
+    seen = []
+    def on_local(warmup):
+        # The UI is still wiring up its local components: nothing may be answered yet
+        seen.append((warmup.local.is_set(), warmup.resolve_local("list processes")))
+    def broken_session():
+        raise RuntimeError("pwsh not found")
+    warmup = KernelWarmup(session_factory=broken_session, on_local=on_local).start()
+    assert warmup.wait()
+    assert seen == [(False, None)] and warmup.local.is_set()
@@ -0,0 +1,129 @@
+"""
+Log model behind the overlay's log view.
+
+Messages from any thread go into a bounded ring buffer of lines plus a pending batch; the
+Tk thread drains the batch at most once per frame and applies it with a single insert.
+Outputs longer than spill_lines are written to a file and only their head is shown, with a
+"show full output" line that opens the file (see IntentShellOverlay.show_full_output).
+"""
+import configparser
+import os
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+CONFIG_PATH = os.path.join("config", "main.ini")
+SPILL_DIR = os.path.join("cache", "overlay")
+PREVIEW_LINES = 40  # Head of a spilled output that is still shown inline
+FULL_OUTPUT_TAG = "full_output"
+
+
+def load_log_settings(path: str = CONFIG_PATH) -> Tuple[int, int]:
+    """Returns (max_lines, spill_lines) from the [Overlay] section of config/main.ini."""
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path, encoding="utf-8")
+    return config.getint("Overlay", "max_lines", fallback=2000), config.getint("Overlay", "spill_lines", fallback=500)
+
+
+@dataclass
+class LogBatch:
+    """What the view has to apply: clear it first if reset, then append lines ((text, tag) pairs)."""
+    reset: bool = False
+    lines: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class LogBuffer:
+    """
+    Thread-safe ring buffer of (text, tag) lines. append() returns True when it starts a
+    new pending batch, i.e. when the caller has to schedule a flush on the UI thread.
+    """
+    def __init__(self, max_lines: int = 2000, spill_lines: int = 500, spill_dir: str = SPILL_DIR):
+        self.max_lines = max(1, max_lines)
+        self.spill_lines = spill_lines
+        self.spill_dir = spill_dir
+        self.lines = deque(maxlen=self.max_lines)
+        self.spill_files: List[str] = []
+        self._pending = LogBatch()
+        self._has_pending = False
+        self._lock = threading.Lock()
+
+    def append(self, text: str, tag: str = "normal") -> bool:
+        lines = text.split("\n")
+        if self.spill_lines and len(lines) > self.spill_lines:
+            lines = self._spill(text, lines, tag)
+        else:
+            lines = [(line, tag) for line in lines]
+        with self._lock:
+            self.lines.extend(lines)
+            # Pending lines beyond the cap would be trimmed right after the insert anyway
+            pending = self._pending.lines
+            pending.extend(lines)
+            if len(pending) > self.max_lines:
+                del pending[:-self.max_lines]
+            started = not self._has_pending
+            self._has_pending = True
+        return started
+
+    def _spill(self, text: str, lines: List[str], tag: str) -> List[Tuple[str, str]]:
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"output_{uuid.uuid4().hex[:12]}.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError:
+            # No file to show later: keep the head and say how much was cut
+            hidden = len(lines) - PREVIEW_LINES
+            return [(line, tag) for line in lines[:PREVIEW_LINES]] + [(f"... {hidden:,} more lines not shown", "dim")]
+        with self._lock:
+            self.spill_files.append(path)
+        hidden = len(lines) - PREVIEW_LINES
+        marker = f"... {hidden:,} more lines. Show full output ({os.path.basename(path)})"
+        return [(line, tag) for line in lines[:PREVIEW_LINES]] + [(marker, FULL_OUTPUT_TAG)]
+
+    def clear(self) -> bool:
+        """Empties the buffer; like append, returns True if a flush has to be scheduled."""
+        with self._lock:
+            self.lines.clear()
+            self._pending = LogBatch(reset=True)
+            started = not self._has_pending
+            self._has_pending = True
+            spilled, self.spill_files = self.spill_files, []
+        self._remove(spilled)
+        return started
+
+    def drain(self) -> Optional[LogBatch]:
+        """Takes the pending batch (UI thread), or None if nothing changed since the last drain."""
+        with self._lock:
+            if not self._has_pending:
+                return None
+            batch, self._pending = self._pending, LogBatch()
+            self._has_pending = False
+        return batch
+
+    def text(self) -> str:
+        with self._lock:
+            return "\n".join(line for line, _ in self.lines)
+
+    def spill_path(self, name: str) -> Optional[str]:
+        """Path of a spilled output named in a marker line, if this buffer wrote it."""
+        with self._lock:
+            for path in self.spill_files:
+                if os.path.basename(path) == name:
+                    return path
+        return None
+
+    def close(self):
+        with self._lock:
+            spilled, self.spill_files = self.spill_files, []
+        self._remove(spilled)
+
+    @staticmethod
+    def _remove(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
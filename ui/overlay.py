@@ -7,16 +7,27 @@ import os
 import getpass
 import datetime
 import random
+import atexit
+from collections import deque
 
 # Ensure path is correct
 sys.path.append(os.getcwd())
 
-from core.bridge_runner import RunnerBridge
-from core.schemas import RiskLevel
+# The bridges, jobs and structured output (pydantic) load on the warm-up thread, see core/warmup.py
 from core.user_profile import UserProfile
-from core.powershell_session import PowerShellSession
-from core.execution import ExecutionManager
-from core.command_explainer import CommandExplainer
+from core.warmup import KernelWarmup
+from core.completion import Autocomplete, load_completion_settings
+from core.prefetch import SpeculativePrefetcher, load_prefetch_settings
+from core.tracing import configure_from_env, span
+from core.metrics import start_exporter_from_config
+from core.cancellation import CancellationToken, OperationCancelled
+from ui.log_buffer import LogBuffer, load_log_settings, FULL_OUTPUT_TAG
+
+LOG_FRAME_MS = 16 # Log lines are inserted at most once per frame
+FULL_OUTPUT_CHUNK = 2000 # Lines the full output view inserts per tick
+# Keys that move through or accept suggestions rather than change the input
+SUGGESTION_KEYS = {"Return", "Escape", "Tab", "Up", "Down", "Left", "Right", "Home", "End",
+                   "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
 
 class IntentShellOverlay:
     def __init__(self, root):
@@ -71,7 +82,26 @@ class IntentShellOverlay:
         self.entry.pack(fill=tk.X, padx=10, pady=10)
         self.entry.bind("<Return>", self.process_intent)
         self.entry.bind("<Escape>", self.hide_window)
+        self.entry.bind("<KeyRelease>", self.update_suggestions)
+        self.entry.bind("<KeyRelease>", self.prefetch_input, add="+")
+        self.entry.bind("<Tab>", self.accept_suggestion)
+        self.entry.bind("<Down>", lambda e: self.move_suggestion(1))
+        self.entry.bind("<Up>", lambda e: self.move_suggestion(-1))
         self.entry.focus_set()
+
+        # Suggestions (history, cached utterances, #macros); packed under the entry while there are any
+        self.suggestion_list = tk.Listbox(
+            self.main_frame,
+            height=0,
+            bg="#252526",
+            fg="#cccccc",
+            selectbackground=self.accent_color,
+            font=self.font_log,
+            relief=tk.FLAT,
+            highlightthickness=0,
+            activestyle="none"
+        )
+        self.suggestion_list.bind("<ButtonRelease-1>", self.accept_suggestion)
         
         # Hint Label
         self.hint_label = tk.Label(
@@ -82,6 +112,16 @@ class IntentShellOverlay:
             font=("Consolas", 8)
         )
         self.hint_label.pack(side=tk.BOTTOM, pady=(0, 5))
+
+        # Kernel readiness: starting -> ready (or unavailable)
+        self.kernel_label = tk.Label(
+            self.main_frame,
+            text="● Kernel starting...",
+            bg=self.bg_color,
+            fg=self.warning_color,
+            font=("Consolas", 8)
+        )
+        self.kernel_label.pack(side=tk.BOTTOM)
         
         # Status/Log Area (Hidden initially)
         self.log_text = tk.Text(
@@ -95,6 +135,17 @@ class IntentShellOverlay:
             wrap=tk.WORD
         )
         self.log_text.bind("<Key>", self.prevent_modification)
+        self.log_text.tag_config("error", foreground=self.error_color)
+        self.log_text.tag_config("warning", foreground=self.warning_color)
+        self.log_text.tag_config("success", foreground=self.success_color)
+        self.log_text.tag_config("critical", foreground="#ff0000", font=("Consolas", 10, "bold"))
+        self.log_text.tag_config(FULL_OUTPUT_TAG, foreground=self.accent_color, underline=True)
+        self.log_text.tag_bind(FULL_OUTPUT_TAG, "<Button-1>", self.show_full_output)
+        self.log_text.tag_bind(FULL_OUTPUT_TAG, "<Enter>", lambda e: self.log_text.configure(cursor="hand2"))
+        self.log_text.tag_bind(FULL_OUTPUT_TAG, "<Leave>", lambda e: self.log_text.configure(cursor=""))
+        # Lines shown in log_text ([Overlay] max_lines); outputs over spill_lines go to a file
+        self.log_buffer = LogBuffer(*load_log_settings())
+        atexit.register(self.log_buffer.close)
         
         # Context Menu
         self.context_menu = tk.Menu(self.log_text, tearoff=0, bg="#2d2d2d", fg="white")
@@ -110,12 +161,24 @@ class IntentShellOverlay:
         self.btn_export = tk.Button(self.dev_frame, text="Export Report", command=self.export_report, bg="#3e3e3e", fg="white", font=("Consolas", 8), relief=tk.FLAT)
         self.btn_export.pack(side=tk.RIGHT, padx=5, pady=2)
         
-        # Initialize Components
-        self.session = PowerShellSession()
-        self.exec_manager = ExecutionManager(self.session)
-        self.explainer = CommandExplainer()
-        self.executor = RunnerBridge(self.log_output, session=self.session)
+        # Initialize Components: the Kernel warms up in the background so the window is usable at once.
+        # Filled in by _on_local_ready (executor, jobs, result_view) and _on_kernel_ready (session, exec_manager).
+        self.session = None
+        self.exec_manager = None
+        self.explainer = None
+        self.executor = None
+        self.jobs = None
+        self.result_view = None
         self.profile = UserProfile()
+        # Built with the bridges in _on_local_ready, updated after every successful command
+        self.completion_enabled, max_suggestions, half_life_days = load_completion_settings()
+        self.completer = Autocomplete(self.profile, max_suggestions=max_suggestions, half_life_days=half_life_days)
+        # Resolves the input while it is typed ([Prefetch]); created once the Kernel is ready
+        self.prefetcher = None
+        # Input submitted before the Kernel was ready; replayed one by one once it is
+        self.pending_inputs = deque()
+        self.warmup = KernelWarmup(profile=self.profile, on_local=self._on_local_ready,
+                                   on_ready=self._on_kernel_ready).start()
         
         # Check Developer Mode
         self.dev_mode_enabled = self.check_dev_mode()
@@ -139,6 +202,9 @@ class IntentShellOverlay:
         self.thinking_active = False
         self.thinking_dots = 0
         self.thinking_timer = None
+
+        # Token of the request being resolved or executed; Esc cancels it instead of closing
+        self.cancel_token = None
         
     def check_dev_mode(self):
         try:
@@ -161,10 +227,10 @@ class IntentShellOverlay:
                 f.write("=== IntentShell Developer Diagnostic Report ===\n")
                 f.write(f"Generated: {datetime.datetime.now()}\n")
                 f.write(f"User: {getpass.getuser()}\n")
-                f.write(f"Session Active: {bool(self.session.process)}\n")
+                f.write(f"Session Active: {bool(self.session and self.session.process)}\n")
                 f.write("-" * 40 + "\n")
                 f.write("Recent Logs:\n")
-                f.write(self.log_text.get("1.0", tk.END))
+                f.write(self.log_buffer.text() + "\n")
             
             self.log_output(f"Report exported: {report_file}", "success")
             # Open the file location
@@ -172,17 +238,154 @@ class IntentShellOverlay:
         except Exception as e:
             self.log_output(f"Export failed: {e}", "error")
 
+    def _on_local_ready(self, warmup):
+        """Warm-up thread: the bridges are loaded, the Kernel is still starting."""
+        from core.bridge_runner import RunnerBridge
+        from core.command_explainer import CommandExplainer
+        from core.jobs import JobManager
+        from core.structured_output import ResultView
+        self.explainer = CommandExplainer()
+        # Gets the session in _on_kernel_ready; dry runs need none
+        self.executor = RunnerBridge(self.log_output)
+        # Slow intents run on a separate worker Kernel
+        self.jobs = JobManager(on_finish=self._on_job_finished)
+        # Sort/filter the last query result without re-running it
+        self.result_view = ResultView(self.executor.max_rows)
+        if self.completion_enabled:
+            self.completer.build()
+
+    def _on_kernel_ready(self, warmup):
+        """Warm-up thread: the session is up, or failed to start."""
+        if warmup.error is None:
+            self.session = warmup.session
+            self.executor.session = self.session
+            self.exec_manager = warmup.exec_manager
+            enabled, debounce_ms, min_chars, max_per_minute, burst = load_prefetch_settings()
+            if enabled:
+                self.prefetcher = SpeculativePrefetcher(self.exec_manager.resolve_speculatively, debounce_ms=debounce_ms,
+                                                        min_chars=min_chars, max_per_minute=max_per_minute, burst=burst,
+                                                        is_idle=self._prefetch_idle)
+        self.root.after(0, self._show_kernel_ready)
+
+    def _show_kernel_ready(self):
+        if self.exec_manager is None:
+            self.kernel_label.config(text="● Kernel unavailable", fg=self.error_color)
+            if self.pending_inputs:
+                self.log_output(f"Kernel failed to start: {self.warmup.error}. Dropped {len(self.pending_inputs)} queued request(s).", "error")
+                self.pending_inputs.clear()
+            return
+        self.kernel_label.config(text="● Kernel ready", fg=self.success_color)
+        self._run_next_pending()
+
+    def _queue_input(self, user_input):
+        """Tk thread: keeps input that needs the Kernel until it is ready."""
+        if self.warmup.ready.is_set() and self.exec_manager is None:
+            self.log_output(f"Kernel failed to start: {self.warmup.error}", "error")
+            return
+        self.pending_inputs.append(user_input)
+        if self.exec_manager is not None:
+            # Became ready in the meantime
+            self._run_next_pending()
+            return
+        self.log_output(f"Queued until the Kernel is ready ({len(self.pending_inputs)} waiting): {user_input}", "warning")
+        if self.input_var.get().strip() == user_input:
+            self.input_var.set("")
+
+    def _run_next_pending(self):
+        """Submits the oldest queued input once the Kernel is ready and nothing else is in flight."""
+        if not self.pending_inputs or self.exec_manager is None:
+            return
+        if self.waiting_confirmation or self.cancel_token is not None or str(self.entry.cget("state")) == tk.DISABLED:
+            return
+        user_input = self.pending_inputs.popleft()
+        self.log_output(f"\n> {user_input}", "dim")
+        self.input_var.set(user_input)
+        self.process_intent(keep_log=True)
+
+    def update_suggestions(self, event=None):
+        """Entry KeyRelease: looks the text up in the completion index (a few microseconds)."""
+        if event is not None and event.keysym in SUGGESTION_KEYS:
+            return
+        if (not self.completion_enabled or self.waiting_confirmation or self.experimental_join_stage > 0
+                or str(self.entry.cget("state")) == tk.DISABLED):
+            self.hide_suggestions()
+            return
+        suggestions = self.completer.suggest(self.input_var.get())
+        if not suggestions:
+            self.hide_suggestions()
+            return
+        self.suggestion_list.delete(0, tk.END)
+        self.suggestion_list.insert(tk.END, *suggestions)
+        self.suggestion_list.config(height=len(suggestions))
+        if not self.suggestion_list.winfo_ismapped():
+            self.suggestion_list.pack(after=self.entry, fill=tk.X, padx=10, pady=(0, 5))
+        self._fit_suggestions(len(suggestions))
+
+    def prefetch_input(self, event=None):
+        """Entry KeyRelease: lets the prefetcher resolve the text once typing pauses."""
+        if self.prefetcher is None or (event is not None and event.keysym in SUGGESTION_KEYS):
+            return
+        text = self.input_var.get()
+        if not self._prefetch_idle() or text.lower().split()[:1] in (["jobs"], ["view"]):
+            return
+        self.prefetcher.update(text)
+
+    def _prefetch_idle(self) -> bool:
+        # Also read from the prefetch timer thread: no speculation while a real request is in flight
+        return self.cancel_token is None and not self.waiting_confirmation and self.experimental_join_stage == 0
+
+    def hide_suggestions(self):
+        if self.suggestion_list.winfo_ismapped():
+            self.suggestion_list.pack_forget()
+            self._fit_suggestions(0)
+
+    def _fit_suggestions(self, rows):
+        # The collapsed window only has room for the entry; the expanded one shares the log's space
+        if self.log_text.winfo_ismapped():
+            return
+        base_height = int(self.geometry_base.split("+")[0].split("x")[1])
+        extra = rows * self.font_log.metrics("linespace") + 5 if rows else 0
+        self.root.geometry(f"700x{base_height + extra}+{self.root.winfo_x()}+{self.root.winfo_y()}")
+
+    def move_suggestion(self, step):
+        if not self.suggestion_list.winfo_ismapped():
+            return None
+        size = self.suggestion_list.size()
+        selected = self.suggestion_list.curselection()
+        index = (selected[0] + step) % size if selected else (0 if step > 0 else size - 1)
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.selection_set(index)
+        self.suggestion_list.see(index)
+        return "break"
+
+    def accept_suggestion(self, event=None):
+        """Tab (or a click) puts the selected suggestion, or the best one, into the entry."""
+        if self.suggestion_list.winfo_ismapped() and self.suggestion_list.size():
+            selected = self.suggestion_list.curselection()
+            self.input_var.set(self.suggestion_list.get(selected[0] if selected else 0))
+            self.entry.icursor(tk.END)
+            self.entry.focus_set()
+            self.hide_suggestions()
+        return "break"
+
     def show_window(self):
         self.root.deiconify()
         self.entry.focus_set()
         self.entry.selection_range(0, tk.END)
         
     def hide_window(self, event=None):
+        if self.cancel_current():
+            return "break"
         self.root.withdraw()
         self.reset_ui()
         
     def reset_ui(self):
         self.stop_thinking_animation()
+        self.hide_suggestions()
+        if self.prefetcher:
+            self.prefetcher.cancel()
+        # Queued input would otherwise run (and wait for confirmation) in a hidden window
+        self.pending_inputs.clear()
         self.input_var.set("")
         self.log_text.pack_forget()
         self.root.geometry(self.geometry_base)
@@ -198,6 +401,26 @@ class IntentShellOverlay:
         self.experimental_join_stage = 0
         self.main_frame.configure(highlightbackground=self.accent_color)
         
+    def _begin_cancellable(self) -> CancellationToken:
+        """Called on the worker thread that runs a request."""
+        token = self.cancel_token = CancellationToken()
+        self.root.after(0, lambda: self.hint_label.config(text="Press Esc to cancel"))
+        return token
+
+    def _end_cancellable(self, token: CancellationToken):
+        if self.cancel_token is token:
+            self.cancel_token = None
+        self.root.after(0, lambda: self.hint_label.config(text="Press Esc to close"))
+
+    def cancel_current(self) -> bool:
+        """Cancels the running request (Esc). False if nothing is running."""
+        token = self.cancel_token
+        if token is None or token.cancelled:
+            return token is not None # Still stopping: don't close the window under it
+        self.log_output("Cancelling...", "warning")
+        token.cancel()
+        return True
+
     def expand_window(self):
         # Increase height to show logs
         current_geom = self.root.geometry()
@@ -209,28 +432,74 @@ class IntentShellOverlay:
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
     def log_output(self, text: str, style: str = "info"):
-        def _update():
-            # self.log_text.configure(state=tk.NORMAL) # Always NORMAL now
-            
-            tag = "normal"
-            if style == "error":
-                tag = "error"
-                self.log_text.tag_config("error", foreground=self.error_color)
-            elif style == "warning":
-                tag = "warning"
-                self.log_text.tag_config("warning", foreground=self.warning_color)
-            elif style == "success":
-                tag = "success"
-                self.log_text.tag_config("success", foreground=self.success_color)
-            elif style == "critical":
-                tag = "critical"
-                self.log_text.tag_config("critical", foreground="#ff0000", font=("Consolas", 10, "bold"))
-                
-            self.log_text.insert(tk.END, text + "\n", tag)
+        tag = style if style in ("error", "warning", "success", "critical") else "normal"
+        # Called from worker threads: the first message of a frame schedules the flush
+        if self.log_buffer.append(text, tag):
+            self.root.after(LOG_FRAME_MS, self._flush_log)
+
+    def _flush_log(self):
+        """Applies the pending log lines with one insert, then trims log_text to the line cap."""
+        batch = self.log_buffer.drain()
+        if batch is None:
+            return
+        if batch.reset:
+            self.log_text.delete(1.0, tk.END)
+        if batch.lines:
+            # insert(index, chars, tags, chars, tags, ...): consecutive lines with the same tag share a chunk
+            args = []
+            chunk, chunk_tag = [], batch.lines[0][1]
+            for line, tag in batch.lines:
+                if tag != chunk_tag:
+                    args += ["\n".join(chunk) + "\n", chunk_tag]
+                    chunk, chunk_tag = [], tag
+                chunk.append(line)
+            args += ["\n".join(chunk) + "\n", chunk_tag]
+            self.log_text.insert(tk.END, *args)
+
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.log_buffer.max_lines
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
             self.log_text.see(tk.END)
-            # self.log_text.configure(state=tk.DISABLED)
-        
-        self.root.after(0, _update)
+
+    def show_full_output(self, event):
+        """Opens the spilled output under the click in a separate window, inserted a chunk per tick."""
+        line = self.log_text.get(f"@{event.x},{event.y} linestart", f"@{event.x},{event.y} lineend")
+        name = line[line.rfind("(") + 1:].rstrip(")")
+        path = self.log_buffer.spill_path(name)
+        if not path:
+            self.log_output("Full output is no longer available.", "error")
+            return "break"
+
+        window = tk.Toplevel(self.root)
+        window.title(f"IntentShell - {name}")
+        window.geometry("900x600")
+        window.attributes("-topmost", True)
+        scrollbar = tk.Scrollbar(window)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        view = tk.Text(window, bg=self.bg_color, fg="#cccccc", font=self.font_log, relief=tk.FLAT,
+                       wrap=tk.NONE, yscrollcommand=scrollbar.set)
+        view.bind("<Key>", lambda e: None if (e.state & 4) or e.keysym in ("Left", "Right", "Up", "Down", "Home", "End", "Prior", "Next") else "break")
+        view.pack(fill=tk.BOTH, expand=True)
+        scrollbar.configure(command=view.yview)
+
+        source = open(path, "r", encoding="utf-8", errors="replace")
+        def _load_chunk():
+            if not view.winfo_exists():
+                source.close()
+                return
+            lines = []
+            for line in source:
+                lines.append(line)
+                if len(lines) >= FULL_OUTPUT_CHUNK:
+                    break
+            if lines:
+                view.insert(tk.END, "".join(lines))
+                window.after(1, _load_chunk)
+            else:
+                source.close()
+        window.protocol("WM_DELETE_WINDOW", lambda: (source.close(), window.destroy()))
+        _load_chunk()
+        return "break"
 
     def start_thinking_animation(self):
         if self.thinking_active:
@@ -251,6 +520,7 @@ class IntentShellOverlay:
             
             # Update the last line (Thinking...)
             def _update_ui():
+                self._flush_log() # The "Thinking" line may still be pending
                 try:
                     # Delete last line content if it starts with Thinking
                     last_line_idx = self.log_text.index("end-2l linestart")
@@ -277,6 +547,7 @@ class IntentShellOverlay:
             
         # Clear "Thinking..." line
         def _clear_thinking():
+            self._flush_log()
             try:
                 last_line_idx = self.log_text.index("end-2l linestart")
                 last_line_text = self.log_text.get(last_line_idx, "end-2l lineend")
@@ -287,11 +558,8 @@ class IntentShellOverlay:
         self.root.after(0, _clear_thinking)
 
     def clear_log(self):
-        def _clear():
-            # self.log_text.configure(state=tk.NORMAL)
-            self.log_text.delete(1.0, tk.END)
-            # self.log_text.configure(state=tk.DISABLED)
-        self.root.after(0, _clear)
+        if self.log_buffer.clear():
+            self.root.after(0, self._flush_log)
 
     def prevent_modification(self, event):
         # Allow navigation and copy
@@ -325,8 +593,13 @@ class IntentShellOverlay:
         self.log_text.see(tk.INSERT)
         return "break"
 
-    def process_intent(self, event=None):
+    def process_intent(self, event=None, keep_log=False):
+        """Enter in the input field. keep_log: a queued input, shown below the previous output."""
+        if event is not None and self.suggestion_list.winfo_ismapped() and self.suggestion_list.curselection():
+            # Picked with Up/Down: submit the suggestion, not the typed prefix
+            self.accept_suggestion()
         user_input = self.input_var.get().strip()
+        self.hide_suggestions()
         
         if self.experimental_join_stage > 0:
             self.handle_experimental_flow(user_input)
@@ -340,21 +613,63 @@ class IntentShellOverlay:
         if not user_input:
             return
 
+        if self.jobs is None and user_input.split()[0].lower() in ("jobs", "view"):
+            # Bridges still loading (a fraction of a second)
+            self.expand_window()
+            self._queue_input(user_input)
+            return
+
+        if user_input.split()[0].lower() == "jobs":
+            self.expand_window()
+            if not keep_log:
+                self.clear_log()
+            self.input_var.set("")
+            self.handle_jobs_command(user_input)
+            return
+
+        if user_input.split()[0].lower() == "view":
+            self.expand_window()
+            if not keep_log:
+                self.clear_log()
+            self.input_var.set("")
+            try:
+                self.log_output(self.result_view.handle(self.executor.last_result, user_input.split()[1:]), "info")
+            except ValueError as e:
+                self.log_output(str(e), "error")
+            return
+
         # Start Processing in Thread
         self.expand_window()
-        self.clear_log()
+        if not keep_log:
+            self.clear_log()
         self.start_thinking_animation()
         # self.root.update() # No longer needed as we are in thread, but safe to remove
         
         threading.Thread(target=self._process_async, args=(user_input,), daemon=True).start()
 
     def _process_async(self, user_input):
+        token = self._begin_cancellable()
+        try:
+            self._process(user_input, token)
+        finally:
+            self._end_cancellable(token)
+            # Unknown intents and errors end here; the next queued input (if any) can go
+            self.root.after(0, self._run_next_pending)
+
+    def _process(self, user_input, token):
         self.current_user_input = user_input
         # 1. Unified Processing (Normalize -> Parse -> Dispatch -> Assess)
         try:
+            if self.exec_manager is None:
+                self._process_local(user_input)
+                return
+            # Resolved while the user was typing (waits for it if still in flight)
+            resolved = self.prefetcher.take(user_input, cancel_token=token) if self.prefetcher else None
             # Uses the Single Entry Point Logic
-            self.current_intent, self.current_command, self.current_risk_assessment = \
-                self.exec_manager.process_input(user_input, bypass_cache=False)
+            # The trust modifier is looked up alongside dispatch/assess
+            self.current_intent, self.current_command, self.current_risk_assessment, self.trust_mod = \
+                self.exec_manager.process_input(user_input, bypass_cache=False, cancel_token=token, resolved=resolved,
+                                                with_trust=True)
             
             self.stop_thinking_animation()
 
@@ -383,8 +698,9 @@ class IntentShellOverlay:
                      self.log_output("✅ Security Challenge Passed. Ghost Mode Enabled.", "success")
                      self.log_output("Retrying original intent...", "dim")
                      # Retry resolution with new permissions
-                     self.current_intent, self.current_command, self.current_risk_assessment = \
-                        self.exec_manager.process_input(user_input, bypass_cache=True) # Bypass cache on retry
+                     self.current_intent, self.current_command, self.current_risk_assessment, self.trust_mod = \
+                        self.exec_manager.process_input(user_input, bypass_cache=True, cancel_token=token,
+                                                        with_trust=True) # Bypass cache on retry
                 else:
                      self.log_output("❌ Authorization Denied. Operation blocked.", "error")
                      return
@@ -393,38 +709,55 @@ class IntentShellOverlay:
             if self.current_intent.intent_type == "experimental_join":
                  self.root.after(0, self.initiate_experimental_join_flow)
                  return
-                
-            # 2. Explain
-            # Pass risk assessment to explainer for "Honesty Mode"
-            explanation = self.explainer.explain(self.current_intent, self.current_risk_assessment)
-            self.log_output(explanation, "info")
-            
-            # 3. Command is already generated by ExecutionManager
-            self.log_output(f"Cmd: {self.current_command}", "dim")
-            
-            # 3.5. Time-based Risk Decay
-            # We trigger a decay check here to simulate time passage or just periodic cleanup
-            self.exec_manager.sentinel.suspension_system.record_risk(RiskLevel.LOW, "", "", [])
 
-            # 4. Dry Run
-            self.executor.dry_run(self.current_command, self.current_intent.description)
-            
-            # 5. Risk Assessment is already done by ExecutionManager
-            # self.current_risk_assessment = ...
-            
-            # 6. Apply Trust Modifier
-            # If user has done this many times, we might skip HIGH risk checks if not critical
-            self.trust_mod = self.profile.get_trust_modifier(self.current_intent.intent_type)
-            if self.trust_mod > 0:
-                self.log_output(f"Trust Bonus: {int(self.trust_mod*100)}% (Familiar Action)", "success")
-            
-            # 7. Ask Confirmation
-            self.root.after(0, self.request_confirmation)
+            self._present()
             
+        except OperationCancelled:
+            self.stop_thinking_animation()
+            self.log_output("Cancelled.", "warning")
         except Exception as e:
             self.stop_thinking_animation()
             self.log_output(f"Error: {e}", "error")
 
+    def _process_local(self, user_input):
+        """Kernel still starting: answers cache hits that need no Kernel, queues everything else."""
+        local = self.warmup.resolve_local(user_input)
+        self.stop_thinking_animation()
+        if local is None:
+            self.root.after(0, lambda: self._queue_input(user_input))
+            return
+        self.current_intent, self.current_command, self.current_risk_assessment, self.trust_mod = local
+        self._present()
+
+    def _present(self):
+        """Explains the resolved intent and asks for confirmation (worker thread)."""
+        from core.schemas import RiskLevel
+        # 2. Explain
+        # Pass risk assessment to explainer for "Honesty Mode"
+        explanation = self.explainer.explain(self.current_intent, self.current_risk_assessment)
+        self.log_output(explanation, "info")
+        
+        # 3. Command is already generated by ExecutionManager
+        self.log_output(f"Cmd: {self.current_command}", "dim")
+        
+        # 3.5. Time-based Risk Decay
+        # We trigger a decay check here to simulate time passage or just periodic cleanup
+        self.warmup.sentinel.suspension_system.record_risk(RiskLevel.LOW, "", "", [])
+
+        # 4. Dry Run
+        self.executor.dry_run(self.current_command, self.current_intent.description)
+        
+        # 5. Risk Assessment is already done by ExecutionManager
+        # self.current_risk_assessment = ...
+        
+        # 6. Apply Trust Modifier
+        # If user has done this many times, we might skip HIGH risk checks if not critical
+        if self.trust_mod > 0:
+            self.log_output(f"Trust Bonus: {int(self.trust_mod*100)}% (Familiar Action)", "success")
+        
+        # 7. Ask Confirmation
+        self.root.after(0, self.request_confirmation)
+
     def initiate_experimental_join_flow(self):
         from core.security.kernel_guard import assert_kernel_disabled
         assert_kernel_disabled()
@@ -434,6 +767,7 @@ class IntentShellOverlay:
         assert_kernel_disabled()
 
     def request_confirmation(self):
+        from core.schemas import RiskLevel
         risk_level = self.current_risk_assessment.level
         reasons = self.current_risk_assessment.reasons
         
@@ -479,6 +813,7 @@ class IntentShellOverlay:
             self.log_output("Press ENTER or type 'y' to confirm", "success")
 
     def handle_confirmation(self, user_input):
+        from core.schemas import RiskLevel
         # Use effective_risk_level for validation
         risk_level = self.effective_risk_level
         confirmed = False
@@ -519,15 +854,97 @@ class IntentShellOverlay:
         # Run in a separate thread to prevent UI freezing
         threading.Thread(target=self._execute_async, daemon=True).start()
 
+    def handle_jobs_command(self, user_input):
+        """jobs | jobs tail <id> | jobs cancel <id> | jobs collect <id>"""
+        from core.jobs import format_job
+        parts = user_input.split()
+        action = parts[1].lower() if len(parts) > 1 else "list"
+        job_id = parts[2] if len(parts) > 2 else None
+
+        if action == "list":
+            listed = self.jobs.list_jobs()
+            if not listed:
+                self.log_output("No background jobs.", "dim")
+            for meta in listed:
+                self.log_output(format_job(meta), "info")
+        elif not job_id:
+            self.log_output(f"Usage: jobs {action} <id>", "error")
+        elif action == "tail":
+            meta = self.jobs.get(job_id)
+            if not meta:
+                self.log_output(f"Unknown job: {job_id}", "error")
+                return
+            self.log_output(format_job(meta), "info")
+            for line in self.jobs.tail(job_id):
+                self.log_output(line, "dim")
+        elif action == "cancel":
+            if self.jobs.cancel(job_id):
+                self.log_output(f"Job {job_id} cancelled.", "warning")
+            else:
+                self.log_output(f"Job {job_id} is unknown or already finished.", "error")
+        elif action == "collect":
+            collected = self.jobs.collect(job_id)
+            if not collected:
+                self.log_output(f"Job {job_id} is unknown or still running.", "error")
+                return
+            meta, output = collected
+            self.log_output(format_job(meta), "info")
+            self.log_output(output.rstrip(), "info")
+        else:
+            self.log_output("Usage: jobs [list | tail <id> | cancel <id> | collect <id>]", "error")
+
+    def _on_job_finished(self, meta):
+        # Called from the job worker thread; log_output marshals onto the Tk thread
+        style = "success" if meta["status"] == "done" else "error"
+        self.log_output(f"Job {meta['id']} {meta['status']} (jobs collect {meta['id']})", style)
+        if meta["status"] == "done" and meta.get("intent"):
+            self.warmup.nlu.cache_successful_execution(meta["input"], meta["intent"])
+
     def _execute_async(self):
+        from core.jobs import is_potentially_slow
+        if is_potentially_slow(self.current_intent, self.current_command):
+            job_id = self.jobs.submit(self.current_command, self.current_intent, self.current_user_input)
+            self.log_output(f"Running in the background as job {job_id} (jobs tail {job_id} | jobs cancel {job_id})", "info")
+            self.root.after(0, self._ready_for_next_command)
+            return
+        token = self._begin_cancellable()
         try:
-            success = self.executor.execute(self.current_command, self.current_intent)
+            if self.exec_manager is None and not self._wait_for_kernel(token):
+                success = False
+            else:
+                # Joins the trace process_input started for this intent
+                with span("intent.execute", trace_id=self.exec_manager.last_trace_id):
+                    success = self.executor.execute(self.current_command, self.current_intent, cancel_token=token)
         except Exception as e:
             self.log_output(f"Execution Error: {e}", "error")
             success = False
-            
+        finally:
+            self._end_cancellable(token)
+
         # Callback to Main Thread
-        self.root.after(0, lambda: self._post_execution(success))
+        if token.cancelled:
+            self.root.after(0, self._ready_for_next_command)
+        else:
+            self.root.after(0, lambda: self._post_execution(success))
+
+    def _wait_for_kernel(self, token) -> bool:
+        """Worker thread: a cache hit served before the Kernel was up has been confirmed."""
+        self.log_output("Waiting for the Kernel to start...", "warning")
+        if not self.warmup.wait(cancel_token=token):
+            self.log_output("CANCELLED", "warning")
+            return False
+        if self.exec_manager is None:
+            self.log_output(f"Kernel failed to start: {self.warmup.error}", "error")
+            return False
+        return True
+
+    def _ready_for_next_command(self):
+        self.entry.config(state=tk.NORMAL)
+        self.entry.focus_set()
+        self.input_var.set("")
+        self.main_frame.configure(highlightbackground=self.accent_color)
+        self.log_output("\nReady for next command...", "dim")
+        self._run_next_pending()
 
     def _post_execution(self, success):
         # Re-enable input
@@ -539,6 +956,7 @@ class IntentShellOverlay:
             # Record success in profile
             if self.current_intent and self.current_risk_assessment:
                 self.profile.record_success(self.current_intent.intent_type, self.current_risk_assessment.level.value, self.current_user_input)
+                self.completer.record(self.current_user_input)
                 
                 # CACHE THE SUCCESSFUL INTENT HERE
                 # Using NLUBridge via ExecutionManager
@@ -550,8 +968,13 @@ class IntentShellOverlay:
             self.log_output("\nReady for next command...", "dim")
         else:
             self.log_output("Failed!", "error")
+        self._run_next_pending()
 
 def main():
+    configure_from_env()
+    exporter = start_exporter_from_config()
+    if exporter:
+        atexit.register(exporter.stop)
     root = tk.Tk()
     app = IntentShellOverlay(root)
     